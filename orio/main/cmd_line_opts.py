@@ -23,6 +23,10 @@ Options:
                                  1 and 6 indicating the level of verbosity.
   -e, --erase-annot              remove annotations from the output
   -h, --help                     display this message
+  -j <n>, --jobs=<n>             tune the source files and performance-tuning regions in <n>
+                                 concurrent processes (default 1)
+  --max-builds=<n>               with --jobs, the maximum number of concurrent build commands
+                                 (default: the number of cores)
   -o <file>, --output=<file>     place the output in <file> (only valid when processing 
                                  single files)
   -p, --output-prefix=<string>   generate output filename from input filename by prepending 
@@ -78,7 +82,7 @@ class CmdParser:
         for arg in argv[1:]:
             if not wrapper and arg.startswith('-'):
                 orioargv.append(arg)
-                if arg in ['-c','-o','-p','-s']: # switch with an argument
+                if arg in ['-c','-j','-o','-p','-s']: # switch with an argument
                     orioarg = True
                 continue
             argisinput = False
@@ -130,12 +134,12 @@ class CmdParser:
         # get all options
         try:
             opts, args = getopt.getopt(orioargv,
-                                       'c:d:ehko:p:rs:vx',
+                                       'c:d:ehj:ko:p:rs:vx',
                                        ['pre-command=','debug=','config=','configfile=', 'erase-annot', 'help', 'keep-temps',' output=',
                                         'output-prefix=', 'rename-objects',  'spec=', 'verbose', 'extern',
                                         'stop-on-error', 'search=',
                                         'validate', 'post-command=', 'meta', 'marker-loops',
-                                        'logdir='])
+                                        'logdir=', 'jobs=', 'max-builds='])
         except Exception as e:
             sys.stderr.write('Orio command-line error: %s' % e)
             sys.stderr.write(USAGE_MSG + '\n')
@@ -154,6 +158,14 @@ class CmdParser:
             elif opt in ('-h', '--help'):
                 sys.stdout.write(USAGE_MSG +'\n')
                 sys.exit(0)
+            elif opt in ('-j', '--jobs', '--max-builds'):
+                try:
+                    n = int(arg)
+                    if n < 1: raise ValueError(arg)
+                except ValueError:
+                    sys.stderr.write('Orio command-line error: %s expects a positive integer: %s\n' % (opt, arg))
+                    sys.exit(1)
+                cmdline['max_builds' if opt == '--max-builds' else 'jobs'] = n
             elif opt in ('-k', '--keep-temps'):
                 cmdline['keep_temps'] = True
             elif opt in ('-o', '--output'):
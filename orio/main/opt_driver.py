@@ -13,6 +13,9 @@ from functools import reduce
 PTUNE_NAME = 'PerfTuning'
 PRESERVE_NAME = 'Preserve'
 
+# the prefix of the variables of the dispatch over the tuned input sizes
+DISPATCH_PREFIX = 'orio_dispatch_'
+
 # the name of the module containing various code transformations
 TMOD_NAME = 'orio.module'
 
@@ -31,8 +34,12 @@ class OptDriver:
     
     #-------------------------------------------------------------
 
-    def optimizeCodeFrags(self, cfrags, perf_params, is_top_level = False):
-        '''Apply optimizations specified in the annotations to each code fragment'''
+    def optimizeCodeFrags(self, cfrags, perf_params, is_top_level = False, tuned_seqs = None):
+        '''
+        Apply optimizations specified in the annotations to each code fragment
+        @param tuned_seqs: the optimized code sequences of the code fragments already tuned
+                           (e.g., concurrently, see orio.main.tuning_pool), indexed by position
+        '''
 
         # check for the validity of performance tuning annotations
         if is_top_level:
@@ -42,9 +49,12 @@ class OptDriver:
 
         optimized_code_seq = None
         
-        for cf in cfrags:
+        for k, cf in enumerate(cfrags):
             
-            cur_seq = self.__optimizeCodeFrag(cf, perf_params)
+            if tuned_seqs and k in tuned_seqs:
+                cur_seq = tuned_seqs[k]
+            else:
+                cur_seq = self.__optimizeCodeFrag(cf, perf_params)
             if optimized_code_seq == None:
                 optimized_code_seq = cur_seq
             else:
@@ -58,26 +68,16 @@ class OptDriver:
 
     def __checkPerfTuningAnns(self, cfrags):
         '''
-        To ensure that:
-        1. Nested performance-tuning annotation does not exist
-        2. No more than one performance-tuning annotation exists
+        To ensure that nested performance-tuning annotation does not exist (each top-level
+        performance-tuning annotation is tuned separately)
         '''
 
         # iterate over all code fragments
-        num_ptune_anns = 0
         for cf in cfrags:
     
             # if a top-level annotation code region
             if isinstance(cf, orio.main.code_frag.AnnCodeRegion) and cf.leader_ann.mod_name == PTUNE_NAME:
 
-                # increment the total number of performance-tuning annotations
-                num_ptune_anns += 1
-
-                # if the total number of top-level performance-tuning annotations is more than one
-                if num_ptune_anns > 1:
-                    err(('orio.main.opt_driver: %s: the total number of performance-tuning annotations cannot ' +
-                         'be more than one') % cf.leader_ann.mod_name_line_no)
-
                 # iterate over all nested code fragments
                 nested_cfrags = cf.cfrags[:]
                 while len(nested_cfrags) > 0:
@@ -98,6 +98,80 @@ class OptDriver:
                     
     #-------------------------------------------------------------
 
+    def __buildDispatch(self, optimized_code_seq, indent):
+        '''
+        To combine the code variants tuned for several input sizes into one code that runs, for the
+        current input sizes, the variant tuned for the nearest sizes (the smallest sum of squared
+        relative differences). The selection is made when the input sizes change and is cached in
+        static variables; variants tuned to the same code share one case of the switch.
+        '''
+
+        externals = ''.join([e for _, _, e in optimized_code_seq])
+        pnames = [pname for pname, _ in optimized_code_seq[0][1]]
+        sizes = [[pval for _, pval in input_params] for _, input_params, _ in optimized_code_seq]
+        numeric = [v for row in sizes for v in row if isinstance(v, (int, float)) and not isinstance(v, bool)]
+
+        # without numeric input sizes (or in Fortran), fall back to a chain of range tests
+        if not pnames or len(numeric) != len(sizes) * len(pnames) or self.lang == 'fortran':
+            iselect = ''
+            for optimized_code, input_params, _ in optimized_code_seq:
+                iselect += ' else if (' if iselect else '\n' + indent + 'if ('
+                iselect += ' && '.join(['(%s<=%s)' % (pname, pval) for pname, pval in input_params])
+                iselect += ') {\n%s' % optimized_code + '}'
+            return (iselect + '\n', [], externals)
+
+        # the distinct code variants, and the variant of each tuned input size
+        codes = []
+        variants = []
+        for optimized_code, _, _ in optimized_code_seq:
+            if optimized_code not in codes:
+                codes.append(optimized_code)
+            variants.append(codes.index(optimized_code))
+
+        prefix = DISPATCH_PREFIX
+        nsizes, nparams = len(sizes), len(pnames)
+        i1, i2, i3 = indent + '  ', indent + '    ', indent + '      '
+        code = '\n' + indent + '{\n'
+        code += i1 + 'static const double %ssizes[%d][%d] = {%s};\n' % (
+            prefix, nsizes, nparams, ', '.join(['{%s}' % ', '.join([repr(float(v)) for v in row]) for row in sizes]))
+        code += i1 + 'static const double %sscales[%d][%d] = {%s};\n' % (
+            prefix, nsizes, nparams,
+            ', '.join(['{%s}' % ', '.join([repr(1.0 / max(abs(float(v)), 1.0)) for v in row]) for row in sizes]))
+        code += i1 + 'static const int %svariants[%d] = {%s};\n' % (prefix, nsizes, ', '.join(map(str, variants)))
+        code += i1 + 'static double %slast[%d] = {%s};\n' % (prefix, nparams, ', '.join(['-1.0'] * nparams))
+        code += i1 + 'static int %svariant = 0;\n' % prefix
+        code += i1 + 'if (%s) {\n' % ' || '.join(['%slast[%d] != (double)(%s)' % (prefix, k, pname)
+                                                 for k, pname in enumerate(pnames)])
+        code += i2 + 'double %sd, %sr, %sbest = -1.0;\n' % (prefix, prefix, prefix)
+        code += i2 + 'int %sk, %sp;\n' % (prefix, prefix)
+        for k, pname in enumerate(pnames):
+            code += i2 + '%slast[%d] = (double)(%s);\n' % (prefix, k, pname)
+        code += i2 + 'for (%sk = 0; %sk < %d; %sk++) {\n' % (prefix, prefix, nsizes, prefix)
+        code += i3 + '%sd = 0.0;\n' % prefix
+        code += i3 + 'for (%sp = 0; %sp < %d; %sp++) {\n' % (prefix, prefix, nparams, prefix)
+        code += i3 + '  %sr = (%slast[%sp] - %ssizes[%sk][%sp]) * %sscales[%sk][%sp];\n' % (
+            (prefix,) * 9)
+        code += i3 + '  %sd += %sr * %sr;\n' % (prefix, prefix, prefix)
+        code += i3 + '}\n'
+        code += i3 + 'if (%sbest < 0.0 || %sd < %sbest) {\n' % (prefix, prefix, prefix)
+        code += i3 + '  %sbest = %sd;\n' % (prefix, prefix)
+        code += i3 + '  %svariant = %svariants[%sk];\n' % (prefix, prefix, prefix)
+        code += i3 + '}\n'
+        code += i2 + '}\n'
+        code += i1 + '}\n'
+        code += i1 + 'switch (%svariant) {\n' % prefix
+        for k, optimized_code in enumerate(codes):
+            tuned = ', '.join(['(%s)' % ', '.join(['%s=%s' % (pname, v) for pname, v in zip(pnames, sizes[n])])
+                               for n in range(nsizes) if variants[n] == k])
+            code += i1 + 'case %d: /* %s */\n' % (k, tuned)
+            code += i1 + '{\n%s' % optimized_code + i1 + '}\n'
+            code += i1 + 'break;\n'
+        code += i1 + '}\n'
+        code += indent + '}\n'
+        return (code, [], externals)
+
+    #-------------------------------------------------------------
+
     def __optimizeCodeFrag(self, cfrag, perf_params):
         '''Apply optimization described in the annotations to the given code fragment.
         '''
@@ -121,23 +195,9 @@ class OptDriver:
                                                       cfrag.leader_ann.mod_code_line_no,
                                                       cfrag.cfrags)
                 indent = ' ' * cfrag.leader_ann.indent_size
-                # after multi-input tuning build an input range selector
+                # after multi-input tuning build a dispatch over the tuned input sizes
                 if len(optimized_code_seq) > 1:
-                    iselect = '\n' + indent + 'if ('
-                    iselect_flag = True
-                    externals_acc = ''
-                    for optimized_code, input_params, externals in optimized_code_seq:
-                        if iselect_flag: iselect_flag=False
-                        else: iselect += ' else if ('
-                        and_flag = True
-                        for pname, pval in input_params:
-                            if and_flag: and_flag = False
-                            else: iselect += ' && '
-                            iselect += '(%s<=%s)' % (pname, pval)
-                        iselect += ') {\n%s' % optimized_code + '}'
-                        externals_acc += externals
-                    iselect += '\n'
-                    optimized_code_seq = [(iselect, [], externals_acc)]
+                    optimized_code_seq = [self.__buildDispatch(optimized_code_seq, indent)]
 
             # initiate code transformation and generation
             else:
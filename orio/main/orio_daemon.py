@@ -0,0 +1,372 @@
+#
+# A persistent Orio server for the compiler-wrapper mode, and its client
+#
+# The orcc wrapper first offers its invocation to the server (see request); when no server
+# is running, it processes the invocation itself. Only the standard library is imported at
+# the top of this module, so that the client starts quickly.
+#
+
+import os, sys, json, socket, stat, struct
+
+#----------------------------------------------
+
+# the environment variable naming the socket of the server
+SOCKET_ENV = 'ORIO_DAEMON_SOCKET'
+
+def socketPath():
+    '''
+    Return the path of the Unix socket of the server (one server per user by default), in the
+    runtime directory of the user, or else in a directory of its own under /tmp
+    '''
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'orio-daemon.sock')
+    return os.path.join('/tmp', 'orio-daemon-%s' % os.getuid(), 'daemon.sock')
+
+def _peerUid(sock):
+    '''Return the user id of the process at the other end of the given socket (None if unknown)'''
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+def _connect(path):
+    '''
+    Return a socket connected to the server on the given path, or None if no server is running or
+    if the socket, or the server, belongs to another user (who could otherwise receive the
+    environment and the streams of the client, and have it run commands)
+    '''
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        uid = _peerUid(sock)
+    except OSError:
+        sock.close()
+        return None
+    if uid is not None and uid != os.getuid():
+        sock.close()
+        return None
+    return sock
+
+def _send(sock, message, fds=None):
+    '''Send the given message (a dictionary), with the given file descriptors'''
+    data = (json.dumps(message) + '\n').encode('utf-8')
+    if fds:
+        socket.send_fds(sock, [data], fds)
+    else:
+        sock.sendall(data)
+
+def _receive(sock, maxfds=0):
+    '''Receive a message and the file descriptors sent with it; return (None, []) if the peer hung up'''
+    data = b''
+    fds = []
+    while not data.endswith(b'\n'):
+        if maxfds and not data:
+            chunk, fds, _, _ = socket.recv_fds(sock, 65536, maxfds)
+        else:
+            chunk = sock.recv(65536)
+        if not chunk:
+            return None, fds
+        data += chunk
+    return json.loads(data.decode('utf-8')), fds
+
+#----------------------------------------------
+
+def request(argv, lang, path=None):
+    '''
+    Run the given Orio invocation in the server, which uses the standard input, output and error
+    of this process and its working directory and environment; return the exit status of the
+    invocation, or None if no server is running
+    @param lang: the name of the source language, e.g., 'C_CPP' (see orio.main.orio_main)
+    '''
+
+    if not hasattr(socket, 'send_fds'):
+        return None
+    sock = _connect(path or socketPath())
+    if sock is None:
+        return None
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        _send(sock, {'argv': list(argv), 'lang': lang, 'cwd': os.getcwd(), 'env': dict(os.environ)}, [0, 1, 2])
+    except OSError:
+        # (closed standard streams)
+        sock.close()
+        return None
+    with sock:
+        reply, _ = _receive(sock)
+    if reply is None:
+        sys.stderr.write('orio.main.orio_daemon: the Orio server failed to process the request\n')
+        return 1
+
+    # without annotations, the wrapped commands are run here
+    if 'run' in reply:
+        status = 0
+        for cmd in reply['run']:
+            status = 1 if os.system(cmd) != 0 else 0
+        return status
+    return reply['code']
+
+#----------------------------------------------
+
+def supported():
+    '''Return True if the server can run with this Python (report an error otherwise)'''
+    if hasattr(socket, 'recv_fds') and hasattr(socket, 'send_fds'):
+        return True
+    from orio.main.util.globals import err
+    err('orio.main.orio_daemon: the Orio server requires Python 3.9 or later (to pass the standard streams '
+        + 'of the invocations over its socket); running Python %d.%d' % sys.version_info[:2])
+    return False
+
+def serve(path=None):
+    '''
+    Serve Orio invocations on the given Unix socket until a stop request. Each invocation is
+    processed in a process forked from the server, with the modules, the parsing tables and the
+    caches of the server already loaded. The invocations of the compiler-wrapper mode whose source
+    files have no annotations are answered by the server itself, with the commands to run.
+    '''
+
+    if not supported():
+        return 1
+
+    import io, contextlib, socketserver
+
+    # load the modules of a complete invocation, and build the parsing tables
+    import orio.main.orio_main
+    from orio.main import pragma_preprocessor, ann_parser, cmd_line_opts, opt_driver, tuning_pool
+    from orio.main.util.globals import Globals
+    import orio.main.tspec.pparser, orio.module.loop.parser
+    orio.main.tspec.pparser.getParser('fspecs')
+    orio.main.tspec.pparser.getParser('specs')
+    orio.module.loop.parser.getParser(1)
+
+    path = path or socketPath()
+    scanned = {}    # whether each source file has annotations, indexed by path, with its modification time and size
+
+    def annotated(srcfile):
+        '''Return True if the given source file has annotations or Orio pragmas (or cannot be read)'''
+        try:
+            st = os.stat(srcfile)
+            key = (st.st_mtime_ns, st.st_size)
+            if srcfile not in scanned or scanned[srcfile][0] != key:
+                with open(srcfile, 'r') as f:
+                    code = f.read()
+                found = bool(ann_parser.AnnParser.leaderAnnRE().search(code) or
+                             pragma_preprocessor.PragmaPreprocessor.leaderPragmaRE().search(code))
+                scanned[srcfile] = (key, found)
+            return scanned[srcfile][1]
+        except (OSError, UnicodeDecodeError):
+            return True
+
+    def wrappedCommands(req):
+        '''Return the wrapped commands of a compiler-wrapper invocation without annotations (None otherwise)'''
+        env = req['env']
+        if 'ORIO_DEBUG' in env or 'ORIO_DEBUG_LEVEL' in env:
+            return None
+        saved_env = dict(os.environ)
+        saved_cwd = os.getcwd()
+        try:
+            os.chdir(req['cwd'])
+            os.environ.clear()
+            os.environ.update(env)
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                cmdline = cmd_line_opts.CmdParser().parse(req['argv'])
+        except (SystemExit, Exception):
+            return None
+        finally:
+            os.chdir(saved_cwd)
+            os.environ.clear()
+            os.environ.update(saved_env)
+        if (not cmdline.get('external_command') or cmdline.get('disable_orio') or
+                [k for k in ('spec_filename', 'rename_objects', 'verbose', 'debug') if k in cmdline]):
+            return None
+        srcfiles = list(cmdline['src_filenames'].keys())
+        if [f for f in srcfiles if annotated(os.path.join(req['cwd'], f))]:
+            return None
+        return [' '.join(cmdline['external_command'] + [f]) for f in srcfiles]
+
+    class Handler(socketserver.BaseRequestHandler):
+        '''Processes an invocation in a forked process'''
+
+        def handle(self):
+            req, fds = self.server.pending
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+                os.close(fd)
+            sys.stdin = open(0, 'r', closefd=False)
+            sys.stdout = open(1, 'w', buffering=1, closefd=False)
+            sys.stderr = open(2, 'w', buffering=1, closefd=False)
+            os.chdir(req['cwd'])
+            os.environ.clear()
+            os.environ.update(req['env'])
+            sys.argv = list(req['argv'])
+            Globals.reset()
+            try:
+                orio.main.orio_main.start(req['argv'], getattr(orio.main.orio_main, req['lang']))
+                code = 0
+            except SystemExit as e:
+                code = e.code
+                if code is None:
+                    code = 0
+                elif not isinstance(code, int):
+                    sys.stderr.write('%s\n' % code)
+                    code = 1
+            except Exception as e:
+                sys.stderr.write('orio.main.orio_daemon: %s: %s\n' % (e.__class__.__name__, e))
+                code = 1
+            sys.stdout.flush()
+            sys.stderr.flush()
+            _send(self.request, {'code': code})
+
+    class Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+        '''Answers the requests it can answer itself, and forks a process for the others'''
+
+        pending = None      # the request being forked, and its standard streams
+        stopping = False
+
+        def process_request(self, request, client_address):
+            try:
+                # (only the requests of the user of the server are served)
+                uid = _peerUid(request)
+                req, fds = _receive(request, 3)
+                if uid is not None and uid != os.getuid():
+                    req = None
+            except (OSError, ValueError):
+                req, fds = None, []
+            try:
+                if req is None:
+                    pass
+                elif req.get('stop'):
+                    _send(request, {'code': 0})
+                    self.stopping = True
+                else:
+                    commands = wrappedCommands(req)
+                    if commands is not None:
+                        _send(request, {'run': commands})
+                    elif len(fds) == 3:
+                        self.pending = (req, fds)
+                        socketserver.ForkingMixIn.process_request(self, request, client_address)
+                        return
+            finally:
+                for fd in fds:
+                    os.close(fd)
+                self.pending = None
+            self.shutdown_request(request)
+
+    # the socket is created in a directory that only the user can access or modify
+    sockdir = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(sockdir):
+        os.makedirs(sockdir, 0o700)
+    st = os.stat(sockdir)
+    if st.st_uid != os.getuid() or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        sys.stderr.write('orio.main.orio_daemon: %s must belong to the user and not be writable by others\n' % sockdir)
+        return 1
+
+    # replace a stale socket (left by a server that did not stop cleanly)
+    if os.path.exists(path):
+        if running(path):
+            sys.stderr.write('orio.main.orio_daemon: a server is already running on %s\n' % path)
+            return 1
+        os.unlink(path)
+    umask = os.umask(0o177)
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(umask)
+    try:
+        while not server.stopping:
+            server.handle_request()
+            server.service_actions()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+    return 0
+
+def running(path=None):
+    '''Return True if a server of the user is answering on the given socket'''
+    sock = _connect(path or socketPath())
+    if sock is None:
+        return False
+    sock.close()
+    return True
+
+def stop(path=None):
+    '''Stop the server listening on the given socket; return True if a server was stopped'''
+    sock = _connect(path or socketPath())
+    if sock is None:
+        return False
+    try:
+        _send(sock, {'stop': True})
+        return _receive(sock)[0] is not None
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+#----------------------------------------------
+
+USAGE_MSG = '''
+Description: persistent Orio server for the compiler-wrapper mode of orcc
+
+Usage: %s [start|stop|status|run]
+  start     start the server in the background (default)
+  stop      stop the server
+  status    report whether the server is running
+  run       run the server in the foreground
+
+While the server is running, orcc hands its invocations to the server, which keeps the Orio
+modules and parsing tables loaded and answers the invocations whose source files have no
+annotations without running Orio. The socket is %s (set by %s).
+'''
+
+def main(argv):
+    '''To start, stop or query the server'''
+
+    action = argv[1] if len(argv) > 1 else 'start'
+    path = socketPath()
+    if action == 'status':
+        sys.stdout.write('the Orio server is %s on %s\n' % ('running' if running(path) else 'not running', path))
+        return 0
+    if action == 'stop':
+        if not stop(path):
+            sys.stderr.write('orio.main.orio_daemon: no server is running on %s\n' % path)
+            return 1
+        return 0
+    if action == 'run':
+        return serve(path)
+    if action != 'start':
+        sys.stdout.write(USAGE_MSG % (os.path.basename(argv[0]), path, SOCKET_ENV))
+        return 0 if action in ('-h', '--help') else 1
+
+    # detach the server from the terminal
+    if not supported():
+        return 1
+    if running(path):
+        sys.stderr.write('orio.main.orio_daemon: a server is already running on %s\n' % path)
+        return 1
+    if os.fork() == 0:
+        os.setsid()
+        if os.fork() == 0:
+            devnull = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(devnull, fd)
+            os._exit(serve(path) or 0)
+        os._exit(0)
+    import time
+    for _ in range(100):
+        if running(path):
+            return 0
+        time.sleep(0.05)
+    sys.stderr.write('orio.main.orio_daemon: the server did not start on %s\n' % path)
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
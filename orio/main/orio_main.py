@@ -36,7 +36,7 @@ def start(argv, lang):
         sys.exit(1)
 
     # import other required Python packages
-    from . import pragma_preprocessor, ann_parser, cmd_line_opts, opt_driver
+    from . import pragma_preprocessor, ann_parser, cmd_line_opts, opt_driver, tuning_pool
     
     # process the command line
     cmdline = cmd_line_opts.CmdParser().parse(argv)
@@ -55,65 +55,85 @@ def start(argv, lang):
     if not g.disable_orio: always_print('\n====== START ORIO: %s ======' % timestamp(), end='')
     final_output_file = None
     annotated_files = 0 # for multi-file tuning
+    sources = {}        # the source code and the code fragments (None without annotations) of each file
+    for srcfile, out_filename in list(g.src_filenames.items()):
+        if g.disable_orio:
+            continue
+
+        debug('Reading %s,%s' % (srcfile,out_filename))
+        # read source code
+        info('\n----- begin reading the source file: %s -----' % srcfile)
+        try:
+            f = open(srcfile, 'r')
+            src_code = f.read()
+            f.close()
+        except:
+            err('orio.main.main: cannot open file for reading: %s' % srcfile)
+        info('----- finished reading the source file -----')
+        raw_src_code = src_code
+
+        # obtain the mapping for performance tuning specifications
+        tspec_prog = ''
+        if g.spec_filename:
+            info('\n----- begin reading the tuning specification file: %s -----' % g.spec_filename)
+            try:
+                f = open(g.spec_filename, 'r')
+                tspec_prog = f.read()
+                f.close()
+            except Exception as e:
+                err('orio.main.main: Exception %s. Cannot open file for reading: %s' % \
+                    (e,g.spec_filename))
+            else:
+            #tuning_spec_dict = tspec.tspec.TSpec().parseProgram(tspec_prog)
+                info('----- finished reading the tuning specification -----')
+            
+        # Just add the tuning spec to the file being parsed
+        if tspec_prog:
+            src_code = '/*@ begin PerfTuning (' + tspec_prog + ')\n@*/\n' + src_code + '\n/*@ end @*/\n'
+            
+        # parse the source code and return a sequence of code fragments
+        info('\n----- begin parsing annotations -----')
+
+        # Search for pragma orio entries (currently only loops supported)
+        if pragma_preprocessor.PragmaPreprocessor.leaderPragmaRE().search(src_code):
+            src_code = pragma_preprocessor.PragmaPreprocessor().preprocess(src_code)
+
+        # for efficiency (e.g., do as little as possible when there are no annotations):
+        cfrags = None
+        if ann_parser.AnnParser.leaderAnnRE().search(src_code): 
+            cfrags = ann_parser.AnnParser().parse(src_code)     # list of CodeFragment objects
+            annotated_files += 1
+        else:
+            info('----- did not find any Orio annotations -----')
+        info('----- finished parsing annotations -----')
+        sources[srcfile] = (raw_src_code, cfrags)
+
+    # tune the performance-tuning regions of all files concurrently (if requested); the output is
+    # written below, as in sequential tuning
+    tuned = {}
+    if g.jobs > 1 and annotated_files > 0:
+        tuned = tuning_pool.tuneConcurrently([(srcfile, raw_src_code, cfrags)
+                                              for srcfile, (raw_src_code, cfrags) in list(sources.items()) if cfrags],
+                                             language, g.jobs, g.max_builds)
+
     for srcfile, out_filename in list(g.src_filenames.items()):
         annotations_found = False
 
         debug('Processing %s,%s' % (srcfile,out_filename))
         if not g.disable_orio:
-            # read source code
-            info('\n----- begin reading the source file: %s -----' % srcfile)
-            try:
-                f = open(srcfile, 'r')
-                src_code = f.read()
-                f.close()
-            except:
-                err('orio.main.main: cannot open file for reading: %s' % srcfile)
-            info('----- finished reading the source file -----')
-    
+            raw_src_code, cfrags = sources[srcfile]
+            annotations_found = cfrags is not None
+
             # parse the source file and build a symbol table
             #stbuilder = st_builder.STBuilder(srcfile)
             #symtab = stbuilder.build_st()
-            Globals().setFuncDec(src_code)
-            # obtain the mapping for performance tuning specifications
-            tspec_prog = ''
-            if g.spec_filename:
-                info('\n----- begin reading the tuning specification file: %s -----' % g.spec_filename)
-                try:
-                    f = open(g.spec_filename, 'r')
-                    tspec_prog = f.read()
-                    f.close()
-                except Exception as e:
-                    err('orio.main.main: Exception %s. Cannot open file for reading: %s' % \
-                        (e,g.spec_filename))
-                else:
-                #tuning_spec_dict = tspec.tspec.TSpec().parseProgram(tspec_prog)
-                    info('----- finished reading the tuning specification -----')
-                
-            # Just add the tuning spec to the file being parsed
-            if tspec_prog:
-                src_code = '/*@ begin PerfTuning (' + tspec_prog + ')\n@*/\n' + src_code + '\n/*@ end @*/\n'
-                
-            # parse the source code and return a sequence of code fragments
-            info('\n----- begin parsing annotations -----')
-
-            # Search for pragma orio entries (currently only loops supported)
-            if pragma_preprocessor.PragmaPreprocessor.leaderPragmaRE().search(src_code):
-                src_code = pragma_preprocessor.PragmaPreprocessor().preprocess(src_code)
-
-            # for efficiency (e.g., do as little as possible when there are no annotations):
-            if ann_parser.AnnParser.leaderAnnRE().search(src_code): 
-                cfrags = ann_parser.AnnParser().parse(src_code)     # list of CodeFragment objects
-                annotations_found = True
-                annotated_files += 1
-            else:
-                info('----- did not find any Orio annotations -----')
-            info('----- finished parsing annotations -----')
-            
+            Globals().setFuncDec(raw_src_code)
+
             # perform optimizations based on information specified in the annotations
             if annotations_found:
                 info('\n----- begin optimizations -----')
                 odriver = opt_driver.OptDriver(src=srcfile, language=language)
-                optimized_code_seq = odriver.optimizeCodeFrags(cfrags, True)
+                optimized_code_seq = odriver.optimizeCodeFrags(cfrags, True, tuned_seqs=tuned.get(srcfile))
                 info('----- finish optimizations -----')
         
                 # remove all annotations from output
@@ -11,19 +11,29 @@ import orio.main.util.globals as g
 keywords = [
     'def', 'arg', 'param', 'decl', 'let', 'spec', 'constraint', 'option',
     'build', 'build_command', 'prebuild_command', 'postbuild_command', 'postrun_command', 'batch_command', 'status_command', 'num_procs', 'libs',
+    'cache_dir', 'cache_size', 'build_timeout', 'run_timeout', 'cpu_limit', 'mem_limit', 'cpu_affinity', 'build_jobs',
+    'batch_system', 'batch_options',
     'input_params', 'input_vars', 'static', 'dynamic', 'managed',
     'void', 'char', 'short', 'int', 'long', 'float', 'double',
     '__device__',
     'performance_params', 'performance_counter', 'power', 'cmdline_params', 'method', 'repetitions',
-    'search', 'time_limit', 'total_runs', 'use_z3', 'resume', 'algorithm',
-    'init_file', 'decl_file',
+    'compiler_flags', 'two_level',
+    'cache_mode', 'flush_size', 'objective', 'tie_break', 'timer', 'timer_overhead',
+    'search', 'time_limit', 'total_runs', 'use_z3', 'resume', 'algorithm', 'runtime_params', 'runtime_sweep',
+    'cost_model', 'screening', 'confirmation', 'pgo',
+    'init_file', 'decl_file', 'input_data', 'data_dir',
     'exhaustive_start_coord',
     'msimplex_reflection_coef', 'msimplex_expansion_coef',
     'msimplex_contraction_coef', 'msimplex_shrinkage_coef', 'msimplex_size', 'msimplex_x0',
     'simplex_reflection_coef', 'simplex_expansion_coef',
     'simplex_contraction_coef', 'simplex_shrinkage_coef', 'simplex_local_distance', 'simplex_x0',
+    'direct_epsilon',
+    'firefly_population_size', 'firefly_generations', 'firefly_alpha', 'firefly_alpha_decay',
+    'firefly_beta_init', 'firefly_gamma', 'firefly_unroll_variables',
+    'portfolio_arms', 'portfolio_slice', 'portfolio_exploration', 'portfolio_discount',
+    'staticmodel_fraction', 'staticmodel_candidates',
     'cudacfg_instmix',
-    'validation', 'validation_file', 'expected_output',
+    'validation', 'validation_file', 'expected_output', 'checksum', 'tolerance', 'outputs',
     'macro', 'performance_test_code', 'skeleton_test_code', 'skeleton_code_file',
     'other', 'device_spec_file',
 ]
@@ -146,6 +156,7 @@ def p_def_type(p):
                 | PERFORMANCE_COUNTER
                 | POWER
                 | CMDLINE_PARAMS
+                | COMPILER_FLAGS
                 | INPUT_PARAMS
                 | INPUT_VARS
                 | SEARCH
@@ -202,14 +213,39 @@ def p_arg_type(p):
                 | NUM_PROCS
                 | METHOD
                 | REPETITIONS
+                | CACHE_MODE
+                | FLUSH_SIZE
+                | OBJECTIVE
+                | TIE_BREAK
+                | TIMER
+                | TIMER_OVERHEAD
                 | ALGORITHM
                 | TIME_LIMIT
                 | TOTAL_RUNS
                 | USE_Z3
                 | RESUME
+                | RUNTIME_PARAMS
+                | RUNTIME_SWEEP
+                | COST_MODEL
+                | SCREENING
+                | CONFIRMATION
+                | PGO
+                | TWO_LEVEL
                 | LIBS
+                | CACHE_DIR
+                | CACHE_SIZE
+                | BUILD_TIMEOUT
+                | RUN_TIMEOUT
+                | CPU_LIMIT
+                | MEM_LIMIT
+                | CPU_AFFINITY
+                | BUILD_JOBS
+                | BATCH_SYSTEM
+                | BATCH_OPTIONS
                 | INIT_FILE
                 | DECL_FILE
+                | INPUT_DATA
+                | DATA_DIR
                 | EXHAUSTIVE_START_COORD
                 | MSIMPLEX_EXPANSION_COEF
                 | MSIMPLEX_REFLECTION_COEF
@@ -223,9 +259,26 @@ def p_arg_type(p):
                 | SIMPLEX_SHRINKAGE_COEF
                 | SIMPLEX_LOCAL_DISTANCE    
                 | SIMPLEX_X0
+                | DIRECT_EPSILON
+                | FIREFLY_POPULATION_SIZE
+                | FIREFLY_GENERATIONS
+                | FIREFLY_ALPHA
+                | FIREFLY_ALPHA_DECAY
+                | FIREFLY_BETA_INIT
+                | FIREFLY_GAMMA
+                | FIREFLY_UNROLL_VARIABLES
+                | PORTFOLIO_ARMS
+                | PORTFOLIO_SLICE
+                | PORTFOLIO_EXPLORATION
+                | PORTFOLIO_DISCOUNT
+                | STATICMODEL_FRACTION
+                | STATICMODEL_CANDIDATES
                 | CUDACFG_INSTMIX
                 | VALIDATION_FILE
                 | EXPECTED_OUTPUT
+                | CHECKSUM
+                | TOLERANCE
+                | OUTPUTS
                 | SKELETON_TEST_CODE
                 | SKELETON_CODE_FILE
                 | OTHER
@@ -233,6 +286,14 @@ def p_arg_type(p):
     '''
     p[0] = (p[1], p.lineno(1))
 
+# the arguments of the arms of a portfolio search: portfolio_<arm>_<argument>, with any argument of the arm
+def p_arg_type_arm(p):
+    ''' argtype : ID '''
+    if not p[1].startswith('portfolio_'):
+        g.err("orio.main.tspec.pparser.parser: error in input line #%s, unknown argument name '%s'"
+              % (p.lineno(1), p[1]), doexit=True)
+    p[0] = (p[1], p.lineno(1))
+
 #----------------------------------------------------------------------------------------------------------------------
 # parameter statement
 def p_param(p):
@@ -345,11 +406,17 @@ def p_error(p):
 
 
 #----------------------------------------------------------------------------------------------------------------------
+# the parsers built so far, indexed by start symbol (building the parsing tables is costly, so they are
+# built once per process; a new lexer, which the parser uses by default, is created for each parse)
+__parsers = {}
+
 def getParser(start_symbol):
     '''Create the parser'''
     _ = orio.tool.ply.lex.lex()
-    parser = orio.tool.ply.yacc.yacc(method='LALR', debug=0, start=start_symbol, check_recursion=0, tabmodule="pparsetab", optimize=1, write_tables=0)
-    return parser
+    if start_symbol not in __parsers:
+        __parsers[start_symbol] = orio.tool.ply.yacc.yacc(method='LALR', debug=0, start=start_symbol, check_recursion=0,
+                                                          tabmodule="pparsetab", optimize=1, write_tables=0)
+    return __parsers[start_symbol]
 
 
 #--------------------------------------------------------------------------------
@@ -16,22 +16,25 @@ class TuningInfo:
 
     def __init__(self, build_info, pcount_info, power_info, search_info, pparam_info,
                  cmdline_info, iparam_info,
-                 ivar_info, ptest_code_info, validation_info, other_info):
+                 ivar_info, ptest_code_info, validation_info, other_info, cflag_info=([], [], False)):
         '''
         Tuning parameters specified by the user in the tuning spec.
         '''
 
         # unpack all information
 
-        pcount_method, pcount_reps, random_seed, timing_array_size = pcount_info
+        (pcount_method, pcount_reps, random_seed, timing_array_size, cache_mode, flush_size, pcount_objective,
+         pcount_tie_break, timer, timer_overhead) = pcount_info
         power_method, power_reps, random_seed, power_array_size = power_info
-        search_algo, search_time_limit, search_total_runs, search_use_z3, search_resume, search_opts = search_info
+        (search_algo, search_time_limit, search_total_runs, search_use_z3, search_resume, search_opts,
+         runtime_params, runtime_sweep, cost_model, screening, confirmation, pgo) = search_info
         pparam_params, pparam_constraints = pparam_info
         cmdline_params, cmdline_constraints = cmdline_info
+        cflag_params, cflag_constraints, cflag_two_level = cflag_info
         iparam_params, iparam_constraints = iparam_info
-        ivar_decls, ivar_decl_file, ivar_init_file = ivar_info
+        ivar_decls, ivar_decl_file, ivar_init_file, ivar_input_data, ivar_data_dir = ivar_info
         ptest_skeleton_code_file, = ptest_code_info
-        validation_file, expected_output = validation_info
+        validation_file, expected_output, checksum, tolerance, checksum_vars = validation_info
         if other_info and len(other_info) > 1:
             device_spec_file, _ = other_info
         else:
@@ -51,6 +54,16 @@ class TuningInfo:
         self.timer_file = build_info.get('timer_file')  # user-specified implementation of the getClock() function
         self.post_run_cmd = build_info.get(
             'postrun_cmd')  # command to run after executing timing test (will be passed the executable name and coordinate string as an argument)
+        self.cache_dir = build_info.get('cache_dir')  # directory of the compiled-executable cache (disabled if None)
+        self.cache_size = build_info.get('cache_size', 1024)  # maximum size of the executable cache in MB
+        self.build_timeout = build_info.get('build_timeout')  # wall-clock timeout (s) of each build command
+        self.run_timeout = build_info.get('run_timeout')  # wall-clock timeout (s) of each test run
+        self.cpu_limit = build_info.get('cpu_limit')  # CPU-time limit (s) of each test run
+        self.mem_limit = build_info.get('mem_limit')  # memory limit (MB) of each test run
+        self.cpu_affinity = build_info.get('cpu_affinity')  # list of cores the test runs are pinned to
+        self.build_jobs = build_info.get('build_jobs', 1)  # number of concurrent build processes
+        self.batch_system = build_info.get('batch_system')  # batch system each variant is submitted to as a job
+        self.batch_options = build_info.get('batch_options', '')  # extra options of the batch submit command
 
         # performance counter arguments
         self.pcount_method = pcount_method  # default: 'basic timer' --> in microseconds
@@ -58,6 +71,12 @@ class TuningInfo:
         # self.pcount_subreps = pcount_subreps           # mandatory subrepetitions (to enable timing of very small computations), default: 10
         self.random_seed = random_seed  # default: None
         self.timing_array_size = timing_array_size  # default an odd number >= pcount_reps
+        self.cache_mode = cache_mode  # cache state of the timed runs: 'warm', 'cold', 'first-touch' or None (back-to-back)
+        self.flush_size = flush_size  # size (bytes) of the buffer flushing the caches in cold mode (default: 2 x LLC)
+        self.pcount_objective = pcount_objective  # measured quantity used as the cost (default: 'time')
+        self.pcount_tie_break = pcount_tie_break  # hardware counter breaking near-ties of the best cost (default: None)
+        self.timer = timer  # timer backend of the C tests: 'cpu', 'monotonic' or 'tsc' (default: 'cpu')
+        self.timer_overhead = timer_overhead  # subtract the overhead of the timer calls (default: False)
 
         self.power_method = power_method
         self.power_reps = power_reps
@@ -70,6 +89,12 @@ class TuningInfo:
         self.search_use_z3 = search_use_z3  # default: False
         self.search_resume = search_resume  # default: False
         self.search_opts = search_opts  # default: []
+        self.runtime_params = runtime_params  # parameters that may be set at run time: True (any), a list or None
+        self.runtime_sweep = runtime_sweep  # maximum number of coordinates tested by a runtime-parametric run
+        self.cost_model = cost_model  # static cost model settings: a dictionary or None (no static model)
+        self.screening = screening  # parameter screening settings: a dictionary or None (no screening)
+        self.confirmation = confirmation  # interleaved confirmation of the best: a dictionary or None (no confirmation)
+        self.pgo = pgo  # profile-guided rebuild of the best coordinates: a dictionary or None (no rebuild)
 
         # performance parameters
         self.pparam_params = pparam_params  # default: []
@@ -79,6 +104,11 @@ class TuningInfo:
         self.cmdline_params = cmdline_params  # default: []
         self.cmdline_constraints = cmdline_constraints  # default: []
 
+        # compiler flags appended to the build command of each code version (they do not change its source)
+        self.cflag_params = cflag_params  # default: []
+        self.cflag_constraints = cflag_constraints  # default: []
+        self.cflag_two_level = cflag_two_level  # search the flags for the best source parameters (default: False)
+
         # input parameters
         self.iparam_params = iparam_params  # default: []
         self.iparam_constraints = iparam_constraints  # default: []
@@ -87,6 +117,8 @@ class TuningInfo:
         self.ivar_decls = ivar_decls  # user specified or None
         self.ivar_decl_file = ivar_decl_file  # user specified or None
         self.ivar_init_file = ivar_init_file  # user specified or None
+        self.ivar_input_data = ivar_input_data  # pre-generated input data: 'pattern', 'random', a file name or None
+        self.ivar_data_dir = ivar_data_dir  # directory of the generated input data files (default: temp. directory)
 
         # performance-test code
         self.ptest_skeleton_code_file = ptest_skeleton_code_file  # default: None
@@ -94,6 +126,9 @@ class TuningInfo:
         # validation info
         self.validation_file = validation_file
         self.expected_output = expected_output
+        self.checksum = checksum  # compare the results of each variant with a reference in the test (default: False)
+        self.tolerance = tolerance  # maximum normwise relative error of a checked variable (default: 1e-8)
+        self.checksum_vars = checksum_vars  # names of the checked variables (default: None, all numeric variables)
 
         # device spec file
         self.device_spec_file = device_spec_file
@@ -122,15 +157,32 @@ class TuningInfo:
         s += ' perf-counting method: %s \n' % self.pcount_method
         s += ' perf-counting repetitions: %s \n' % self.pcount_reps
         s += ' number of timing results to store: %s \n ' % self.timing_array_size
+        s += ' cache mode: %s \n' % self.cache_mode
+        s += ' cache flush size: %s \n' % self.flush_size
+        s += ' perf-counting objective: %s \n' % self.pcount_objective
+        s += ' perf-counting tie-breaker: %s \n' % self.pcount_tie_break
+        s += ' timer: %s (overhead subtracted: %s) \n' % (self.timer, self.timer_overhead)
         s += ' power measurement method: %s \n' % self.power_method
         s += ' power measurement repetitions: %s \n' % self.power_reps
         s += ' number of power measurements to store: %s \n ' % self.power_array_size
         s += ' timer routine file: %s \n' % self.timer_file
+        s += ' build cache directory: %s \n' % self.cache_dir
+        s += ' build cache size (MB): %s \n' % self.cache_size
+        s += ' build/run timeouts (s): %s/%s \n' % (self.build_timeout, self.run_timeout)
+        s += ' CPU-time/memory limits of test runs: %s s/%s MB \n' % (self.cpu_limit, self.mem_limit)
+        s += ' CPU affinity of test runs: %s \n' % self.cpu_affinity
+        s += ' concurrent build jobs: %s \n' % self.build_jobs
+        s += ' batch system: %s (options: %s) \n' % (self.batch_system, self.batch_options)
         s += ' search algorithm: %s \n' % self.search_algo
         s += ' search time limit (seconds): %s \n' % self.search_time_limit
         s += ' search total runs: %s \n' % self.search_total_runs
         s += ' search use z3 [True/False]: %s \n' % self.search_use_z3
         s += ' search resume [True/False]: %s\n' % self.search_resume
+        s += ' run-time parameters: %s (at most %s per run) \n' % (self.runtime_params, self.runtime_sweep)
+        s += ' static cost model: %s\n' % self.cost_model
+        s += ' parameter screening: %s\n' % self.screening
+        s += ' interleaved confirmation: %s\n' % self.confirmation
+        s += ' profile-guided finalization: %s\n' % self.pgo
         s += ' search options: \n'
         for id_name, rhs in self.search_opts:
             s += '    %s: %s \n' % (id_name, rhs)
@@ -149,6 +201,13 @@ class TuningInfo:
         for id_name, rhs in self.cmdline_constraints:
             s += '    %s: %s \n' % (id_name, rhs)
 
+        s += ' compiler-flag parameters (two-level search: %s): \n' % self.cflag_two_level
+        for id_name, rhs in self.cflag_params:
+            s += '    %s: %s \n' % (id_name, rhs)
+        s += ' compiler-flag constraints: \n'
+        for id_name, rhs in self.cflag_constraints:
+            s += '    %s: %s \n' % (id_name, rhs)
+
         s += ' input-parameter parameters: \n'
         for id_name, rhs in self.iparam_params:
             s += '    %s: %s \n' % (id_name, rhs)
@@ -164,9 +223,12 @@ class TuningInfo:
                   (modifier, dtype, id_name, ddims, rhs))
         s += ' input-variable declaration file: %s \n' % self.ivar_decl_file
         s += ' input-variable initialization file: %s \n' % self.ivar_init_file
+        s += ' input data: %s (directory: %s) \n' % (self.ivar_input_data, self.ivar_data_dir)
         s += ' performance-test skeleton code file: %s \n' % self.ptest_skeleton_code_file
         s += ' validation file: %s \n' % self.validation_file
         s += ' expected output: %s \n' % self.expected_output
+        s += ' checksum validation: %s (tolerance: %s, variables: %s) \n' % (self.checksum, self.tolerance,
+                                                                            self.checksum_vars)
         return s
 
 
@@ -223,6 +285,16 @@ class TuningInfoGen:
         STATUSCMD = 'status_command'
         NUMPROCS = 'num_procs'
         TIMER_FILE = 'timer_file'
+        CACHE_DIR = 'cache_dir'
+        CACHE_SIZE = 'cache_size'
+        BUILD_TIMEOUT = 'build_timeout'
+        RUN_TIMEOUT = 'run_timeout'
+        CPU_LIMIT = 'cpu_limit'
+        MEM_LIMIT = 'mem_limit'
+        CPU_AFFINITY = 'cpu_affinity'
+        BUILD_JOBS = 'build_jobs'
+        BATCH_SYSTEM = 'batch_system'
+        BATCH_OPTIONS = 'batch_options'
 
         # all expected build information
         prebuild_cmd = None
@@ -236,6 +308,16 @@ class TuningInfoGen:
         status_cmd = None
         num_procs = 1
         timer_file = None
+        cache_dir = None
+        cache_size = 1024
+        build_timeout = None
+        run_timeout = None
+        cpu_limit = None
+        mem_limit = None
+        cpu_affinity = None
+        build_jobs = 1
+        batch_system = None
+        batch_options = ''
 
         # iterate over each statement
         for stmt in stmt_seq:
@@ -255,7 +337,9 @@ class TuningInfoGen:
 
             # unknown argument name
             if id_name not in (
-            BUILDCMD, PREBUILDCMD, POSTBUILDCMD, POSTRUNCMD, BATCHCMD, STATUSCMD, NUMPROCS, LIBS, CC, TIMER_FILE):
+            BUILDCMD, PREBUILDCMD, POSTBUILDCMD, POSTRUNCMD, BATCHCMD, STATUSCMD, NUMPROCS, LIBS, CC, TIMER_FILE,
+            CACHE_DIR, CACHE_SIZE, BUILD_TIMEOUT, RUN_TIMEOUT, CPU_LIMIT, MEM_LIMIT, CPU_AFFINITY, BUILD_JOBS,
+            BATCH_SYSTEM, BATCH_OPTIONS):
                 err('orio.main.tspec.tune_info: %s: unknown build argument: "%s"' % (id_line_no, id_name))
 
             # evaluate the pre-build command
@@ -340,9 +424,86 @@ class TuningInfoGen:
 
                 timer_file = rhs
 
+            # directory of the cache of compiled executables
+            elif id_name == CACHE_DIR:
+                if not isinstance(rhs, str):
+                    err('orio.main.tspec.tune_info: %s: build cache directory in build section must be a string' % rhs_line_no)
+
+                cache_dir = rhs
+
+            # size bound of the cache of compiled executables
+            elif id_name == CACHE_SIZE:
+                if (not isinstance(rhs, int) and not isinstance(rhs, float)) or rhs <= 0:
+                    err('orio.main.tspec.tune_info: %s: build cache size (MB) in build section must be a positive number'
+                        % rhs_line_no)
+
+                cache_size = rhs
+
+            # wall-clock timeouts (in seconds) of the build and the test-run phases
+            elif id_name in (BUILD_TIMEOUT, RUN_TIMEOUT):
+                if (not isinstance(rhs, int) and not isinstance(rhs, float)) or rhs <= 0:
+                    err('orio.main.tspec.tune_info: %s: %s in build section must be a positive number of seconds'
+                        % (rhs_line_no, id_name))
+
+                if id_name == BUILD_TIMEOUT:
+                    build_timeout = rhs
+                else:
+                    run_timeout = rhs
+
+            # CPU-time limit (in seconds) of a test run
+            elif id_name == CPU_LIMIT:
+                if (not isinstance(rhs, int) and not isinstance(rhs, float)) or rhs <= 0:
+                    err('orio.main.tspec.tune_info: %s: CPU-time limit in build section must be a positive number of seconds'
+                        % rhs_line_no)
+
+                cpu_limit = rhs
+
+            # memory limit (in MB) of a test run
+            elif id_name == MEM_LIMIT:
+                if (not isinstance(rhs, int) and not isinstance(rhs, float)) or rhs <= 0:
+                    err('orio.main.tspec.tune_info: %s: memory limit (MB) in build section must be a positive number'
+                        % rhs_line_no)
+
+                mem_limit = rhs
+
+            # CPU cores the test runs are pinned to
+            elif id_name == CPU_AFFINITY:
+                if isinstance(rhs, int):
+                    rhs = [rhs]
+                if not isinstance(rhs, (list, tuple)) or not rhs or \
+                        [c for c in rhs if not isinstance(c, int) or c < 0]:
+                    err('orio.main.tspec.tune_info: %s: CPU affinity in build section must be a core number or a list of core numbers'
+                        % rhs_line_no)
+
+                cpu_affinity = list(rhs)
+
+            # number of concurrent build processes
+            elif id_name == BUILD_JOBS:
+                if not isinstance(rhs, int) or rhs <= 0:
+                    err('orio.main.tspec.tune_info: %s: number of build jobs in build section must be a positive integer'
+                        % rhs_line_no)
+
+                build_jobs = rhs
+
+            # batch system to submit each tested variant to as a separate job
+            elif id_name == BATCH_SYSTEM:
+                if not isinstance(rhs, str):
+                    err('orio.main.tspec.tune_info: %s: batch system in build section must be a string' % rhs_line_no)
+
+                batch_system = rhs.lower()
+
+            # extra options of the batch-system submit command (e.g., queue, account, node count)
+            elif id_name == BATCH_OPTIONS:
+                if not isinstance(rhs, str):
+                    err('orio.main.tspec.tune_info: %s: batch options in build section must be a string' % rhs_line_no)
+
+                batch_options = rhs
+
         # return all build information
         return (
-        prebuild_cmd, build_cmd, postbuild_cmd, postrun_cmd, batch_cmd, status_cmd, num_procs, libs, cc, fc, timer_file)
+        prebuild_cmd, build_cmd, postbuild_cmd, postrun_cmd, batch_cmd, status_cmd, num_procs, libs, cc, fc, timer_file,
+        cache_dir, cache_size, build_timeout, run_timeout, cpu_limit, mem_limit, cpu_affinity, build_jobs,
+        batch_system, batch_options)
 
     # -----------------------------------------------------------
 
@@ -354,12 +515,30 @@ class TuningInfoGen:
         REPS = 'repetitions'
         RANDOM_SEED = 'random_seed'
         TIMING_ARRAY_SIZE = 'timing_array_size'
+        CACHE_MODE = 'cache_mode'
+        FLUSH_SIZE = 'flush_size'
+        OBJECTIVE = 'objective'
+        TIE_BREAK = 'tie_break'
+        TIMER = 'timer'
+        TIMER_OVERHEAD = 'timer_overhead'
+
+        # the supported cache states of the timed runs
+        CACHE_MODES = ('warm', 'cold', 'first-touch')
+
+        # the supported timer backends (see orio.main.tuner.skeleton_code.SEQ_TIMERS)
+        TIMERS = ('cpu', 'monotonic', 'tsc')
 
         # all expected performance counting information
         pcount_method = None
         pcount_reps = None
         random_seed = None
         timing_array_size = None
+        cache_mode = None
+        flush_size = None
+        objective = None
+        tie_break = None
+        timer = None
+        timer_overhead = None
 
         # iterate over each statement
         for stmt in stmt_seq:
@@ -378,7 +557,8 @@ class TuningInfoGen:
             _, _, (id_name, id_line_no), (rhs, rhs_line_no) = stmt
 
             # unknown argument name
-            if id_name not in (METHOD, REPS, RANDOM_SEED, TIMING_ARRAY_SIZE):
+            if id_name not in (METHOD, REPS, RANDOM_SEED, TIMING_ARRAY_SIZE, CACHE_MODE, FLUSH_SIZE, OBJECTIVE,
+                               TIE_BREAK, TIMER, TIMER_OVERHEAD):
                 err('orio.main.tspec.tune_info: %s: unknown performance counter argument: "%s"' % (id_line_no, id_name))
 
             # evaluate build command
@@ -410,8 +590,45 @@ class TuningInfoGen:
                         'orio.main.tspec.tune_info: %s: performance counting random seed must be an integer' % rhs_line_no)
                 random_seed = rhs
 
+            # cache state in which each repetition of the tested code is timed
+            elif id_name == CACHE_MODE:
+                if rhs not in CACHE_MODES:
+                    err('orio.main.tspec.tune_info: %s: cache mode must be one of: %s' % (rhs_line_no, ', '.join(CACHE_MODES)))
+                cache_mode = rhs
+
+            # size (in bytes) of the buffer traversed between the repetitions in cold mode
+            elif id_name == FLUSH_SIZE:
+                if not isinstance(rhs, int) or rhs <= 0:
+                    err('orio.main.tspec.tune_info: %s: cache flush size must be a positive integer' % rhs_line_no)
+                flush_size = rhs
+
+            # measured quantity minimized by the search: 'time' or a hardware counter of the perf_event method
+            elif id_name == OBJECTIVE:
+                if not isinstance(rhs, str):
+                    err('orio.main.tspec.tune_info: %s: performance counting objective must be a string' % rhs_line_no)
+                objective = rhs
+
+            # hardware counter choosing among the coordinates whose costs are within a tolerance of the best
+            elif id_name == TIE_BREAK:
+                if rhs is not None and not isinstance(rhs, str):
+                    err('orio.main.tspec.tune_info: %s: performance counting tie-breaker must be a string' % rhs_line_no)
+                tie_break = rhs
+
+            # clock read by the getClock() function of the C tests
+            elif id_name == TIMER:
+                if rhs not in TIMERS:
+                    err('orio.main.tspec.tune_info: %s: timer must be one of: %s' % (rhs_line_no, ', '.join(TIMERS)))
+                timer = rhs
+
+            # subtract the overhead of a pair of timer calls, measured when the test starts, from each timing
+            elif id_name == TIMER_OVERHEAD:
+                if not isinstance(rhs, bool):
+                    err('orio.main.tspec.tune_info: %s: timer_overhead must be True or False' % rhs_line_no)
+                timer_overhead = rhs
+
         # return all performance counting information
-        return (pcount_method, pcount_reps, random_seed, timing_array_size)
+        return (pcount_method, pcount_reps, random_seed, timing_array_size, cache_mode, flush_size, objective,
+                tie_break, timer, timer_overhead)
 
     # -----------------------------------------------------------
 
@@ -493,6 +710,12 @@ class TuningInfoGen:
         TRUNS = 'total_runs'
         USE_Z3 = 'use_z3'
         RESUME = 'resume'
+        RUNTIME_PARAMS = 'runtime_params'
+        RUNTIME_SWEEP = 'runtime_sweep'
+        COST_MODEL = 'cost_model'
+        SCREENING = 'screening'
+        CONFIRMATION = 'confirmation'
+        PGO = 'pgo'
 
         # all expected search information
         search_algo = None
@@ -501,6 +724,12 @@ class TuningInfoGen:
         search_resume = False
         search_use_z3 = False
         search_opts = []
+        runtime_params = None
+        runtime_sweep = None
+        cost_model = None
+        screening = None
+        confirmation = None
+        pgo = None
 
         cmdline_params = Globals().cmdline.get('search')
         if cmdline_params:  # Handle the command-line --search option
@@ -529,7 +758,8 @@ class TuningInfoGen:
             _, _, (id_name, id_line_no), (rhs, rhs_line_no) = stmt
 
             # unknown argument name
-            if id_name not in (ALGO, TLIMIT, TRUNS, RESUME, USE_Z3):
+            if id_name not in (ALGO, TLIMIT, TRUNS, RESUME, USE_Z3, RUNTIME_PARAMS, RUNTIME_SWEEP, COST_MODEL,
+                           SCREENING, CONFIRMATION, PGO):
                 if search_algo == None or not id_name.startswith(search_algo.lower() + '_'):
                     err('orio.main.tspec.tune_info: %s: unknown search argument: "%s"' % (id_line_no, id_name))
 
@@ -564,6 +794,56 @@ class TuningInfoGen:
 
                 search_use_z3 = rhs
 
+            # evaluate the performance parameters that may be set at run time (instead of recompiling)
+            elif id_name == RUNTIME_PARAMS:
+                if not (rhs is True or rhs is False or
+                        (isinstance(rhs, list) and all([isinstance(n, str) for n in rhs]))):
+                    err('orio.main.tspec.tune_info: %s: runtime_params must be True, False or a list of parameter names'
+                        % rhs_line_no)
+                runtime_params = rhs or None
+
+            # evaluate the maximum number of coordinates tested by one runtime-parametric run
+            elif id_name == RUNTIME_SWEEP:
+                if not isinstance(rhs, int) or rhs <= 1:
+                    err('orio.main.tspec.tune_info: %s: runtime_sweep must be an integer greater than 1' % rhs_line_no)
+                runtime_sweep = rhs
+
+            # evaluate the static cost model settings (True for the default settings)
+            elif id_name == COST_MODEL:
+                if not (rhs is True or rhs is False or isinstance(rhs, dict)):
+                    err('orio.main.tspec.tune_info: %s: cost_model must be True, False or a dictionary of settings'
+                        % rhs_line_no)
+                if rhs is True:
+                    rhs = {}
+                cost_model = rhs if rhs is not False else None
+
+            # evaluate the parameter screening settings (True for the default settings)
+            elif id_name == SCREENING:
+                if not (rhs is True or rhs is False or isinstance(rhs, dict)):
+                    err('orio.main.tspec.tune_info: %s: screening must be True, False or a dictionary of settings'
+                        % rhs_line_no)
+                if rhs is True:
+                    rhs = {}
+                screening = rhs if rhs is not False else None
+
+            # evaluate the interleaved confirmation settings (True for the default settings)
+            elif id_name == CONFIRMATION:
+                if not (rhs is True or rhs is False or isinstance(rhs, dict)):
+                    err('orio.main.tspec.tune_info: %s: confirmation must be True, False or a dictionary of settings'
+                        % rhs_line_no)
+                if rhs is True:
+                    rhs = {}
+                confirmation = rhs if rhs is not False else None
+
+            # evaluate the profile-guided finalization settings (True for the default settings)
+            elif id_name == PGO:
+                if not (rhs is True or rhs is False or isinstance(rhs, dict)):
+                    err('orio.main.tspec.tune_info: %s: pgo must be True, False or a dictionary of settings'
+                        % rhs_line_no)
+                if rhs is True:
+                    rhs = {}
+                pgo = rhs if rhs is not False else None
+
             # evaluate all other algorithm-specific arguments
             elif search_algo != None and id_name.startswith(search_algo.lower() + '_'):
                 id_name_orig = id_name
@@ -583,7 +863,8 @@ class TuningInfoGen:
                     search_resume = rhs
 
         # return all search information
-        return (search_algo, search_time_limit, search_total_runs, search_use_z3, search_resume, search_opts)
+        return (search_algo, search_time_limit, search_total_runs, search_use_z3, search_resume, search_opts,
+                runtime_params, runtime_sweep, cost_model, screening, confirmation, pgo)
 
     # -----------------------------------------------------------
 
@@ -624,6 +905,64 @@ class TuningInfoGen:
 
     # -----------------------------------------------------------
 
+    def __genCompilerFlagsInfo(self, stmt_seq, def_line_no):
+        '''To generate information about the compiler flags searched with the performance parameters'''
+
+        # all expected argument names
+        TWO_LEVEL = 'two_level'
+
+        # all expected compiler-flag parameters
+        cflag_params = []
+        cflag_constraints = []
+        two_level = False
+
+        # iterate over each statement
+        for stmt in stmt_seq:
+
+            # get the statement keyword and its line number
+            keyw = stmt[0]
+            line_no = stmt[1]
+
+            # skip all 'let' statements, and capture any unexpected statements
+            if keyw == 'let':
+                continue
+            if keyw not in ('param', 'constraint', 'arg'):
+                err('orio.main.tspec.tune_info: %s: unexpected statement type: "%s"' % (line_no, keyw))
+
+            # evaluate the flag group: the values are alternative flags (an empty string adds no flag)
+            if keyw == 'param':
+                _, _, (id_name, id_line_no), is_range, (rhs, rhs_line_no) = stmt
+                if not is_range:
+                    rhs = [rhs]
+                if not rhs or [v for v in rhs if not isinstance(v, str)]:
+                    err('orio.main.tspec.tune_info: %s: the values of compiler flag "%s" must be strings'
+                        % (rhs_line_no, id_name))
+                cflag_params.append((id_name, rhs))
+
+            # evaluate constraints
+            elif keyw == 'constraint':
+                _, _, (id_name, id_line_no), (rhs, rhs_line_no) = stmt
+                cflag_constraints.append((id_name, rhs))
+
+            # search the flags after the source parameters
+            else:
+                _, _, (id_name, id_line_no), (rhs, rhs_line_no) = stmt
+                if id_name == TWO_LEVEL:
+                    if not isinstance(rhs, bool):
+                        err('orio.main.tspec.tune_info: %s: two_level must be True or False' % rhs_line_no)
+                    two_level = rhs
+                else:
+                    err('orio.main.tspec.tune_info: %s: unrecognized argument: "%s"' % (id_line_no, id_name))
+
+        if len(cflag_constraints) > 0 and len(cflag_params) == 0:
+            err('orio.main.tspec.tune_info: %s: compiler flag constraints require compiler flag definitions'
+                % def_line_no)
+
+        # return all compiler flag information
+        return (cflag_params, cflag_constraints, two_level)
+
+    # -----------------------------------------------------------
+
     def __genInputParamsInfo(self, stmt_seq, def_line_no):
         '''To generate information about the input parameters used in the input variables'''
 
@@ -667,11 +1006,15 @@ class TuningInfoGen:
         # all expected argument names
         DECL_FILE = 'decl_file'
         INIT_FILE = 'init_file'
+        INPUT_DATA = 'input_data'
+        DATA_DIR = 'data_dir'
 
         # all input variable information
         ivar_decls = []
         ivar_decl_file = None
         ivar_init_file = None
+        ivar_input_data = None
+        ivar_data_dir = None
 
         # iterate over each statement
         for stmt in stmt_seq:
@@ -714,6 +1057,20 @@ class TuningInfoGen:
 
                     ivar_init_file = rhs
 
+                # pre-generated input data file ('pattern', 'random' or a user-provided file name)
+                elif id_name == INPUT_DATA:
+                    if not isinstance(rhs, str):
+                        err('orio.main.tspec.tune_info: %s: input data must be a string' % rhs_line_no)
+
+                    ivar_input_data = rhs
+
+                # directory of the generated input data files
+                elif id_name == DATA_DIR:
+                    if not isinstance(rhs, str):
+                        err('orio.main.tspec.tune_info: %s: input data directory must be a string' % rhs_line_no)
+
+                    ivar_data_dir = rhs
+
                 # unknown argument name
                 else:
                     err('orio.main.tspec.tune_info: %s: unknown input variable argument: "%s"' % (id_line_no, id_name))
@@ -801,7 +1158,7 @@ class TuningInfoGen:
                 pass
 
         # return all input variables information
-        return (ivar_decls, ivar_decl_file, ivar_init_file)
+        return (ivar_decls, ivar_decl_file, ivar_init_file, ivar_input_data, ivar_data_dir)
 
     # -----------------------------------------------------------
 
@@ -857,9 +1214,15 @@ class TuningInfoGen:
 
         VALIDATION_FILE = 'validation_file'
         EXPECTED_OUTPUT = 'expected_output'
+        CHECKSUM = 'checksum'
+        TOLERANCE = 'tolerance'
+        OUTPUTS = 'outputs'
 
         validation_file = None
         expected_output = None
+        checksum = False
+        tolerance = 1e-8
+        checksum_vars = None
 
         # iterate over each statement
         for stmt in stmt_seq:
@@ -891,14 +1254,32 @@ class TuningInfoGen:
                 elif id_name == EXPECTED_OUTPUT:
                     expected_output = rhs
 
+                # compare the results of each variant with those of the original code, in the test itself
+                elif id_name == CHECKSUM:
+                    if not isinstance(rhs, bool):
+                        err('orio.main.tspec.tune_info: %s: checksum must be True or False' % rhs_line_no)
+                    checksum = rhs
+
+                # maximum normwise relative error of each checked variable
+                elif id_name == TOLERANCE:
+                    if not isinstance(rhs, (int, float)) or isinstance(rhs, bool) or rhs < 0:
+                        err('orio.main.tspec.tune_info: %s: tolerance must be a non-negative number' % rhs_line_no)
+                    tolerance = rhs
+
+                # the checked variables
+                elif id_name == OUTPUTS:
+                    if not isinstance(rhs, list) or not all([isinstance(n, str) for n in rhs]):
+                        err('orio.main.tspec.tune_info: %s: outputs must be a list of variable names' % rhs_line_no)
+                    checksum_vars = rhs
+
                 # unknown argument name
                 else:
                     err('orio.main.tspec.tune_info: %s: unknown validation argument: "%s"' % (id_line_no, id_name))
 
-        if validation_file == None:
+        if validation_file == None and not checksum:
             err('orio.main.tspec.tune_info: missing validation file.')
 
-        return (validation_file, expected_output)
+        return (validation_file, expected_output, checksum, tolerance, checksum_vars)
 
     # -----------------------------------------------------------
 
@@ -956,6 +1337,7 @@ class TuningInfoGen:
         SEARCH = 'search'
         PERF_PARAMS = 'performance_params'
         CMDLINE_PARAMS = 'cmdline_params'
+        COMPILER_FLAGS = 'compiler_flags'
         INPUT_PARAMS = 'input_params'
         INPUT_VARS = 'input_vars'
         PTEST_CODE = 'performance_test_code'
@@ -964,15 +1346,16 @@ class TuningInfoGen:
 
         # all expected definition information
         build_info = {'build_cmd': 'gcc -O3', 'libs': ''}
-        pcount_info = ('basic timer', 5, None, None)
+        pcount_info = ('basic timer', 5, None, None, None, None, 'time', None, 'cpu', False)
         power_info = ('none', 5, None, None)
-        search_info = ('Exhaustive', -1, -1, False, False, [])
+        search_info = ('Exhaustive', -1, -1, False, False, [], None, 100, None, None, None, None)
         pparam_info = ([], [])
         cmdline_info = ([], [])
+        cflag_info = ([], [], False)
         iparam_info = ([], [])
         ivar_info = None
         ptest_code_info = (None,)
-        validation_info = (None, None)
+        validation_info = (None, None, False, 1e-8, None)
         other_info = None
 
         # iterate over each statement
@@ -992,14 +1375,16 @@ class TuningInfoGen:
             _, _, (dname, dname_line_no), body_stmt_seq = stmt
 
             # unknown definition name
-            if dname not in (BUILD, PERF_COUNTER, POWER, SEARCH, PERF_PARAMS, CMDLINE_PARAMS, INPUT_PARAMS,
-                             INPUT_VARS, PTEST_CODE, VALIDATION, OTHER):
+            if dname not in (BUILD, PERF_COUNTER, POWER, SEARCH, PERF_PARAMS, CMDLINE_PARAMS, COMPILER_FLAGS,
+                             INPUT_PARAMS, INPUT_VARS, PTEST_CODE, VALIDATION, OTHER):
                 err('orio.main.tspec.tune_info: %s: unknown definition name: "%s"' % (dname_line_no, dname))
 
             # build definition
             if dname == BUILD:
                 (prebuild_cmd, build_cmd, postbuild_cmd, postrun_cmd, batch_cmd, status_cmd,
-                 num_procs, libs, cc, fc, timer_file) = self.__genBuildInfo(body_stmt_seq, line_no)
+                 num_procs, libs, cc, fc, timer_file, cache_dir, cache_size, build_timeout, run_timeout,
+                 cpu_limit, mem_limit, cpu_affinity, build_jobs, batch_system,
+                 batch_options) = self.__genBuildInfo(body_stmt_seq, line_no)
                 if build_cmd == None:
                     err('orio.main.tspec.tune_info: %s: missing build command in the build section' % line_no)
 
@@ -1008,7 +1393,11 @@ class TuningInfoGen:
                     warn(('orio.main.tspec.tune_info: %s: both batch and status commands in build section ' +
                           'must not be empty') % line_no)
 
-                if batch_cmd == None and num_procs > 1:
+                if batch_cmd != None and batch_system != None:
+                    err(('orio.main.tspec.tune_info: %s: batch_command and batch_system in build section ' +
+                         'cannot be used together') % line_no)
+
+                if batch_cmd == None and batch_system == None and num_procs > 1:
                     warn(('orio.main.tspec.tune_info: %s: number of processors in build section must be greater than ' +
                           'one for non-batch (or non-parallel) search') % line_no)
 
@@ -1022,20 +1411,38 @@ class TuningInfoGen:
                               'libs': libs,
                               'cc': cc,
                               'fc': fc,
-                              'timer_file': timer_file}
+                              'timer_file': timer_file,
+                              'cache_dir': cache_dir,
+                              'cache_size': cache_size,
+                              'build_timeout': build_timeout,
+                              'run_timeout': run_timeout,
+                              'cpu_limit': cpu_limit,
+                              'mem_limit': mem_limit,
+                              'cpu_affinity': cpu_affinity,
+                              'build_jobs': build_jobs,
+                              'batch_system': batch_system,
+                              'batch_options': batch_options}
 
             # performance counter definition
             elif dname == PERF_COUNTER:
-                pcount_method, pcount_reps, random_seed, timing_array_size = self.__genPerfCounterInfo(body_stmt_seq,
-                                                                                                       line_no)
-                default_p_method, default_p_reps, _, _ = pcount_info
+                (pcount_method, pcount_reps, random_seed, timing_array_size, cache_mode, flush_size, objective,
+                 tie_break, timer, timer_overhead) = self.__genPerfCounterInfo(body_stmt_seq, line_no)
+                (default_p_method, default_p_reps, _, _, _, _, default_objective, _, default_timer,
+                 default_timer_overhead) = pcount_info
                 if pcount_method == None:
                     pcount_method = default_p_method
                 if pcount_reps == None:
                     pcount_reps = default_p_reps
+                if objective == None:
+                    objective = default_objective
+                if timer == None:
+                    timer = default_timer
+                if timer_overhead == None:
+                    timer_overhead = default_timer_overhead
                 if not timing_array_size:
                     timing_array_size = pcount_reps + (pcount_reps + 1) % 2
-                pcount_info = (pcount_method, pcount_reps, random_seed, timing_array_size)
+                pcount_info = (pcount_method, pcount_reps, random_seed, timing_array_size, cache_mode, flush_size,
+                               objective, tie_break, timer, timer_overhead)
 
             # Power/energy measurement
             elif dname == POWER:
@@ -1054,8 +1461,12 @@ class TuningInfoGen:
             elif dname == SEARCH:
                 (search_algo, search_time_limit,
                  search_total_runs, search_use_z3, search_resume,
-                 search_opts) = self.__genSearchInfo(body_stmt_seq, line_no)
-                default_s_algo, default_s_tlimit, default_s_truns, search_use_z3, default_s_resume, _ = search_info
+                 search_opts, runtime_params, runtime_sweep, cost_model,
+                 screening, confirmation, pgo) = self.__genSearchInfo(body_stmt_seq, line_no)
+                (default_s_algo, default_s_tlimit, default_s_truns, search_use_z3, default_s_resume, _,
+                 _, default_s_sweep, _, _, _, _) = search_info
+                if runtime_sweep == None:
+                    runtime_sweep = default_s_sweep
                 if search_algo == None:
                     search_algo = default_s_algo
                 if search_time_limit == None:
@@ -1065,7 +1476,8 @@ class TuningInfoGen:
                 if search_resume == None:
                     search_resume = False
                 search_info = (search_algo, search_time_limit, search_total_runs, search_use_z3,
-                               search_resume, search_opts)
+                               search_resume, search_opts, runtime_params, runtime_sweep, cost_model, screening,
+                               confirmation, pgo)
 
             # performance parameters definition
             elif dname == PERF_PARAMS:
@@ -1085,6 +1497,11 @@ class TuningInfoGen:
                 cmdline_info = (cmdline_params, cmdline_constraints)
                 debug("tune_info TuningInfo cmdline_params" + str(cmdline_params))
 
+            # compiler flags definition
+            elif dname == COMPILER_FLAGS:
+                cflag_info = self.__genCompilerFlagsInfo(body_stmt_seq, line_no)
+                debug("tune_info TuningInfo cflag_params" + str(cflag_info[0]))
+
 
             # input parameters definition
             elif dname == INPUT_PARAMS:
@@ -1096,9 +1513,9 @@ class TuningInfoGen:
 
             # input variables definition
             elif dname == INPUT_VARS:
-                (ivar_decls, ivar_decl_file,
-                 ivar_init_file) = self.__genInputVarsInfo(body_stmt_seq, line_no)
-                ivar_info = (ivar_decls, ivar_decl_file, ivar_init_file)
+                (ivar_decls, ivar_decl_file, ivar_init_file, ivar_input_data,
+                 ivar_data_dir) = self.__genInputVarsInfo(body_stmt_seq, line_no)
+                ivar_info = (ivar_decls, ivar_decl_file, ivar_init_file, ivar_input_data, ivar_data_dir)
 
             # performance-test code definition
             elif dname == PTEST_CODE:
@@ -1117,6 +1534,12 @@ class TuningInfoGen:
         if ivar_info == None:
             err('orio.main.tspec.tune_info:  missing input variables definition in the tuning specification')
 
+        # the compiler flags share the name space of the performance parameters
+        clashes = set([n for n, _ in cflag_info[0]]) & set([n for n, _ in pparam_info[0]])
+        if clashes:
+            err('orio.main.tspec.tune_info:  compiler flags and performance parameters cannot share names: %s'
+                % ', '.join(sorted(clashes)))
+
         # return the tuning information
         return TuningInfo(build_info, pcount_info, power_info, search_info, pparam_info, cmdline_info,
-                          iparam_info, ivar_info, ptest_code_info, validation_info, other_info)
+                          iparam_info, ivar_info, ptest_code_info, validation_info, other_info, cflag_info)
@@ -0,0 +1,275 @@
+#
+# Batch-queue submission of performance tests: scheduler adapters and the job table
+#
+
+import os, time
+
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+class BatchJob:
+    '''A performance test submitted to a batch system'''
+
+    def __init__(self, coord, exe_name, script_name, out_name, files=None):
+        '''To instantiate a job testing the variant of the given coordinate'''
+
+        self.coord = coord                  # the coordinate key of the tested variant
+        self.exe_name = exe_name            # the test executable
+        self.script_name = script_name      # the submitted job script
+        self.out_name = out_name            # the file receiving the output of the job
+        self.files = files or []            # the generated files to delete once the job is harvested
+        self.job_id = None                  # the identifier assigned by the scheduler
+        self.submit_time = None
+        self.finish_time = None
+
+#-----------------------------------------------------
+
+class Scheduler:
+    '''
+    The base class of the batch-system adapters. An adapter knows how to submit a job script
+    with its output redirected to a given file, and how to find out which of the submitted
+    jobs are still queued or running.
+    '''
+
+    # the name used to select the adapter in the tuning spec (batch_system argument)
+    name = None
+
+    # the time (in seconds) between two status queries
+    poll_interval = 3
+
+    # the number of consecutive failed status queries after which the jobs are considered finished
+    max_status_failures = 20
+
+    # the command templates
+    submit_cmd = None       # keys: opts, out, script
+    status_cmd = None       # keys: ids
+
+    # the error message of a failed status query about jobs the scheduler no longer knows (i.e., finished)
+    finished_msg = None
+
+    #-----------------------------------------------------
+
+    def __init__(self, runner, opts=''):
+        '''To instantiate an adapter running its commands with the given ProcRunner'''
+        self.runner = runner
+        self.opts = opts or ''
+        self.status_failures = 0
+
+    def submit(self, job):
+        '''Submit the job script of the given job; return the job identifier'''
+
+        cmd = self.submit_cmd % {'opts': self.opts, 'out': job.out_name, 'script': job.script_name}
+        res = self.runner.run(cmd, 'batch')
+        if res.failed() or not res.out.strip():
+            err('orio.main.tuner.batch_queue: failed to submit job "%s" (%s)' % (cmd, res.describe()))
+            return None
+        return self.parseJobId(res.out)
+
+    def parseJobId(self, output):
+        '''Return the job identifier printed by the submit command (by default, its last word)'''
+        return output.strip().split()[-1]
+
+    def active(self, job_ids):
+        '''Return the subset of the given job identifiers that are still queued or running'''
+
+        if not job_ids:
+            return set()
+        cmd = self.status_cmd % {'ids': ' '.join(job_ids), 'idlist': ','.join(job_ids)}
+        res = self.runner.run(cmd, 'batch')
+        if res.failed() and self.finished_msg and self.finished_msg in res.out + res.errout:
+            self.status_failures = 0
+            return set()
+        if res.failed():
+            # (the scheduler may be briefly unavailable: the jobs are queried again at the next poll)
+            self.status_failures += 1
+            if self.status_failures < self.max_status_failures:
+                warn('orio.main.tuner.batch_queue: failed to query the status of the jobs "%s" (%s), retrying'
+                     % (cmd, res.describe()))
+                return set(job_ids)
+            err('orio.main.tuner.batch_queue: failed to query the status of the jobs %d times: "%s" (%s), '
+                % (self.status_failures, cmd, res.describe()) + 'considering the jobs finished', doexit=False)
+            return set()
+        self.status_failures = 0
+        listed = set()
+        for line in res.out.split('\n'):
+            words = line.split()
+            if words:
+                listed.add(words[0].split('.')[0])
+        return set([j for j in job_ids if j.split('.')[0] in listed])
+
+    def cancel(self, job_id):
+        '''Remove the given job from the queue (if supported)'''
+        pass
+
+#-----------------------------------------------------
+
+class SlurmScheduler(Scheduler):
+    '''Adapter for Slurm (sbatch/squeue/scancel)'''
+
+    name = 'slurm'
+    submit_cmd = 'sbatch --parsable %(opts)s -o %(out)s %(script)s'
+    status_cmd = 'squeue -h -t PD,R,CG,CF,S -o %%i -j %(idlist)s'
+    finished_msg = 'Invalid job id'
+
+    def parseJobId(self, output):
+        # --parsable prints "jobid[;cluster]"
+        return output.strip().split('\n')[-1].split(';')[0].strip()
+
+    def cancel(self, job_id):
+        self.runner.run('scancel %s' % job_id, 'batch')
+
+class PBSScheduler(Scheduler):
+    '''Adapter for PBS/Torque (qsub/qstat/qdel)'''
+
+    name = 'pbs'
+    submit_cmd = 'qsub %(opts)s -j oe -o %(out)s %(script)s'
+    status_cmd = 'qstat %(ids)s 2>/dev/null | tail -n +3'
+
+    def cancel(self, job_id):
+        self.runner.run('qdel %s' % job_id, 'batch')
+
+class CobaltScheduler(Scheduler):
+    '''Adapter for Cobalt (qsub --mode script/qstat/qdel)'''
+
+    name = 'cobalt'
+    submit_cmd = 'qsub --mode script %(opts)s -o %(out)s -e %(out)s.err %(script)s'
+    status_cmd = 'qstat %(ids)s 2>/dev/null | tail -n +3'
+
+    def cancel(self, job_id):
+        self.runner.run('qdel %s' % job_id, 'batch')
+
+#-----------------------------------------------------
+
+class LocalScheduler(Scheduler):
+    '''
+    A fake scheduler running the job scripts as local background processes, at most max_jobs
+    at a time (each in its own slot of the CPU affinity list). It is meant for testing the
+    batch-queue backend and for using it on a workstation.
+    '''
+
+    name = 'local'
+    poll_interval = 0.05
+
+    def __init__(self, runner, opts='', max_jobs=1):
+        '''To instantiate a local scheduler'''
+        Scheduler.__init__(self, runner, opts)
+        self.max_jobs = max(1, max_jobs)
+        self.counter = 0
+        self.queued = []        # [(job_id, job)] waiting for a free slot
+        self.running = {}       # job_id --> (slot, process)
+
+    def __startQueued(self):
+        '''Start queued jobs while there are free slots'''
+        busy = set([slot for slot, _ in list(self.running.values())])
+        free = [s for s in range(self.max_jobs) if s not in busy]
+        while self.queued and free:
+            job_id, job = self.queued.pop(0)
+            slot = free.pop(0)
+            cmd = 'sh %s > %s 2>&1' % (job.script_name, job.out_name)
+            self.running[job_id] = (slot, self.runner.start(cmd, 'run', slot))
+
+    def submit(self, job):
+        self.counter += 1
+        job_id = 'local%d' % self.counter
+        self.queued.append((job_id, job))
+        self.__startQueued()
+        return job_id
+
+    def active(self, job_ids):
+        for job_id, (slot, proc) in list(self.running.items()):
+            timeout = self.runner.timeouts.get('run')
+            if proc.poll() is not None or (timeout and time.time() - proc.orio_start > timeout):
+                self.runner.finish(proc, timeout=0)
+                del self.running[job_id]
+        self.__startQueued()
+        live = set(self.running.keys()) | set([job_id for job_id, _ in self.queued])
+        return set([j for j in job_ids if j in live])
+
+    def cancel(self, job_id):
+        self.queued = [(j, job) for j, job in self.queued if j != job_id]
+        if job_id in self.running:
+            self.runner.finish(self.running.pop(job_id)[1], timeout=0)
+
+#-----------------------------------------------------
+
+# the available adapters, indexed by their name
+SCHEDULERS = dict([(c.name, c) for c in (SlurmScheduler, PBSScheduler, CobaltScheduler, LocalScheduler)])
+
+def getScheduler(name, runner, opts='', max_jobs=1):
+    '''Return an instance of the batch-system adapter with the given name'''
+
+    if name not in SCHEDULERS:
+        err('orio.main.tuner.batch_queue: unknown batch system "%s" (expected one of: %s)'
+            % (name, ', '.join(sorted(SCHEDULERS.keys()))), doexit=True)
+    if name == LocalScheduler.name:
+        return LocalScheduler(runner, opts, max_jobs)
+    return SCHEDULERS[name](runner, opts)
+
+#-----------------------------------------------------
+
+class BatchQueue:
+    '''
+    The table of submitted performance-test jobs. All jobs are submitted right away; the
+    completed ones are harvested in the order the scheduler reports them as finished.
+    '''
+
+    # the time (in seconds) to wait for the output file of a finished job to appear
+    __OUTPUT_GRACE = 30
+
+    #-----------------------------------------------------
+
+    def __init__(self, scheduler):
+        '''To instantiate an empty job table using the given scheduler adapter'''
+        self.scheduler = scheduler
+        self.jobs = {}          # job_id --> BatchJob (submitted and not yet harvested)
+        self.finished = {}      # job_id --> BatchJob (finished, waiting for the output file)
+
+    def __len__(self):
+        '''Return the number of jobs that have not been harvested yet'''
+        return len(self.jobs) + len(self.finished)
+
+    #-----------------------------------------------------
+
+    def submit(self, job):
+        '''Submit the given job; return False if the submission failed'''
+
+        job.job_id = self.scheduler.submit(job)
+        if job.job_id is None:
+            return False
+        job.submit_time = time.time()
+        self.jobs[job.job_id] = job
+        info(' submitted job %s for coordinate %s' % (job.job_id, job.coord))
+        return True
+
+    def harvest(self, wait=False):
+        '''
+        Return the list of jobs that have completed since the last call
+        @param wait: if True, block until at least one job completes (unless the table is empty)
+        '''
+
+        while True:
+            if self.jobs:
+                active = self.scheduler.active(list(self.jobs.keys()))
+                for job_id in list(self.jobs.keys()):
+                    if job_id not in active:
+                        job = self.jobs.pop(job_id)
+                        job.finish_time = time.time()
+                        self.finished[job_id] = job
+
+            # a finished job is complete once its output file exists (shared file systems may lag)
+            done = []
+            for job_id, job in list(self.finished.items()):
+                if os.path.exists(job.out_name) or time.time() - job.finish_time > self.__OUTPUT_GRACE:
+                    done.append(self.finished.pop(job_id))
+
+            if done or not wait or not len(self):
+                return done
+            time.sleep(self.scheduler.poll_interval)
+
+    def cancelAll(self):
+        '''Remove all unharvested jobs from the queue'''
+        for job_id in list(self.jobs.keys()):
+            self.scheduler.cancel(job_id)
+        self.jobs = {}
+        self.finished = {}
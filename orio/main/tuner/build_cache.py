@@ -0,0 +1,198 @@
+#
+# A size-bounded cache of compiled performance-testing executables
+#
+
+import os, re, shutil, hashlib, subprocess
+
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+# compiler version strings, indexed by the compiler command (queried only once per process)
+_compiler_versions = {}
+
+def getCompilerVersion(build_cmd):
+    '''Return the version string reported by the compiler used in the given build command'''
+
+    global _compiler_versions
+
+    parts = build_cmd.split()
+    if not parts:
+        return ''
+    compiler = parts[0]
+    if compiler in _compiler_versions:
+        return _compiler_versions[compiler]
+
+    try:
+        p = subprocess.Popen([compiler, '--version'], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        out, _ = p.communicate()
+        version = out.decode('utf-8', 'replace').strip()
+    except Exception:
+        version = compiler
+    _compiler_versions[compiler] = version
+    return version
+
+# the local (quoted) include directives
+_INCLUDE_RE = re.compile(r'^\s*#\s*include\s*"([^"]+)"', re.M)
+
+def getIncludedCode(src_code, src_dir, build_cmd=''):
+    '''
+    Return the contents of the local header files included (directly or not) by the given source,
+    found like the compiler does: in the directory of the including file, then in the -I directories
+    of the build command. The generated test code includes the declaration and initialization files
+    of the tuning specification, whose edits must change the cache key of the test.
+    '''
+
+    include_dirs = []
+    parts = build_cmd.split()
+    for k, part in enumerate(parts):
+        if part == '-I' and k + 1 < len(parts):
+            include_dirs.append(parts[k + 1])
+        elif part.startswith('-I') and len(part) > 2:
+            include_dirs.append(part[2:])
+
+    included = []
+    seen = set()
+    pending = [(src_code, src_dir)]
+    while pending:
+        code, cur_dir = pending.pop()
+        for name in _INCLUDE_RE.findall(code):
+            for d in [cur_dir] + include_dirs:
+                path = os.path.abspath(os.path.join(d, name))
+                if os.path.isfile(path):
+                    break
+            else:
+                continue
+            if path in seen:
+                continue
+            seen.add(path)
+            try:
+                with open(path, 'r', errors='replace') as f:
+                    header = f.read()
+            except OSError:
+                continue
+            included.append(path + '\0' + header)
+            pending.append((header, os.path.dirname(path)))
+    return '\0'.join(included)
+
+#-----------------------------------------------------
+
+class BuildCache:
+    '''
+    An object/executable cache keyed on the preprocessed variant source and everything else
+    that affects the result of a build: the expanded build command (after @CFLAGS and @NAME@
+    substitution), the extra compiler options, the link libraries and the compiler version.
+
+    Entries are plain files in the cache directory. The cache is bounded by size and evicts
+    the least recently used entries first (the modification time of an entry is refreshed on
+    every hit), so it can be shared by successive and concurrent tuning campaigns.
+    '''
+
+    # the suffix of cached executables
+    __SUFFIX = '.exe'
+
+    # leading comment block with the performance-parameter values (written by PerfTestDriver)
+    __PARAMINFO_RE = re.compile(r'^/\*.*?\*/', re.S)
+
+    #-----------------------------------------------------
+
+    def __init__(self, cache_dir, max_size_mb=1024):
+        '''To instantiate a build cache in the given directory, bounded by max_size_mb megabytes'''
+
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            if not os.path.exists(self.cache_dir):
+                os.makedirs(self.cache_dir)
+        except Exception as e:
+            err('orio.main.tuner.build_cache: cannot create cache directory "%s"\n --> %s: %s'
+                % (self.cache_dir, e.__class__.__name__, e))
+
+    #-----------------------------------------------------
+
+    def getKey(self, src_code, build_cmd, extra_compiler_opts='', libs='', extra=''):
+        '''Return the cache key for the given (preprocessed) source and build configuration'''
+
+        # the performance-parameter header does not affect the generated executable
+        src_code = self.__PARAMINFO_RE.sub('', src_code, count=1)
+
+        h = hashlib.sha1()
+        for part in (src_code, build_cmd, extra_compiler_opts, libs, extra, getCompilerVersion(build_cmd)):
+            h.update(str(part).encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    #-----------------------------------------------------
+
+    def __path(self, key):
+        return os.path.join(self.cache_dir, key + self.__SUFFIX)
+
+    #-----------------------------------------------------
+
+    def fetch(self, key, exe_name):
+        '''Copy the cached executable with the given key to exe_name; return True on a hit'''
+
+        path = self.__path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return False
+        try:
+            shutil.copy2(path, exe_name)
+            os.utime(path, None)
+        except Exception as e:
+            warn('orio.main.tuner.build_cache: failed to retrieve cached executable "%s"\n --> %s: %s'
+                 % (path, e.__class__.__name__, e))
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    #-----------------------------------------------------
+
+    def store(self, key, exe_name):
+        '''Add the given freshly built executable to the cache, evicting old entries if needed'''
+
+        if not os.path.exists(exe_name):
+            return
+        path = self.__path(key)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            shutil.copy2(exe_name, tmp_path)
+            os.rename(tmp_path, path)
+            os.utime(path, None)
+        except Exception as e:
+            warn('orio.main.tuner.build_cache: failed to store executable "%s" in the cache\n --> %s: %s'
+                 % (exe_name, e.__class__.__name__, e))
+            return
+        self.evict()
+
+    #-----------------------------------------------------
+
+    def evict(self):
+        '''Remove the least recently used entries until the cache fits within its size bound'''
+
+        entries = []
+        total_size = 0
+        for fname in os.listdir(self.cache_dir):
+            if not fname.endswith(self.__SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, fname)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total_size += st.st_size
+
+        entries.sort()
+        while total_size > self.max_size and entries:
+            _, size, path = entries.pop(0)
+            try:
+                os.unlink(path)
+                total_size -= size
+                debug('evicted %s from the build cache' % path, obj=self, level=4)
+            except OSError:
+                pass
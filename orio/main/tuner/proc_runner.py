@@ -0,0 +1,226 @@
+#
+# A managed subprocess layer for running the build, test and auxiliary commands
+#
+
+import os, signal, time, queue, contextlib
+import subprocess as sp
+from concurrent import futures
+
+from orio.main.util.globals import *
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+#-----------------------------------------------------
+
+@contextlib.contextmanager
+def _unreserved():
+    '''The reservation of no resources (contextlib.nullcontext is only available in Python 3.7+)'''
+    yield
+
+#-----------------------------------------------------
+
+class ProcResult:
+    '''The outcome of a command executed by ProcRunner'''
+
+    def __init__(self, cmd, phase, status, out='', errout='', elapsed=0.0, timed_out=False):
+        '''To instantiate the result of the given command'''
+
+        self.cmd = cmd                  # the executed (shell) command
+        self.phase = phase              # the phase the command belongs to, e.g., 'build' or 'run'
+        self.status = status            # the exit status (nonzero on failure or timeout)
+        self.out = out                  # the captured standard output
+        self.errout = errout            # the captured standard error
+        self.elapsed = elapsed          # the wall-clock time in seconds
+        self.timed_out = timed_out      # True if the command was killed when its timeout expired
+
+    #-----------------------------------------------------
+
+    def failed(self):
+        '''Return True if the command did not complete successfully'''
+        return self.timed_out or self.status != 0
+
+    def describe(self):
+        '''Return a short description of a failed command (for error messages)'''
+
+        if self.timed_out:
+            return 'timed out after %.1f s' % self.elapsed
+        msg = 'exit status %s' % self.status
+        if self.errout.strip():
+            msg += ', stderr:\n%s' % '\n'.join(self.errout.strip().split('\n')[-10:])
+        return msg
+
+#-----------------------------------------------------
+
+class ProcRunner:
+    '''
+    Runs shell commands as child processes with per-phase timeouts, resource limits for the
+    test executables (CPU time and memory) and CPU-affinity pinning, capturing both the
+    standard output and the standard error.
+
+    Each command is started in a new session, so on a timeout the whole process group
+    (including a hung variant started through the shell) is killed. Independent commands
+    can be run concurrently with runMany; at most max_jobs processes are alive at any time
+    and, with a CPU affinity list, each concurrently running process is pinned to its own core.
+
+    When several files or regions are tuned concurrently, run and runMany also hold the shared
+    build slots and cores of each command (see orio.main.tuner.resources).
+    '''
+
+    # phases whose processes are subject to the resource limits and affinity pinning
+    __LIMITED_PHASES = ('run',)
+
+    #-----------------------------------------------------
+
+    def __init__(self, timeouts=None, cpu_limit=None, mem_limit=None, cpu_affinity=None, max_jobs=1):
+        '''
+        To instantiate a process runner
+        @param timeouts: a dictionary of wall-clock timeouts in seconds, indexed by phase name
+        @param cpu_limit: the CPU-time limit (seconds) of limited-phase processes
+        @param mem_limit: the memory limit (MB) of limited-phase processes
+        @param cpu_affinity: a list of the CPU cores limited-phase processes may run on
+        @param max_jobs: the maximum number of concurrently running processes
+        '''
+
+        self.timeouts = dict(timeouts or {})
+        self.cpu_limit = cpu_limit
+        self.mem_limit = mem_limit
+        self.cpu_affinity = list(cpu_affinity or [])
+        self.max_jobs = max(1, max_jobs)
+
+        if self.cpu_affinity and not hasattr(os, 'sched_setaffinity'):
+            warn('orio.main.tuner.proc_runner: CPU affinity is not supported on this platform, ignoring it')
+            self.cpu_affinity = []
+        if (self.cpu_limit or self.mem_limit) and resource is None:
+            warn('orio.main.tuner.proc_runner: resource limits are not supported on this platform, ignoring them')
+            self.cpu_limit = self.mem_limit = None
+
+    #-----------------------------------------------------
+
+    def __cores(self, slot):
+        '''Return the cores a limited-phase process of the given slot is pinned to (None if it is not pinned)'''
+
+        if not self.cpu_affinity:
+            return None
+        if slot is not None:
+            return [self.cpu_affinity[slot % len(self.cpu_affinity)]]
+        return self.cpu_affinity
+
+    def __reserve(self, phase, slot):
+        '''Return the reservation of the resources shared with concurrent tuning processes (if any)'''
+
+        resources = Globals().resources
+        if resources is None:
+            return _unreserved()
+        return resources.reserve(phase, self.__cores(slot) if phase in self.__LIMITED_PHASES else None)
+
+    def __preexec(self, phase, slot, scale=1):
+        '''Return the function applying the limits and the pinning in the child process'''
+
+        if phase not in self.__LIMITED_PHASES:
+            return None
+        cpu_limit = self.cpu_limit and self.cpu_limit * scale
+        mem_limit = self.mem_limit
+        cores = self.__cores(slot)
+        if not (cpu_limit or mem_limit or cores):
+            return None
+
+        def preexec():
+            if cpu_limit:
+                secs = int(max(1, cpu_limit))
+                resource.setrlimit(resource.RLIMIT_CPU, (secs, secs + 1))
+            if mem_limit:
+                # RLIMIT_RSS is not enforced by Linux, so the address space is limited instead
+                nbytes = int(mem_limit * 1024 * 1024)
+                resource.setrlimit(resource.RLIMIT_AS, (nbytes, nbytes))
+            if cores:
+                os.sched_setaffinity(0, cores)
+        return preexec
+
+    #-----------------------------------------------------
+
+    def start(self, cmd, phase='run', slot=None, scale=1):
+        '''
+        Start the given shell command without waiting for it; return the process handle
+        @param slot: the concurrency slot of the process (selects its core in the affinity list)
+        @param scale: the number of tests run by the command (multiplies its timeout and CPU-time limit)
+        '''
+
+        debug('starting %s command: %s' % (phase, cmd), obj=self, level=5)
+        proc = sp.Popen(cmd, shell=True, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True,
+                        start_new_session=True, preexec_fn=self.__preexec(phase, slot, scale))
+        proc.orio_cmd = cmd
+        proc.orio_phase = phase
+        proc.orio_scale = scale
+        proc.orio_start = time.time()
+        return proc
+
+    def __kill(self, proc):
+        '''Kill the process group of the given process'''
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def finish(self, proc, timeout=None):
+        '''Wait for the given process (started with start) to complete; return its ProcResult'''
+
+        if timeout is None:
+            timeout = self.timeouts.get(proc.orio_phase)
+            if timeout is not None:
+                timeout *= proc.orio_scale
+        if timeout is not None:
+            timeout = max(0, timeout - (time.time() - proc.orio_start))
+        timed_out = False
+        try:
+            out, errout = proc.communicate(timeout=timeout)
+        except sp.TimeoutExpired:
+            timed_out = True
+            self.__kill(proc)
+            out, errout = proc.communicate()
+        elapsed = time.time() - proc.orio_start
+        status = proc.returncode
+        if status < 0:
+            # killed by a signal, e.g., SIGXCPU when the CPU-time limit is exceeded
+            status = 128 - status
+        return ProcResult(proc.orio_cmd, proc.orio_phase, status, out or '', errout or '', elapsed, timed_out)
+
+    #-----------------------------------------------------
+
+    def run(self, cmd, phase='run', scale=1):
+        '''Run the given shell command to completion; return its ProcResult'''
+
+        with self.__reserve(phase, None):
+            try:
+                proc = self.start(cmd, phase, scale=scale)
+            except Exception as e:
+                return ProcResult(cmd, phase, 127, errout='%s: %s' % (e.__class__.__name__, e))
+            return self.finish(proc)
+
+    def runMany(self, cmds, phase='run'):
+        '''Run the given independent shell commands concurrently; return their ProcResults in order'''
+
+        if self.max_jobs == 1 or len(cmds) <= 1:
+            return [self.run(cmd, phase) for cmd in cmds]
+
+        # each worker owns one slot (and thus one core of the affinity list)
+        slots = queue.Queue()
+        for slot in range(self.max_jobs):
+            slots.put(slot)
+
+        def work(cmd):
+            slot = slots.get()
+            try:
+                with self.__reserve(phase, slot):
+                    try:
+                        proc = self.start(cmd, phase, slot)
+                    except Exception as e:
+                        return ProcResult(cmd, phase, 127, errout='%s: %s' % (e.__class__.__name__, e))
+                    return self.finish(proc)
+            finally:
+                slots.put(slot)
+
+        with futures.ThreadPoolExecutor(max_workers=self.max_jobs) as pool:
+            return list(pool.map(work, cmds))
@@ -2,10 +2,31 @@
 # The basic code generator for performance-testing code
 #
 
-import random, re
+import os, random, re, array, hashlib, itertools, tempfile
 from . import skeleton_code 
 from orio.main.util.globals import *
-from orio.main.tuner.skeleton_code import SEQ_TIMER
+from orio.main.tuner.skeleton_code import SEQ_TIMER, SEQ_TIMERS, PERF_COUNTERS, PERF_EVENT_CODE
+from orio.main.tuner.runtime_params import SWEEP_ENV
+
+#-----------------------------------------------------
+
+def getLLCSize(default=32*1024*1024):
+    '''Return the size (in bytes) of the last-level cache of the first CPU, or the given default'''
+
+    size = 0
+    base = '/sys/devices/system/cpu/cpu0/cache'
+    units = {'K': 1024, 'M': 1024 * 1024, 'G': 1024 * 1024 * 1024}
+    for index in (os.listdir(base) if os.path.isdir(base) else []):
+        try:
+            with open(os.path.join(base, index, 'size')) as f:
+                text = f.read().strip().upper()
+            if text and text[-1] in units:
+                size = max(size, int(text[:-1]) * units[text[-1]])
+            elif text:
+                size = max(size, int(text))
+        except (OSError, ValueError):
+            continue
+    return size or default
 
 #-----------------------------------------------------
 
@@ -16,12 +37,22 @@ class PerfTestCodeGen(object):
     malloc_func_name = 'malloc_arrays'
     dalloc_func_name = 'dalloc_arrays'
     init_func_name   = 'init_input_vars'
+    map_func_name    = 'map_input_data'
     validation_func_name = 'isValid'
 
+    # element types of the arrays that can be stored in an input-data file (with their array-module codes)
+    data_types = {'double': 'd', 'float': 'f', 'int': 'i', 'long': 'l', 'short': 'h', 'char': 'b',
+                  'unsigned int': 'I', 'unsigned long': 'L', 'unsigned short': 'H', 'unsigned char': 'B'}
+
+    # every array of an input-data file starts at a multiple of this many bytes
+    data_alignment = 64
+
     #-----------------------------------------------------
 
     def __init__(self, input_params, input_decls, decl_file, init_file, skeleton_code_file, language='c',
-                 random_seed=None, use_parallel_search=False, validation_file=''):
+                 random_seed=None, use_parallel_search=False, validation_file='', input_data=None, data_dir=None,
+                 cache_mode=None, flush_size=None, perf_event=False, timer=None, timer_overhead=False,
+                 checksum=False, tolerance=1e-8, checksum_vars=None):
         '''To instantiate the testing code generator'''
         
         self.input_params = input_params
@@ -31,13 +62,64 @@ class PerfTestCodeGen(object):
         self.validation_file = validation_file
         self.skeleton_code_file = skeleton_code_file
         self.use_parallel_search = use_parallel_search
+        self.random_seed = random_seed
         self.power = False
 
+        # the cache state in which the tested code is timed ('warm', 'cold', 'first-touch' or None)
+        self.cache_mode = cache_mode
+        self.flush_size = flush_size
+        if cache_mode == 'cold' and not flush_size:
+            self.flush_size = 2 * getLLCSize()
+
+        # read the hardware counters (see skeleton_code.PERF_COUNTERS) around each timed repetition
+        self.perf_event = perf_event
+
+        # the timer backend (see skeleton_code.SEQ_TIMERS), and whether the overhead of a pair of timer
+        # calls, measured at startup, is subtracted from each timing
+        self.timer = timer or 'cpu'
+        self.timer_overhead = timer_overhead
+        if self.timer not in SEQ_TIMERS:
+            err('orio.main.tuner.ptest_codegen: unknown timer: "%s" (expected one of: %s)'
+                % (self.timer, ', '.join(sorted(SEQ_TIMERS))), doexit=True)
+
+        # the arrays whose values are mapped from a pre-generated input-data file (if requested)
+        self.data_file = None
+        self.data_code = ''
+        mapped_decls = []
+        if input_data and language == 'c' and not decl_file and not init_file:
+            mapped_decls = self.__genDataFile(input_params, input_decls, input_data, data_dir)
+            self.data_code = self.__genDataMap(mapped_decls)
+        elif input_data:
+            warn('orio.main.tuner.ptest_codegen: input data files are only supported for C code with generated ' +
+                 'declarations and initializations, ignoring input_data')
+        computed_decls = [d for d in input_decls if d not in mapped_decls]
+
+        # the results of the first repetition of each tested code are compared with those of the original
+        # code, saved by a reference run of the current problem size (see generate)
+        self.checksum = checksum
+        self.tolerance = tolerance
+        self.checksum_decls = []
+        self.reference_file = None
+        self.reference_done = False
+        if checksum and (language != 'c' or use_parallel_search):
+            warn('orio.main.tuner.ptest_codegen: checksum validation requires sequential C tests, ignoring checksum')
+            self.checksum = False
+        elif checksum:
+            self.checksum_decls = self.__checksumDecls(input_decls, checksum_vars)
+            self.checksum = self.checksum_decls != []
+            key = repr((input_params, self.checksum_decls, os.getpid(), id(self)))
+            self.reference_file = os.path.join(tempfile.gettempdir(), 'orio_reference_%s.bin'
+                                               % hashlib.sha1(key.encode('utf-8')).hexdigest())
+            if os.path.exists(self.reference_file):
+                os.unlink(self.reference_file)
+
         self.iparam_code = self.__genIParams(input_params)
         self.decl_code = self.__genDecls(input_decls)
-        self.malloc_code = self.__genMAllocs(input_decls)
-        self.dalloc_code = self.__genDAllocs(input_decls)
-        self.init_code = self.__genInits(input_decls)
+        self.malloc_code = self.__genMAllocs(computed_decls)
+        self.dalloc_code = self.__genDAllocs(computed_decls)
+        self.init_code = self.__genInits(computed_decls)
+        if self.data_code:
+            self.init_code = ('  %s();\n' % self.map_func_name) + self.init_code
 
         self.__checkDeclFile()
         self.__checkInitFile()
@@ -222,6 +304,298 @@ class PerfTestCodeGen(object):
     
     #-----------------------------------------------------
 
+    def __dataLayout(self, input_params, input_decls):
+        '''
+        Return the layout of the input-data file of the current problem size as a list of
+        (declaration, type code, dimensions, byte offset) tuples. The arrays are stored in declaration
+        order, each starting at a multiple of data_alignment bytes. Only arrays with a supported element
+        type, initialized to "random" or to a number, with at most two dimensions if dynamic, are stored.
+        '''
+
+        # the values of the input parameters, for evaluating the array dimensions
+        env = {}
+        for pname, rhs in input_params:
+            try:
+                env[pname] = eval(str(rhs), {}, dict(env))
+            except Exception:
+                env[pname] = rhs
+
+        layout = []
+        offset = 0
+        for decl in input_decls:
+            is_static, is_managed, vtype, vname, vdims, rhs = decl
+            if vtype not in self.data_types or len(vdims) == 0 or is_managed or rhs is None:
+                continue
+            if rhs != 'random':
+                try:
+                    float(rhs)
+                except ValueError:
+                    continue
+            if not is_static and len(vdims) > 2:
+                continue
+            try:
+                dims = [int(eval(str(d), {}, dict(env))) for d in vdims]
+            except Exception:
+                continue
+            count = 1
+            for d in dims:
+                count *= d
+            offset = (offset + self.data_alignment - 1) // self.data_alignment * self.data_alignment
+            layout.append((decl, self.data_types[vtype], dims, offset))
+            offset += count * array.array(self.data_types[vtype]).itemsize
+        return layout, offset, env
+
+    def __genDataFile(self, input_params, input_decls, input_data, data_dir):
+        '''
+        Generate (or locate) the binary input-data file of the current problem size, and return the
+        declarations of the arrays it contains
+        @param input_data: 'pattern' (the values of the generated initialization loops), 'random'
+                           (pseudo-random values from the random seed) or the name of a user-provided
+                           file (which may refer to input parameters, e.g., "data_%(N)s.bin")
+        @param data_dir: the directory of the generated files
+        '''
+
+        layout, total_size, env = self.__dataLayout(input_params, input_decls)
+        if not layout:
+            return []
+        mapped_decls = [decl for decl, _, _, _ in layout]
+
+        if input_data not in ('pattern', 'random'):
+            # a user-provided file
+            try:
+                fname = input_data % env
+            except Exception as e:
+                err('orio.main.tuner.ptest_codegen: invalid input data file name "%s"\n --> %s: %s'
+                    % (input_data, e.__class__.__name__, e), doexit=True)
+            if not os.path.exists(fname) or os.path.getsize(fname) < total_size:
+                err(('orio.main.tuner.ptest_codegen: the input data file "%s" must exist and contain at least %d bytes ' +
+                     '(arrays %s)') % (fname, total_size, ', '.join([d[3] for d in mapped_decls])), doexit=True)
+            self.data_file = os.path.abspath(fname)
+            return mapped_decls
+
+        # generated files are named by their content, so they are reused by later runs
+        key = repr((input_data, self.random_seed, [(d, dims, o) for d, _, dims, o in layout]))
+        data_dir = os.path.abspath(data_dir or os.path.join(tempfile.gettempdir(), 'orio_data'))
+        fname = os.path.join(data_dir, 'orio_input_%s.bin' % hashlib.sha1(key.encode('utf-8')).hexdigest())
+        self.data_file = fname
+        if os.path.exists(fname) and os.path.getsize(fname) == total_size:
+            info('reusing input data file %s' % fname)
+            return mapped_decls
+
+        info('generating input data file %s (%d bytes)' % (fname, total_size))
+        rand = random.Random(self.random_seed)
+        try:
+            if not os.path.exists(data_dir):
+                os.makedirs(data_dir)
+            tmp_name = '%s.%d.tmp' % (fname, os.getpid())
+            f = open(tmp_name, 'wb')
+            for (_, _, _, _, _, rhs), typecode, dims, offset in layout:
+                f.write(b'\0' * (offset - f.tell()))
+                count = 1
+                for d in dims:
+                    count *= d
+                if rhs != 'random':
+                    value = float(rhs) if typecode in 'fd' else int(float(rhs))
+                    values = array.array(typecode, [value]) * count
+                elif input_data == 'random' and typecode in 'fd':
+                    values = array.array(typecode, [rand.uniform(1, 10) for _ in range(count)])
+                elif input_data == 'random':
+                    values = array.array(typecode, [rand.randint(1, 10) for _ in range(count)])
+                else:
+                    # the same values as the generated initialization loops: (i1+i2+...) % 5 + 1
+                    values = array.array(typecode, [sum(idx) % 5 + 1
+                                                    for idx in itertools.product(*[range(d) for d in dims])])
+                values.tofile(f)
+            f.close()
+            os.rename(tmp_name, fname)
+        except Exception as e:
+            err('orio.main.tuner.ptest_codegen: failed to write the input data file "%s"\n --> %s: %s'
+                % (fname, e.__class__.__name__, e), doexit=True)
+
+        return mapped_decls
+
+    #-----------------------------------------------------
+
+    def __genDataMap(self, mapped_decls):
+        '''
+        Generate the function mapping the input-data file into memory (privately, so that the tested
+        code may write into its inputs without modifying the file) and pointing the arrays into it
+        '''
+
+        if not mapped_decls:
+            return ''
+
+        layout, _, _ = self.__dataLayout(self.input_params, mapped_decls)
+        assigns = []
+        for (is_static, _, vtype, vname, vdims, _), _, _, offset in layout:
+            if is_static:
+                assigns.append('memcpy(%s, orio_data + %d, sizeof(%s));' % (vname, offset, vname))
+            elif len(vdims) == 1:
+                assigns.append('%s = (%s *) (orio_data + %d);' % (vname, vtype, offset))
+            else:
+                assigns.append('if (!%s) %s = (%s **) malloc((%s) * sizeof(%s *));'
+                               % (vname, vname, vtype, vdims[0], vtype))
+                assigns.append('for (orio_r=0; orio_r<%s; orio_r++) %s[orio_r] = (%s *) (orio_data + %d) + orio_r * (%s);'
+                               % (vdims[0], vname, vtype, offset, vdims[1]))
+
+        code = '''
+#include <string.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+void %(func)s() {
+  int orio_fd, orio_r, orio_flags = MAP_PRIVATE;
+  struct stat orio_st;
+  static char *orio_data = NULL;
+  static size_t orio_data_size = 0;
+#if defined(MAP_POPULATE) && %(populate)d
+  orio_flags |= MAP_POPULATE;
+#endif
+  if (orio_data) munmap(orio_data, orio_data_size);   /* remapped before each repetition in first-touch mode */
+  orio_fd = open("%(fname)s", O_RDONLY);
+  if (orio_fd < 0 || fstat(orio_fd, &orio_st) != 0) {
+    perror("cannot open the input data file %(fname)s");
+    exit(1);
+  }
+  orio_data = (char *) mmap(NULL, orio_st.st_size, PROT_READ | PROT_WRITE, orio_flags, orio_fd, 0);
+  if (orio_data == MAP_FAILED) {
+    perror("cannot map the input data file %(fname)s");
+    exit(1);
+  }
+  orio_data_size = orio_st.st_size;
+  close(orio_fd);
+  %(assigns)s
+}
+''' % {'func': self.map_func_name, 'fname': self.data_file, 'assigns': '\n  '.join(assigns),
+       'populate': self.cache_mode != 'first-touch'}
+        return code
+
+    #-----------------------------------------------------
+
+    def __genCacheControl(self):
+        '''
+        Generate the code putting the caches in the requested state before each timed repetition:
+        cold mode traverses a buffer larger than the last-level cache, first-touch mode re-initializes
+        the input variables (remapping the input-data file, if any, so that its pages fault in again).
+        Return the global code and the code to be run before each repetition.
+        '''
+
+        global_code = '/* cache mode: %s */\n' % (self.cache_mode or 'back-to-back')
+        if self.cache_mode == 'cold':
+            global_code += '''
+#ifndef ORIO_FLUSH_SIZE
+#define ORIO_FLUSH_SIZE %dL
+#endif
+static volatile char *orio_flush_buf = NULL;
+void orio_flush_cache() {
+  long orio_k;
+  if (!orio_flush_buf) orio_flush_buf = (volatile char *) calloc(ORIO_FLUSH_SIZE, 1);
+  for (orio_k=0; orio_k<ORIO_FLUSH_SIZE; orio_k+=64) orio_flush_buf[orio_k]++;
+}
+''' % self.flush_size
+            return global_code, 'orio_flush_cache();\n    '
+        if self.cache_mode == 'first-touch':
+            return global_code, '%s();\n    ' % self.init_func_name
+        return global_code, ''
+
+    #-----------------------------------------------------
+
+    def __checksumDecls(self, input_decls, checksum_vars):
+        '''Return the declarations of the numeric variables checked by the checksum validation'''
+
+        decls = [d for d in input_decls if d[2] in self.data_types]
+        if checksum_vars is None:
+            return decls
+        names = [d[3] for d in decls]
+        unknown = [n for n in checksum_vars if n not in names]
+        if unknown:
+            warn('orio.main.tuner.ptest_codegen: cannot check the results of %s: not numeric input variables'
+                 % ', '.join(unknown))
+        return [d for d in decls if d[3] in checksum_vars]
+
+    def __genChecksum(self):
+        '''
+        Generate the function validating the results of the tested code: the reference run saves the
+        values of the checked variables (as doubles) into the reference file, and the other runs set
+        orio_error to the largest normwise relative error sqrt(sum((x-x_ref)^2) / sum(x_ref^2)) of the
+        checked variables (-1 if there is no reference file)
+        '''
+
+        max_dim = max([len(d[4]) for d in self.checksum_decls])
+        iter_vars = ['i%s' % x for x in range(1, max_dim + 1)]
+        checks = []
+        for _, _, vtype, vname, vdims, _ in self.checksum_decls:
+            loop_code = ''
+            for i, (ivar, dim) in enumerate(zip(iter_vars, vdims)):
+                loop_code += '  ' + (' ' * i) + 'for (%s=0; %s<%s; %s++)\n' % (ivar, ivar, dim, ivar)
+            dim_code = ''
+            if vdims:
+                dim_code = '[%s]' % ']['.join(iter_vars[:len(vdims)])
+            checks.append('''  /* %(name)s */
+  orio_d = orio_s = 0;
+%(loop)s  %(indent)s{
+    orio_v = (double) %(name)s%(dims)s;
+    if (orio_save) fwrite(&orio_v, sizeof(double), 1, orio_f);
+    else {
+      if (fread(&orio_r, sizeof(double), 1, orio_f) != 1) orio_r = 0;
+      orio_d += (orio_v - orio_r) * (orio_v - orio_r);
+      orio_s += orio_r * orio_r;
+    }
+  }
+  orio_e = orio_s > 0 ? sqrt(orio_d / orio_s) : sqrt(orio_d);
+  if (!(orio_e <= orio_error)) orio_error = orio_e;
+''' % {'name': vname, 'dims': dim_code, 'loop': loop_code, 'indent': ' ' * len(vdims)})
+
+        return '''
+/* checksum validation of %(names)s */
+double orio_error = -1;
+void orio_check_results(int orio_save) {
+  FILE *orio_f = fopen("%(fname)s", orio_save ? "wb" : "rb");
+  double orio_v, orio_r = 0, orio_d, orio_s, orio_e;
+  int %(ivars)s;
+  if (!orio_f) return;
+  orio_error = 0;
+%(checks)s  fclose(orio_f);
+  if (orio_save) orio_error = -1;
+  else if (!(orio_error < 1e308)) orio_error = 1e308;  /* NaN or infinite results */
+}
+''' % {'names': ', '.join([d[3] for d in self.checksum_decls]), 'fname': self.reference_file,
+       'ivars': ', '.join(iter_vars), 'checks': ''.join(checks)}
+
+    #-----------------------------------------------------
+
+    def __genSweepReader(self, runtime_vars):
+        '''
+        Generate the declarations of the run-time parameters of a runtime-parametric test, and the
+        function reading their values from the environment (settings separated by semicolons,
+        values by commas)
+        '''
+
+        return '''
+int %(vars)s;
+int orio_rt, orio_rt_count = 0;
+int *orio_rt_values = NULL;
+void orio_rt_read() {
+  char *orio_s = getenv("%(env)s");
+  int orio_k, orio_n = 1;
+  if (!orio_s) {
+    fprintf(stderr, "the values of the run-time parameters (%(env)s) are not set\\\\n");
+    exit(1);
+  }
+  for (orio_k=0; orio_s[orio_k]; orio_k++)
+    if (orio_s[orio_k] == ';') orio_n++;
+  orio_rt_values = (int *) malloc(orio_n * %(num)d * sizeof(int));
+  for (orio_k=0; orio_k<orio_n*%(num)d; orio_k++) {
+    while (*orio_s == ',' || *orio_s == ';') orio_s++;
+    orio_rt_values[orio_k] = (int) strtol(orio_s, &orio_s, 10);
+  }
+  orio_rt_count = orio_n;
+}
+''' % {'vars': ', '.join(runtime_vars), 'env': SWEEP_ENV, 'num': len(runtime_vars)}
+
+    #-----------------------------------------------------
+
     def __checkDeclFile(self):
         '''To check the declaration file'''
 
@@ -305,12 +679,17 @@ class PerfTestCodeGen(object):
 
     #-----------------------------------------------------
 
-    def generate(self, code_map):
+    def generate(self, code_map, runtime_vars=None, reference=False):
         '''
         Generate the testing code, which is evaluated to get the performance cost.
 
         @return: The test C code string        
         @param code_map: A dictionary index by search space coordinates and containing code to be evaluated. 
+        @param runtime_vars: For a runtime-parametric code, the C variables of its run-time parameters. 
+                             The test then runs the code once for each setting of their values passed
+                             in the environment, and reports the i-th setting as coordinate '#i'.
+        @param reference: With checksum validation, whether the test saves the reference results (instead
+                          of reporting the error of its results after the first repetition)
         '''
 
         # generate the macro definition codes for the input parameters
@@ -325,11 +704,14 @@ class PerfTestCodeGen(object):
             #decl_code = self.decl_code + '\n'
             global_code += self.decl_code + '\n'
             global_code += 'void %s() {\n%s\n}\n' % (self.malloc_func_name, self.malloc_code)
+            global_code += self.data_code
             #decl_code += 'void %s() {\n%s}\n'   % (self.dalloc_func_name, self.dalloc_code)
 
         # Declaration for default timing
         decl_code = ''
         decl_code += 'double orio_t_start, orio_t_end, orio_t = (double)LONG_MAX;\n'
+        if self.timer_overhead:
+            decl_code += 'double orio_t_overhead = 0;\n'
         if self.power:
             decl_code += '''
 #include "rnet_pm_api.h"
@@ -346,15 +728,44 @@ const char *__wattprof_conf_file = "1_conf.rnp";
             init_code = 'void %s() {\n%s\n}\n' % (self.init_func_name, self.init_code)
 
         if Globals().language != 'cuda':
+            cache_code, begin_rep_code = self.__genCacheControl()
+            init_code = cache_code + init_code
             init_code += 'int main (int argc, char *argv[]) {\n'
 
-            # Default timing code
-            begin_inner_measure_code = 'orio_t_start = getClock();'
+            # Default timing code (in warm mode, the first of the ORIO_REPS+1 repetitions is not reported)
+            begin_inner_measure_code = begin_rep_code + 'orio_t_start = getClock();'
             end_inner_measure_code = '''
     orio_t_end = getClock();
     orio_t = orio_t_end - orio_t_start;
-    printf("{'/*@ coordinate @*/' : %g}\\\\n", orio_t);
+    %sprintf("{%s : %s}\\\\n", %sorio_t%s);
     '''
+            if self.timer_overhead:
+                # (a timing below the overhead is kept positive, as the searches discard non-positive costs)
+                end_inner_measure_code = end_inner_measure_code.replace(
+                    'orio_t = orio_t_end - orio_t_start;',
+                    'orio_t = orio_t_end - orio_t_start - orio_t_overhead;\n    if (orio_t <= 0) orio_t = 1.0e-12;')
+            value_format, counter_args = '%g', ''
+            if self.perf_event:
+                # the result is a dictionary of the time and the counters (-1 for an unavailable counter)
+                init_code = '/* hardware counters: perf_event */' + PERF_EVENT_CODE + init_code
+                begin_inner_measure_code = begin_rep_code + 'orio_perf_start();\n    orio_t_start = getClock();'
+                end_inner_measure_code = end_inner_measure_code.replace('orio_t_end = getClock();',
+                                                                        'orio_t_end = getClock();\n    orio_perf_stop();')
+                value_format = '{%s}' % ', '.join(["'time': %g"] + ["'%s': %%lld" % c for c in PERF_COUNTERS])
+                counter_args = ''.join([', orio_perf_values[%d]' % k for k in range(len(PERF_COUNTERS))])
+            if self.checksum and not runtime_vars:
+                # the error of the results is reported with the time (the repetitions of the settings of
+                # run-time parameters do not start from the initial values, so these are not checked)
+                init_code = self.__genChecksum() + init_code
+                end_inner_measure_code = end_inner_measure_code.replace(
+                    '\n    %sprintf', '\n    if (orio_i == 0) orio_check_results(%d);\n    %%sprintf' % int(reference))
+                if not reference:
+                    value_format = '{' + (value_format[1:-1] if self.perf_event else "'time': %g") + ", 'error': %g}"
+                    counter_args += ', orio_error'
+            end_inner_measure_code = end_inner_measure_code % ('if (orio_i > 0) ' if self.cache_mode == 'warm' else '',
+                                                               "'#%d'" if runtime_vars else "'/*@ coordinate @*/'",
+                                                               value_format, 'orio_rt, ' if runtime_vars else '',
+                                                               counter_args)
         else:
             begin_inner_measure_code = ''
             end_inner_measure_code = ''
@@ -396,6 +807,16 @@ const char *__wattprof_conf_file = "1_conf.rnp";
          return 1;
       }''' % (self.validation_func_name, self.validation_func_name)
         
+        # the loop over the settings of the run-time parameters (if any)
+        if runtime_vars:
+            init_code = self.__genSweepReader(runtime_vars) + init_code
+            assigns = ''
+            for i, var in enumerate(runtime_vars):
+                assigns += '    %s = orio_rt_values[orio_rt*%d+%d];\n' % (var, len(runtime_vars), i)
+            begin_outer_measure_code = ('for (orio_rt=0; orio_rt<orio_rt_count; orio_rt++) {\n%s  ' % assigns
+                                        + begin_outer_measure_code)
+            end_outer_measure_code += '\n  }'
+
         # create code for the global definition section
 
         global_code += init_code + '\n'
@@ -407,6 +828,25 @@ const char *__wattprof_conf_file = "1_conf.rnp";
         if not self.decl_file:
             prologue_code += ('%s();' % self.malloc_func_name) + '\n  '
         prologue_code += ('%s();' % self.init_func_name) + '\n'
+        if self.perf_event and Globals().language != 'cuda':
+            prologue_code += '  orio_perf_open();\n'
+        if self.timer_overhead and Globals().language != 'cuda':
+            prologue_code += '''  {
+    /* the overhead of a pair of timer calls (which also calibrates the timer) */
+    int orio_k;
+    double orio_t0, orio_t1;
+    orio_t_overhead = (double)LONG_MAX;
+    for (orio_k=0; orio_k<100; orio_k++) {
+      orio_t0 = getClock();
+      orio_t1 = getClock();
+      if (orio_t1 - orio_t0 < orio_t_overhead) orio_t_overhead = orio_t1 - orio_t0;
+    }
+  }
+'''
+        elif self.timer == 'tsc':
+            prologue_code += '  getClock();  /* calibrate the timer */\n'
+        if runtime_vars:
+            prologue_code += '  orio_rt_read();\n'
         if Globals().language == 'opencl':
             for (k, v) in Globals().metadata.items():
                 prologue_code += 'TAU_METADATA("%s", "%s");\n' % (k, v)
@@ -440,7 +880,7 @@ const char *__wattprof_conf_file = "1_conf.rnp";
     
     def getTimerCode(self, use_parallel_search = False):
         if not use_parallel_search:
-            return SEQ_TIMER
+            return SEQ_TIMERS[self.timer]
         else: 
             return ''     
         
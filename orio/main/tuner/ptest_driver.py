@@ -2,10 +2,14 @@
 # To compile and execute the performance-testing code to get the performance cost
 #
 
-import os, time, re, datetime, uuid
+import os, time, re, datetime, uuid, shutil
 
 from orio.main.util.globals import *
-import subprocess as sp
+from orio.main.tuner.build_cache import BuildCache, getIncludedCode
+from orio.main.tuner.proc_runner import ProcRunner
+from orio.main.tuner.batch_queue import BatchJob, BatchQueue, getScheduler
+from orio.main.tuner.runtime_params import SWEEP_ENV
+from orio.main.tuner.skeleton_code import PERF_COUNTERS
 
 # -----------------------------------------------------
 
@@ -24,6 +28,7 @@ class PerfTestDriver:
     # types of performance-counting methods
     __PCOUNT_BASIC = 'basic timer'  # in microseconds (not accurate, large overhead)
     __PCOUNT_BGP = 'bgp counter'  # in clock cycles (accurate, low overhead)
+    __PCOUNT_PERF_EVENT = 'perf_event'  # timer plus Linux hardware counters (see skeleton_code.PERF_COUNTERS)
     __POWER_WATTPROF = 'wattprof'
 
     # -----------------------------------------------------
@@ -44,6 +49,9 @@ class PerfTestDriver:
         self.language = language
 
         self.__PTEST_FNAME = Globals().out_prefix + self.__PTEST_FNAME
+        # (the processes tuning concurrently have their own test and timer files, see orio.main.tuning_pool)
+        if Globals().worker_tag:
+            self.__PTEST_FNAME += '_%s_' % Globals().worker_tag
 
         if language == 'c' or language == 'opencl':
             self.ext = '.c'
@@ -62,21 +70,51 @@ class PerfTestDriver:
             self.original_obj_name = self.__PTEST_FNAME + '_original.o'
 
         if not self.tinfo.timer_file:
+            timer = getattr(self.tinfo, 'timer', None) or 'cpu'
             if self.language == 'c':
-                self.timer_file = 'timer_cpu.c'
+                # (each timer backend has its own file, as the compiled timer is reused by later runs)
+                self.timer_file = 'timer_cpu.c' if timer == 'cpu' else 'timer_%s.c' % timer
             elif self.language == 'fortran':
                 self.timer_file = 'timer_cpu.F90'
             else:
                 self.timer_file = None
         else:
             self.timer_file = self.tinfo.timer_file
+        if Globals().worker_tag and self.timer_file and not self.tinfo.timer_file:
+            base, ext = os.path.splitext(self.timer_file)
+            self.timer_file = '%s_%s%s' % (base, Globals().worker_tag, ext)
 
         self.timer_code = timing_code
         if language == 'fortran':  self.timer_code = ''  # timer routine is embedded in F90 driver
+        if (getattr(self.tinfo, 'timer', None) or 'cpu') != 'cpu' and (language != 'c' or use_parallel_search):
+            warn('orio.main.tuner.ptest_driver: the timer argument only applies to sequential C tests, ignoring it')
 
-        if self.tinfo.pcount_method not in (self.__PCOUNT_BASIC, self.__PCOUNT_BGP):
+        if self.tinfo.pcount_method not in (self.__PCOUNT_BASIC, self.__PCOUNT_BGP, self.__PCOUNT_PERF_EVENT):
             err('orio.main.tuner.ptest_driver:  unknown performance-counting method: "%s"' % self.tinfo.pcount_method)
 
+        # the measured quantity used as the performance cost, and the hardware counters of each coordinate
+        # (a dictionary of the counter values of its repetitions, indexed by counter name)
+        self.objective = getattr(self.tinfo, 'pcount_objective', None) or 'time'
+        self.counters = {}
+        self.__counter_warned = False
+        if self.tinfo.pcount_method == self.__PCOUNT_PERF_EVENT:
+            if language != 'c' or use_parallel_search:
+                err('orio.main.tuner.ptest_driver:  the perf_event counting method requires sequential C tests',
+                    doexit=True)
+            for name in (self.objective, getattr(self.tinfo, 'pcount_tie_break', None)):
+                if name not in ('time', None) + PERF_COUNTERS:
+                    err('orio.main.tuner.ptest_driver:  unknown hardware counter: "%s" (expected one of: %s)'
+                        % (name, ', '.join(PERF_COUNTERS)), doexit=True)
+        elif self.objective != 'time' or getattr(self.tinfo, 'pcount_tie_break', None):
+            err('orio.main.tuner.ptest_driver:  hardware counter objectives and tie-breakers require the perf_event ' +
+                'counting method', doexit=True)
+
+        # the largest relative error of the results checked by a test (with checksum validation)
+        self.tolerance = getattr(self.tinfo, 'tolerance', None)
+        if self.tolerance is None:
+            self.tolerance = 1e-8
+        self.__reference_warned = False
+
         if self.tinfo.power_method not in (self.__POWER_WATTPROF, "none"):
             err('orio.main.tuner.ptest_driver:  unknown power measurement method: "%s"' % self.tinfo.pcount_method)
 
@@ -84,9 +122,36 @@ class PerfTestDriver:
         self.extra_compiler_opts = ''
         if self.tinfo.pcount_method == self.__PCOUNT_BGP:
             self.extra_compiler_opts += ' -DBGP_COUNTER'
-        self.extra_compiler_opts += ' -DORIO_REPS=%s' % self.tinfo.pcount_reps
+        if self.tinfo.cache_mode == 'warm':
+            # one more repetition, whose (cold) timing is discarded by the test code
+            self.extra_compiler_opts += ' -DORIO_REPS=%s' % (self.tinfo.pcount_reps + 1)
+        else:
+            self.extra_compiler_opts += ' -DORIO_REPS=%s' % self.tinfo.pcount_reps
         # self.extra_compiler_opts += ' -DORIO_TIMES_ARRAY_SIZE=%s' % self.tinfo.timing_array_size
 
+        # the libraries linked into the tests (the checksum validation code uses sqrt)
+        self.libs = getattr(self.tinfo, 'libs', '')
+        if language == 'c' and not use_parallel_search and (getattr(self.tinfo, 'checksum', False) or
+                                                            Globals().validationMode):
+            self.libs += ' -lm'
+
+        # cache of compiled executables (optional)
+        self.build_cache = None
+        if self.tinfo.cache_dir:
+            self.build_cache = BuildCache(self.tinfo.cache_dir, self.tinfo.cache_size)
+
+        # the managed execution of all build, test and auxiliary commands
+        self.runner = ProcRunner(timeouts={'build': self.tinfo.build_timeout, 'run': self.tinfo.run_timeout},
+                                 cpu_limit=self.tinfo.cpu_limit, mem_limit=self.tinfo.mem_limit,
+                                 cpu_affinity=self.tinfo.cpu_affinity, max_jobs=self.tinfo.build_jobs)
+
+        # the batch-queue backend submitting each variant as a separate job (optional)
+        self.batch_queue = None
+        if self.tinfo.batch_system:
+            scheduler = getScheduler(self.tinfo.batch_system, self.runner, self.tinfo.batch_options,
+                                     self.tinfo.num_procs)
+            self.batch_queue = BatchQueue(scheduler)
+
         # for efficiency
         self.first = True
 
@@ -187,10 +252,10 @@ class PerfTestDriver:
 
             cmd = ('%s %s -o %s %s' % (self.tinfo.pre_build_cmd, self.extra_compiler_opts,
                                        self.src_name2, self.src_name))
-            # TODO: log all commands
-            status = os.system(cmd)
-            if status:
-                err('orio.main.tuner.ptest_driver:  failed to apply the pre-build command: "%s"' % cmd)
+            res = self.runner.run(cmd, 'build')
+            if res.failed():
+                err('orio.main.tuner.ptest_driver:  failed to apply the pre-build command: "%s" (%s)'
+                    % (cmd, res.describe()))
 
         else:
             self.src_name2 = self.src_name
@@ -210,28 +275,21 @@ class PerfTestDriver:
         if self.use_parallel_search: timer_objfile = ''
 
         # build_cmd
-        cflags_tag = '@CFLAGS'
-        build_cmd = self.tinfo.build_cmd
-        if perf_params is not None:
-            match_obj = re.search(cflags_tag, build_cmd)
-            if match_obj:
-                build_cmd = re.sub(cflags_tag, perf_params.get('CFLAGS', ''), build_cmd)
-            while True:
-                match_obj = None
-                match_obj = re.search('@(?P<alphanum>\w*)@', build_cmd)
-                if match_obj is None:
-                    break
-                else:
-                    param_val = match_obj.group('alphanum')
-                    build_cmd = re.sub(match_obj.group(), str(perf_params.get(param_val, '')), build_cmd)
+        build_cmd = self.__buildCmd(perf_params)
 
         if timer_objfile and not os.path.exists(timer_objfile):
             # TODO: Too crude, need to make sure object is newer than source
             cmd = ('%s -O0 -c -o %s %s' % (build_cmd, timer_objfile, self.timer_file))
             info(' compiling timer:\n\t' + cmd)
-            status = os.system(cmd)
-            if status or not os.path.exists(timer_objfile):
-                err('orio.main.tuner.ptest_driver:  failed to compile the timer code: "%s"' % cmd)
+            res = self.runner.run(cmd, 'build')
+            if res.failed() or not os.path.exists(timer_objfile):
+                err('orio.main.tuner.ptest_driver:  failed to compile the timer code: "%s" (%s)' % (cmd, res.describe()))
+
+        # the compiler flags of the tested variant (the timer is compiled without them)
+        build_cmd += self.__compilerFlags(perf_params)
+
+        # independent build commands that may run concurrently with the test build
+        side_cmds = []
 
         # compile the original code if needed
         if self.first:
@@ -239,69 +297,157 @@ class PerfTestDriver:
                 cmd = ('%s %s -DORIGINAL -o %s -c %s' % (
                 build_cmd, self.extra_compiler_opts, self.original_obj_name, self.src_name2))
                 info(' compiling the original code:\n\t' + cmd)
-                status = os.system(cmd)
-                if status:
-                    err('orio.main.tuner.ptest_driver: failed to compile the original version of cuda code: "%s"' % cmd)
+                res = self.runner.run(cmd, 'build')
+                if res.failed():
+                    err('orio.main.tuner.ptest_driver: failed to compile the original version of cuda code: "%s" (%s)'
+                        % (cmd, res.describe()))
                 cmd = ('%s %s -DORIGINAL -o %s %s' % (
                 build_cmd, self.extra_compiler_opts, self.original_exe_name, self.original_obj_name))
             else:
                 if timer_objfile and os.path.exists(timer_objfile):
                     cmd = ('%s %s -DORIGINAL -o %s %s %s %s' % (build_cmd, self.extra_compiler_opts,
                                                                 self.original_exe_name, self.src_name2,
-                                                                timer_objfile, self.tinfo.libs))
+                                                                timer_objfile, self.libs))
                 else:
                     cmd = ('%s %s -DORIGINAL -o %s %s %s' % (build_cmd, self.extra_compiler_opts,
                                                              self.original_exe_name, self.src_name2,
-                                                             self.tinfo.libs))
+                                                             self.libs))
 
             info(' building the original code:\n\t' + cmd)
-            status = os.system(cmd)
-            if status:
-                err('orio.main.tuner.ptest_driver:  failed to compile the original version of the code: "%s"' % cmd)
+            side_cmds.append(cmd)
 
         # compile the test code
         if self.language == 'cuda':
             cmd = ('%s %s -o %s -c %s' % (build_cmd, self.extra_compiler_opts, self.obj_name, self.src_name))
             info(' compiling test:\n\t' + cmd)
-            status = os.system(cmd)
-            if status:
-                err('orio.main.tuner.ptest_driver: failed to compile the test cuda code: "%s"' % cmd)
+            res = self.runner.run(cmd, 'build')
+            if res.failed():
+                err('orio.main.tuner.ptest_driver: failed to compile the test cuda code: "%s" (%s)'
+                    % (cmd, res.describe()))
             cmd = ('%s %s -o %s %s' % (build_cmd, self.extra_compiler_opts, self.exe_name, self.obj_name))
         elif self.language == 'opencl':
             cmd = ('%s %s -o %s %s %s' % (build_cmd, self.extra_compiler_opts,
                                           self.exe_name, self.src_name2,
-                                          self.tinfo.libs))
+                                          self.libs))
         else:
             cmd = ('%s %s -o %s %s %s %s' % (build_cmd, self.extra_compiler_opts,
                                              self.exe_name, self.src_name2,
-                                             timer_objfile, self.tinfo.libs))
-        info(' building test:\n\t' + cmd)
-
-        start = time.time()
-        # TODO: log all commands
-        status = os.system(cmd)
-        elapsed = time.time() - start
-        if coord is not None:
-            self.compile_time[coord] = elapsed
-
-        if status:
-            warn('orio.main.tuner.ptest_driver:  failed to compile the testing code: "%s", skipping test' % cmd)
+                                             timer_objfile, self.libs))
+        # look up an identical, previously built variant in the build cache
+        cache_key = None
+        if self.build_cache and self.language != 'cuda':
+            cache_key = self.__getCacheKey(build_cmd, timer_objfile)
+
+        if cache_key and self.build_cache.fetch(cache_key, self.exe_name):
+            info(' reusing cached build of test (key %s):\n\t%s' % (cache_key, cmd))
+            test_res = None
+            if coord is not None:
+                self.compile_time[coord] = 0.0
+        else:
+            info(' building test:\n\t' + cmd)
+            side_cmds.insert(0, cmd)
 
-        if self.tinfo.post_build_cmd:
+        # run the test build (unless cached) together with the original-code build
+        results = self.runner.runMany(side_cmds, 'build')
+        if self.first:
+            res = results.pop()
+            if res.failed():
+                err('orio.main.tuner.ptest_driver:  failed to compile the original version of the code: "%s" (%s)'
+                    % (res.cmd, res.describe()))
+        if results:
+            test_res = results[0]
+            if coord is not None:
+                self.compile_time[coord] = test_res.elapsed
+            if test_res.failed():
+                warn('orio.main.tuner.ptest_driver:  failed to compile the testing code: "%s" (%s), skipping test'
+                     % (cmd, test_res.describe()))
+            elif cache_key:
+                self.build_cache.store(cache_key, self.exe_name)
+            if test_res.out.strip():
+                debug(test_res.out, obj=self, level=6)
+        status = test_res.status if test_res else 0
+        if test_res and test_res.timed_out and not status:
+            status = 1
+
+        if self.tinfo.post_build_cmd and not status:
             # Run the postbuild command
             cmd = ('%s %s' % (self.tinfo.post_build_cmd, self.exe_name))
-            # TODO: log all commands
-            status = os.system(cmd)
-            if status:
-                err('orio.main.tuner.ptest_driver:  failed to apply the post-build command: "%s"' % cmd)
+            res = self.runner.run(cmd, 'build')
+            if res.failed():
+                err('orio.main.tuner.ptest_driver:  failed to apply the post-build command: "%s" (%s)'
+                    % (cmd, res.describe()))
         return status
 
     # -----------------------------------------------------
 
-    def __execute(self, perf_params, coord):
+    def __getCacheKey(self, build_cmd, timer_objfile):
+        '''Return the build-cache key of the current (preprocessed) test code'''
+
+        try:
+            f = open(self.src_name2)
+            src_code = f.read()
+            f.close()
+        except:
+            err('orio.main.tuner.ptest_driver: cannot open file for reading: %s' % self.src_name2)
+
+        # the timer routine is linked into every executable
+        timer_code = ''
+        if timer_objfile and self.timer_file and os.path.exists(self.timer_file):
+            f = open(self.timer_file)
+            timer_code = f.read()
+            f.close()
+
+        # and the local headers included by the test code (e.g., the declaration and initialization files)
+        src_code += getIncludedCode(src_code, os.path.dirname(os.path.abspath(self.src_name2)), build_cmd)
+
+        return self.build_cache.getKey(src_code, build_cmd, self.extra_compiler_opts, self.libs,
+                                       self.language + timer_code)
+
+    # -----------------------------------------------------
+
+    def __buildCmd(self, perf_params):
+        '''Return the build command with the values of the performance parameters it refers to'''
+
+        cflags_tag = '@CFLAGS'
+        build_cmd = self.tinfo.build_cmd
+        if perf_params is not None:
+            match_obj = re.search(cflags_tag, build_cmd)
+            if match_obj:
+                build_cmd = re.sub(cflags_tag, perf_params.get('CFLAGS', ''), build_cmd)
+            while True:
+                match_obj = None
+                match_obj = re.search('@(?P<alphanum>\w*)@', build_cmd)
+                if match_obj is None:
+                    break
+                else:
+                    param_val = match_obj.group('alphanum')
+                    build_cmd = re.sub(match_obj.group(), str(perf_params.get(param_val, '')), build_cmd)
+        return build_cmd
+
+    def __compilerFlags(self, perf_params):
+        '''Return the compiler flags given by the compiler-flag performance parameters (in declaration order)'''
+
+        flags = ''
+        for pname, _ in getattr(self.tinfo, 'cflag_params', None) or []:
+            pval = (perf_params or {}).get(pname)
+            if pval:
+                flags += ' ' + str(pval)
+        return flags
+
+    def __cmdlineArgs(self, perf_params):
+        '''Return the command-line arguments of the test, given by the command-line performance parameters'''
+
+        cmdlineargs = ' '
+        for pname, pval in list((perf_params or {}).items()):
+            if pname.startswith('__cmdline_'):
+                cmdlineargs += pname.replace('__cmdline_', '').strip('"') + ' ' + str(pval) + ' '
+        return cmdlineargs
+
+    def __execute(self, perf_params, coord, sweep=None):
         '''Execute the test to get the performance costs. 
         @param perf_params: a dictionary of current parameter name-value pairs
                             corresponding to a single coordinate in the search space.
+        @param sweep: for a runtime-parametric test, the list of (coordinate, run-time values) it runs
         '''
         global last_counter
 
@@ -318,10 +464,7 @@ class PerfTestDriver:
         output = None
 
         # Extract command-line arguments if any
-        cmdlineargs = ' '
-        for pname, pval in list(perf_params.items()):
-            if pname.startswith('__cmdline_'):
-                cmdlineargs += pname.replace('__cmdline_', '').strip('"') + ' ' + str(pval) + ' '
+        cmdlineargs = self.__cmdlineArgs(perf_params)
 
         # execute the search process in parallel
         if self.use_parallel_search:
@@ -329,18 +472,14 @@ class PerfTestDriver:
             info(' running test:\n\t' + cmd)
             # TODO: redo this to take output file name
             try:
-                f = os.popen(cmd)
-                output = f.read()
-                f.close()
+                output = self.runner.run(cmd, 'batch').out
                 # TODO: very bad assumption that the last number out is the batch job name
                 jobid = output.strip().split('\n')[-1]
                 status_cmd = '%s %s | grep %s | wc -l' % (self.tinfo.status_cmd, jobid, jobid)
                 status = '1'
                 while status == '1':
                     time.sleep(3)
-                    f = os.popen(status_cmd)
-                    status = f.read().strip()
-                    f.close()
+                    status = self.runner.run(status_cmd, 'batch').out.strip()
                 # TODO: generate an output file, instead of reading the batch-generated file
                 outfile = '%s.output' % jobid
                 while not os.path.exists(outfile):
@@ -356,26 +495,33 @@ class PerfTestDriver:
         # execute the search sequentially
         else:
             cmd = '%s ./%s %s' % (Globals().pre_cmd, self.exe_name, cmdlineargs)
+            if sweep:
+                # the values of the run-time parameters of each tested coordinate, e.g., "32,64;64,64"
+                cmd = '%s="%s" %s' % (SWEEP_ENV, ';'.join([','.join(map(str, vals)) for _, vals in sweep]), cmd)
             info(' running test:\n\t' + cmd)
-            try:
-                # process = sp.Popen(cmd, 'w', shell=True, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-                # retCode = process.stdin.close()
-                # out = process.stdout.readlines()
-                f = os.popen(cmd)
-                out = f.readlines()
-                f.close()
-            except Exception as e:
-                self.failedruns += 1
-                err('orio.main.tuner.ptest_driver: failed to execute the test code: "%s"\n --> %s: %s' \
-                    % (cmd, e.__class__.__name__, e), doexit=False)
+            out = []
+            res = self.runner.run(cmd, 'run', scale=len(sweep) if sweep else 1)
+            if res.failed():
+                self.failedRuns += 1
+                err('orio.main.tuner.ptest_driver: failed to execute the test code: "%s" (%s)'
+                    % (cmd, res.describe()), doexit=False)
+            if res.timed_out:
+                # a hung or pathologically slow variant: its coordinate costs infinity
+                if sweep:
+                    return self.__sweepCosts(res.out.splitlines(True), sweep, hung=True)
+                if coord is not None:
+                    perf_costs[coord] = ([float('inf')], [float('inf')])
+                return perf_costs
+            out = res.out.splitlines(True)
 
             if self.tinfo.post_run_cmd:
                 # Run the post-run command from the build section of the tuning spec (not command-line option)
                 cmd = ('%s %s "%s"' % (self.tinfo.post_run_cmd, self.exe_name, coord))
                 info(' running postrun_command:\n\t' + cmd)
-                status = os.system(cmd)
-                if status:
-                    err('orio.main.tuner.ptest_driver:  failed to run the postrun_command: "%s"' % cmd)
+                res = self.runner.run(cmd, 'run')
+                if res.failed():
+                    err('orio.main.tuner.ptest_driver:  failed to run the postrun_command: "%s" (%s)'
+                        % (cmd, res.describe()))
 
             if Globals().post_cmd is not None:
                 try:
@@ -384,8 +530,7 @@ class PerfTestDriver:
                     cmd = cmd.replace("%unique", uniq)
                     cmd = cmd.replace("%iter", str(last_counter))
                     cmd = cmd.replace("%exe", self.exe_name)
-                    status = os.system(cmd)
-                    if status:
+                    if self.runner.run(cmd, 'post').failed():
                         err(
                             'orio.main.tuner.ptest_driver: failed to execute the post-command: "%s"' % Globals().post_cmd,
                             doexit=False)
@@ -395,34 +540,10 @@ class PerfTestDriver:
 
             # Parse the output to get the times (and in some cases, e.g., for GPU code, the data transfer times)
             try:
-                if out:
-                    # info('out:\n %s' % out)
-                    perf_costs = {}
-                    perf_costs_reps = []
-                    transfers = []
-                    for line in out:
-                        # info('the line:\n%s' % line)
-                        # Output lines have the form {'[coordinate]' : time} or {'[coordinate]' : (time, transfer_time)}
-                        # where [coordinate] is a list of indices, e.g., [2,4,1,0,0]
-                        if line.strip().startswith('{'):
-                            output = line.strip()
-                            rep = eval(str(output))
-                            key = list(rep.keys())[0]  # the coordinate, e.g., [2,4,1,0,0]
-                            if isinstance(rep[key], tuple):  # cases where we have (time, transfer_time) values
-                                perf_costs_reps.append(rep[key][0])
-                                transfers.append(rep[key][1])
-                            else:  # cases where we have just time values
-                                perf_costs_reps.append(rep[key])
-                                transfers.append(float('inf'))
-                            perf_costs[key] = (perf_costs_reps, transfers)
-                        else:
-                            # warn(errmsg="Error processing test result: %s" % line)
-                            parts = line.strip().split('@')
-                            rep = eval(str(parts[1]))
-                            key = list(rep.keys())[0]  # the coordinate, e.g., [2,4,1,0,0]
-                            perf_costs_reps.append(float('inf'))  # time
-                            transfers.append(float('inf'))  # transfer time
-                            perf_costs[key] = (perf_costs_reps, transfers)
+                if out and sweep:
+                    perf_costs = self.__sweepCosts(out, sweep)
+                elif out:
+                    perf_costs = self.__parseOutput(out)
                 # if output: perf_costs = eval(str(output))
                 self.successfulRuns += 1
             except Exception as e:
@@ -443,7 +564,7 @@ class PerfTestDriver:
         if Globals().validationMode and Globals().executedOriginal:
             cmd = 'diff ./newexec.out ./origexec.out'
             info(' running diff:\n\t' + cmd)
-            status = os.system(cmd)
+            status = self.runner.run(cmd, 'post').status
             if status:
                 infpair = (float('inf'), float('inf'))
                 for k in list(perf_costs.keys()): perf_costs[k] = infpair
@@ -455,8 +576,115 @@ class PerfTestDriver:
 
     # -----------------------------------------------------
 
-    def __cleanup(self):
-        '''Delete all the generated files'''
+    def __objectiveCost(self, values):
+        '''Return the cost of a repetition measured with hardware counters (given as a dictionary)'''
+
+        cost = values.get(self.objective, -1)
+        if cost >= 0:
+            return cost
+        # the counter cannot be read here (e.g., no PMU or a restrictive perf_event_paranoid setting)
+        if not self.__counter_warned:
+            warn('orio.main.tuner.ptest_driver: hardware counter "%s" is not available, using the time instead'
+                 % self.objective)
+            self.__counter_warned = True
+        return values['time']
+
+    def __validResults(self, key, error, reported=False):
+        '''
+        Return False if the error of the results checked by the given coordinate (with checksum validation)
+        exceeds the tolerance; a negative error means that there are no reference results
+        '''
+
+        if error < 0:
+            if getattr(self.tinfo, 'checksum', False) and not self.__reference_warned:
+                warn('orio.main.tuner.ptest_driver: no reference results, the results of the tests are not validated')
+                self.__reference_warned = True
+            return True
+        if error <= self.tolerance:
+            return True
+        if not reported:
+            err('orio.main.tuner.ptest_driver: results of %s differ from the reference (relative error %g > %g)'
+                % (key, error, self.tolerance), doexit=False)
+        return False
+
+    def __parseOutput(self, out, counters=None):
+        '''
+        Return the performance costs printed by a test run (given as the list of its output lines),
+        recording the hardware counters of each coordinate (if any) in the given dictionary (by default,
+        the counters of this driver)
+        '''
+
+        if counters is None:
+            counters = self.counters
+        invalid = set()
+
+        # Parse the output to get the times (and in some cases, e.g., for GPU code, the data transfer times)
+        perf_costs = {}
+        for line in out:
+            # info('the line:\n%s' % line)
+            # Output lines have the form {'[coordinate]' : time} or {'[coordinate]' : (time, transfer_time)}
+            # or, with hardware counters, {'[coordinate]' : {'time' : time, 'cycles' : cycles, ...}}
+            # or, with checksum validation, {'[coordinate]' : {'time' : time, 'error' : relative error}}
+            # where [coordinate] is a list of indices, e.g., [2,4,1,0,0]
+            if line.strip().startswith('{'):
+                output = line.strip()
+                rep = eval(str(output))
+                key = list(rep.keys())[0]  # the coordinate, e.g., [2,4,1,0,0]
+                perf_costs_reps, transfers = perf_costs.setdefault(key, ([], []))
+                if isinstance(rep[key], dict):  # cases where we have the time and hardware counter values
+                    perf_costs_reps.append(self.__objectiveCost(rep[key]))
+                    transfers.append(float('inf'))
+                    if not self.__validResults(key, rep[key].get('error', -1), key in invalid):
+                        invalid.add(key)
+                        perf_costs_reps[-1] = float('inf')
+                    for name in PERF_COUNTERS:
+                        if rep[key].get(name, -1) >= 0:
+                            counters.setdefault(key, {}).setdefault(name, []).append(rep[key][name])
+                elif isinstance(rep[key], tuple):  # cases where we have (time, transfer_time) values
+                    perf_costs_reps.append(rep[key][0])
+                    transfers.append(rep[key][1])
+                else:  # cases where we have just time values
+                    perf_costs_reps.append(rep[key])
+                    transfers.append(float('inf'))
+            else:
+                # warn(errmsg="Error processing test result: %s" % line)
+                parts = line.strip().split('@')
+                rep = eval(str(parts[1]))
+                key = list(rep.keys())[0]  # the coordinate, e.g., [2,4,1,0,0]
+                perf_costs_reps, transfers = perf_costs.setdefault(key, ([], []))
+                perf_costs_reps.append(float('inf'))  # time
+                transfers.append(float('inf'))  # transfer time
+        return perf_costs
+
+    def __sweepCosts(self, out, sweep, hung=False):
+        '''
+        Return the performance costs printed by a runtime-parametric test, which reports the i-th
+        coordinate of the sweep as '#i'. The coordinates that were not reported are left out, except
+        the one running when the test hung, which costs infinity.
+        '''
+
+        lines = []
+        for line in out:
+            # the last line of a killed test may be incomplete
+            if line.strip().startswith('{') and line.strip().endswith('}'):
+                lines.append(line)
+        perf_costs = {}
+        counters = {}
+        for key, costs in list(self.__parseOutput(lines, counters).items()):
+            perf_costs[sweep[int(key.lstrip('#'))][0]] = costs
+        for key, values in list(counters.items()):
+            self.counters[sweep[int(key.lstrip('#'))][0]] = values
+        if hung:
+            for coord, _ in sweep:
+                if coord not in perf_costs:
+                    perf_costs[coord] = ([float('inf')], [float('inf')])
+                    break
+        return perf_costs
+
+    # -----------------------------------------------------
+
+    def __cleanup(self, fnames=None):
+        '''Delete all the generated files (by default, the current test source and executable)'''
 
         if Globals().keep_temps:
             if self.first: self.first = False
@@ -471,7 +699,9 @@ class PerfTestDriver:
                     err('orio.main.tuner.ptest_driver: cannot delete file: %s' % fname)
             self.first = False
 
-        for fname in [self.exe_name, self.src_name]:
+        if fnames is None:
+            fnames = [self.exe_name, self.src_name]
+        for fname in fnames:
             try:
                 if fname and os.path.exists(fname):
                     os.unlink(fname)
@@ -480,11 +710,13 @@ class PerfTestDriver:
 
     # -----------------------------------------------------
 
-    def run(self, test_code, perf_params=None, coord=None):
+    def run(self, test_code, perf_params=None, coord=None, sweep=None):
         '''To compile and to execute the given testing code to get the performance cost
         @param test_code: the code for testing multiple coordinates in the search space
         @param perf_params: the performance parameters
         @param coord: current coordinate in the parameter space
+        @param sweep: for a runtime-parametric testing code, the list of (coordinate, values of the
+                      run-time parameters) pairs it tests in a single run
         @return: a dictionary of the times corresponding to each coordinate in the search space
         '''
         # write the testing code
@@ -498,10 +730,218 @@ class PerfTestDriver:
             return {}
 
         # execute the testing code to get performance costs
-        perf_costs = self.__execute(perf_params, coord=coord)
+        perf_costs = self.__execute(perf_params, coord=coord, sweep=sweep)
 
         # delete all generated and used files
         self.__cleanup()
 
         # return the performance costs
         return perf_costs
+
+    # -----------------------------------------------------
+
+    def runInterleaved(self, test_codes, rounds):
+        '''To build the given testing codes into separate executables and to execute them alternately
+        (round-robin, starting each round with the next code), so that any drift of the machine affects
+        all of them alike
+        @param test_codes: a list of (coordinate key, testing code, performance parameters) of sequential tests
+        @param rounds: the number of executions of each code
+        @return: a dictionary of the mean cost of each execution (inf if it failed) of each coordinate
+        '''
+
+        # build all codes first, so that no compilation runs between the measurements
+        exes = []
+        round_costs = {}
+        for coord, test_code, perf_params in test_codes:
+            round_costs[coord] = []
+            self.__write(test_code, perf_params=perf_params)
+            self.__preprocess()
+            if self.__build(perf_params=perf_params, coord=coord) or not os.path.exists(self.exe_name):
+                round_costs[coord] = [float('inf')] * rounds
+                self.__cleanup()
+                continue
+            # (every written test has its own file names)
+            exes.append((coord, self.exe_name, self.__cmdlineArgs(perf_params)))
+            self.__cleanup([self.src_name])
+
+        self.__runRounds(exes, rounds, round_costs)
+        self.__cleanup([exe_name for _, exe_name, _ in exes])
+        return round_costs
+
+    def __runRounds(self, exes, rounds, round_costs):
+        '''
+        To execute the given (coordinate key, executable, command-line arguments) tests alternately for
+        the given number of rounds, appending the mean cost of each execution to the round costs
+        '''
+
+        for r in range(rounds if exes else 0):
+            for coord, exe_name, cmdlineargs in exes[r % len(exes):] + exes[:r % len(exes)]:
+                cmd = '%s ./%s %s' % (Globals().pre_cmd, exe_name, cmdlineargs)
+                debug(' running interleaved test:\n\t' + cmd, obj=self)
+                cost = float('inf')
+                res = self.runner.run(cmd, 'run')
+                if not res.failed():
+                    try:
+                        costs = [float(c) for c in list(self.__parseOutput(res.out.splitlines(True)).values())[0][0]]
+                        cost = sum(costs) / len(costs)
+                    except Exception as e:
+                        err('orio.main.tuner.ptest_driver: failed to process the interleaved test result of %s\n --> %s: %s'
+                            % (coord, e.__class__.__name__, e), doexit=False)
+                round_costs[coord].append(cost)
+
+    # -----------------------------------------------------
+
+    def runPGO(self, test_codes, settings):
+        '''To build each of the given testing codes with profile feedback (an instrumented build, training
+        runs, and a build using the recorded profile), the builds of all the codes running concurrently,
+        and to execute the resulting executables alternately (see runInterleaved)
+        @param test_codes: a list of (coordinate key, testing code, performance parameters) of sequential C tests
+        @param settings: the profile-guided finalization settings (see orio.main.tuner.search.pgo)
+        @return: a dictionary of the mean cost of each execution (inf if it failed) of each coordinate
+        '''
+
+        if self.language != 'c' or self.use_parallel_search:
+            err('orio.main.tuner.ptest_driver: profile-guided builds require sequential C tests', doexit=True)
+        timer_objfile = ''
+        if self.timer_file:
+            timer_objfile = self.timer_file[:self.timer_file.rfind('.')] + '.o'
+            if not os.path.exists(timer_objfile):
+                err('orio.main.tuner.ptest_driver: the timer code is not compiled: %s' % timer_objfile, doexit=True)
+
+        # write the codes, each profiled into its own directory (the instrumented and the final builds of
+        # a code use the same source and executable names, to which the recorded profile refers)
+        variants = []
+        round_costs = {}
+        for coord, test_code, perf_params in test_codes:
+            round_costs[coord] = []
+            self.__write(test_code, perf_params=perf_params)
+            self.__preprocess()
+            src_name = self.src_name2
+            if src_name != self.src_name:
+                src_name = self.src_name[:-len(self.ext)] + '_preprocessed' + self.ext
+                os.rename(self.src_name2, src_name)
+            profile_dir = os.path.abspath(self.exe_name[:-len('.exe')] + '.pgo')
+            cmd = (self.__buildCmd(perf_params) + self.__compilerFlags(perf_params),
+                   '%s -o %s %s %s %s' % (self.extra_compiler_opts, self.exe_name, src_name, timer_objfile,
+                                          self.libs))
+            variants.append([coord, cmd, profile_dir, self.exe_name, self.__cmdlineArgs(perf_params),
+                             [self.src_name, src_name, self.exe_name]])
+
+        def build(flags):
+            '''Build the remaining variants with the given profile flags, dropping the failed ones'''
+            cmds = ['%s %s %s' % (cmd[0], flags % {'dir': d}, cmd[1]) for _, cmd, d, _, _, _ in variants]
+            for cmd in cmds:
+                info(' building profile-guided test:\n\t' + cmd)
+            for v, res in list(zip(variants, self.runner.runMany(cmds, 'build'))):
+                if res.failed():
+                    warn('orio.main.tuner.ptest_driver:  failed to compile the profile-guided test: "%s" (%s)'
+                         % (res.cmd, res.describe()))
+                    variants.remove(v)
+
+        def run(cmds, what):
+            '''Run the given commands of the remaining variants, dropping the failed ones'''
+            for v, res in list(zip(list(variants), self.runner.runMany(cmds, 'run'))):
+                if res.failed():
+                    warn('orio.main.tuner.ptest_driver:  failed to run the %s of %s: "%s" (%s)'
+                         % (what, v[0], res.cmd, res.describe()))
+                    if v in variants:
+                        variants.remove(v)
+
+        all_variants = list(variants)
+        build(settings['generate'])
+        for _ in range(settings['train']):
+            run(['%s ./%s %s' % (Globals().pre_cmd, exe, args) for _, _, _, exe, args, _ in variants],
+                'training run')
+        if settings['merge']:
+            run([settings['merge'] % {'dir': d} for _, _, d, _, _, _ in variants], 'profile merge')
+        build(settings['use'])
+
+        self.__runRounds([(coord, exe, args) for coord, _, _, exe, args, _ in variants], settings['rounds'],
+                         round_costs)
+        for coord in round_costs:
+            if not round_costs[coord]:
+                round_costs[coord] = [float('inf')] * settings['rounds']
+
+        if not Globals().keep_temps:
+            for _, _, profile_dir, _, _, fnames in all_variants:
+                self.__cleanup(fnames)
+                shutil.rmtree(profile_dir, ignore_errors=True)
+        return round_costs
+
+    # -----------------------------------------------------
+
+    def submit(self, test_code, perf_params=None, coord=None):
+        '''To compile the given testing code and submit its execution as a batch job (without waiting)
+        @param test_code: the code for testing a single coordinate in the search space
+        @param perf_params: the performance parameters
+        @param coord: the coordinate key of the tested variant
+        @return: False if the code could not be built or submitted
+        '''
+        if self.batch_queue is None:
+            err('orio.main.tuner.ptest_driver internal error: no batch system specified in the build section',
+                doexit=True)
+
+        self.__write(test_code, perf_params=perf_params)
+        self.__preprocess()
+        if self.__build(perf_params=perf_params, coord=coord):
+            self.__cleanup()
+            return False
+
+        # the job script runs the test in the current directory, with the command-line parameters
+        cmdlineargs = self.__cmdlineArgs(perf_params)
+        script_name = self.exe_name[:-len('.exe')] + '.sh'
+        out_name = self.exe_name[:-len('.exe')] + '.out'
+        try:
+            f = open(script_name, 'w')
+            f.write('#!/bin/sh\ncd %s\n%s ./%s %s\n' % (os.getcwd(), Globals().pre_cmd, self.exe_name, cmdlineargs))
+            f.close()
+        except:
+            err('orio.main.tuner.ptest_driver: cannot open file for writing: %s' % script_name)
+            return False
+
+        job = BatchJob(coord, self.exe_name, script_name, out_name,
+                       files=[self.exe_name, script_name, out_name, out_name + '.err'])
+        self.__cleanup([self.src_name])
+        if not self.batch_queue.submit(job):
+            self.__cleanup(job.files)
+            return False
+        return True
+
+    def harvest(self, wait=False):
+        '''To collect the results of the completed batch jobs
+        @param wait: if True, block until at least one submitted job completes
+        @return: a dictionary of the times of the harvested coordinates (inf for failed jobs)
+        '''
+        perf_costs = {}
+        for job in self.batch_queue.harvest(wait):
+            costs = {}
+            try:
+                f = open(job.out_name)
+                out = f.readlines()
+                f.close()
+                costs = self.__parseOutput(out)
+                self.successfulRuns += 1
+            except Exception as e:
+                self.failedRuns += 1
+                err('orio.main.tuner.ptest_driver: failed to process the result of job %s (coordinate %s)\n --> %s: %s'
+                    % (job.job_id, job.coord, e.__class__.__name__, e), doexit=False)
+            if not costs and job.coord is not None:
+                costs = {job.coord: ([float('inf')], [float('inf')])}
+            perf_costs.update(costs)
+            self.__cleanup(job.files)
+        return perf_costs
+
+    def cancelJobs(self):
+        '''To cancel the submitted batch jobs whose results have not been harvested'''
+        if self.batch_queue is None:
+            return
+        jobs = list(self.batch_queue.jobs.values()) + list(self.batch_queue.finished.values())
+        self.batch_queue.cancelAll()
+        for job in jobs:
+            self.__cleanup(job.files)
+
+    def pendingJobs(self):
+        '''Return the number of submitted batch jobs whose results have not been harvested'''
+        if self.batch_queue is None:
+            return 0
+        return len(self.batch_queue)
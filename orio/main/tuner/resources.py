@@ -0,0 +1,65 @@
+#
+# The build and test resources shared by concurrent tuning processes
+#
+
+import os, multiprocessing
+from contextlib import contextmanager
+
+#-----------------------------------------------------
+
+class ResourceManager:
+    '''
+    Coordinates the commands of the processes tuning several files or annotated regions
+    concurrently (see orio.main.tuning_pool): at most max_builds build commands run at any
+    time, and a test run holds the cores it runs on -- the cores of its affinity list, or all
+    cores when it is not pinned -- so that the timed runs never overlap on the same cores.
+
+    The locks are created before the tuning processes are forked, which inherit them; the
+    commands acquire them through ProcRunner.run and ProcRunner.runMany.
+    '''
+
+    def __init__(self, max_builds=None, cores=None):
+        '''
+        To instantiate a resource manager
+        @param max_builds: the maximum number of concurrent build commands (default: the number of cores)
+        @param cores: the cores the test runs may use (default: the cores available to Orio)
+        '''
+
+        if cores is None:
+            if hasattr(os, 'sched_getaffinity'):
+                cores = sorted(os.sched_getaffinity(0))
+            else:
+                cores = list(range(os.cpu_count() or 1))
+        self.cores = list(cores)
+        self.max_builds = max_builds or len(self.cores)
+
+        context = multiprocessing.get_context('fork')
+        self.__builds = context.BoundedSemaphore(self.max_builds)
+        self.__core_locks = dict([(c, context.Lock()) for c in self.cores])
+
+    #-----------------------------------------------------
+
+    @contextmanager
+    def reserve(self, phase, cores=None):
+        '''
+        Hold the resources of a command of the given phase while it runs
+        @param cores: the cores a test run is pinned to (None if it is not pinned)
+        '''
+
+        if phase == 'build':
+            with self.__builds:
+                yield
+            return
+        if phase != 'run':
+            yield
+            return
+
+        # (the locks are always acquired in the same order, so runs waiting for each other cannot deadlock)
+        locks = [self.__core_locks[c] for c in sorted(set(cores or self.cores)) if c in self.__core_locks]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
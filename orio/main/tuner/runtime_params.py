@@ -0,0 +1,199 @@
+#
+# Run-time performance parameters: the classification of the performance parameters into
+# compile-time and run-time ones, and the runtime-parametric code of a structural variant
+#
+
+import re
+
+from orio.main.util.globals import *
+
+# the environment variable passing the values of the run-time parameters to a runtime-parametric test
+SWEEP_ENV = 'ORIO_RT_CONFIGS'
+
+#-----------------------------------------------------
+
+class RuntimeParamModel:
+    '''
+    A model of the transformed code of one structural variant (i.e., one setting of the compile-time
+    performance parameters) as a function of the run-time performance parameters.
+
+    The code is split into its integer literals and the text between them. A performance parameter
+    can be set at run time if changing its value leaves the text unchanged and changes every literal
+    by an affine function of the value (e.g., the tile size T of a tiled loop appears in the generated
+    code as "ii+T" and "ii+T-1"), and leaves the external definitions unchanged (they are at file scope,
+    where array sizes must be constant). The run-time parameters then become C variables of one test code
+    that runs every tested setting of their values in a single process. Each tested coordinate is
+    still transformed normally, and swept only if its code is exactly the model's instance.
+    '''
+
+    # the integer literals of the code (identifiers, floating-point and hexadecimal constants excluded)
+    __NUM_RE = re.compile(r'(?<![\w.])(\d+)(?![\w.])')
+
+    # the separator of the transformed code and its external definitions
+    __EXT_SEP = '\0'
+
+    # the prefix of the C variables holding the values of the run-time parameters
+    var_prefix = 'orio_rt_'
+
+    #-----------------------------------------------------
+
+    def __init__(self, transform, perf_params, candidates, probes):
+        '''
+        To build the model of the structural variant of the given performance parameters
+        @param transform: a function returning the transformed code of the given performance
+                          parameters as a (code, externals) pair, or None if the transformation fails
+        @param perf_params: the performance parameters of a coordinate of the variant
+        @param candidates: the names of the parameters that may be set at run time
+        @param probes: the values used to probe each candidate (a dictionary of lists of integers)
+        '''
+
+        self.transform = transform
+        self.names = []             # the run-time parameters (ordered as their C variables)
+        self.vars = []              # the corresponding C variables
+        self.texts = None           # the code text between the integer literals
+        self.literals = None        # the literals of the base code (as written)
+        self.coefs = {}             # parameter name --> its coefficient in each literal
+        self.offsets = None         # the constant term of each literal
+
+        base_params = dict(perf_params)
+        base = self.__split(transform(base_params))
+        if base is None:
+            return
+        self.texts, self.literals = base
+        nums = [int(n) for n in self.literals]
+
+        # the literals of the external definitions (at file scope, where the sizes of arrays must be constant)
+        self.__ext_start = [i for i, text in enumerate(self.texts) if self.__EXT_SEP in text][0]
+
+        # probe the candidates one at a time
+        for name in candidates:
+            coefs = self.__probe(base_params, nums, name, probes.get(name, []))
+            if coefs is not None:
+                self.names.append(name)
+                self.coefs[name] = coefs
+
+        # the effects of the run-time parameters must add up (checked by changing all of them at once)
+        while True:
+            self.offsets = []
+            for i, n in enumerate(nums):
+                self.offsets.append(n - sum([self.coefs[name][i] * base_params[name] for name in self.names]))
+            if len(self.names) < 2:
+                break
+            params = dict(base_params)
+            for name in self.names:
+                params[name] = [v for v in probes[name] if v != base_params[name]][0]
+            if self.matches(params, transform(params)):
+                break
+            del self.coefs[self.names.pop()]
+        self.vars = [self.var_prefix + re.sub(r'\W', '_', name) for name in self.names]
+
+    #-----------------------------------------------------
+
+    def __join(self, code):
+        '''Return the (code, externals) pair as a single string'''
+        if code is None:
+            return None
+        return code[0] + self.__EXT_SEP + code[1]
+
+    def __split(self, code):
+        '''Return the text between the integer literals of the given code, and the literals'''
+        code = self.__join(code)
+        if code is None:
+            return None
+        parts = self.__NUM_RE.split(code)
+        return parts[0::2], parts[1::2]
+
+    def __probe(self, base_params, nums, name, values):
+        '''Return the coefficients of the given parameter in the literals, or None if it is not run-time'''
+
+        base_val = base_params[name]
+        values = [v for v in values if v != base_val]
+        if not values:
+            return None
+        coefs = None
+        for val in values:
+            params = dict(base_params)
+            params[name] = val
+            probe = self.__split(self.transform(params))
+            if probe is None or probe[0] != self.texts:
+                return None
+            cur = []
+            for n, m in zip(nums, probe[1]):
+                delta = int(m) - n
+                if delta % (val - base_val) != 0:
+                    return None
+                cur.append(delta // (val - base_val))
+            if coefs is not None and cur != coefs:
+                return None
+            coefs = cur
+        # a parameter appearing in the external definitions is a compile-time parameter
+        if [c for c in coefs[self.__ext_start:] if c]:
+            return None
+        return coefs
+
+    #-----------------------------------------------------
+
+    def instantiate(self, perf_params):
+        '''Return the code predicted by the model for the given values of the run-time parameters'''
+
+        code = ''
+        for i, text in enumerate(self.texts[:-1]):
+            if any([self.coefs[name][i] for name in self.names]):
+                value = self.offsets[i] + sum([self.coefs[name][i] * perf_params[name] for name in self.names])
+                code += text + str(value)
+            else:
+                code += text + self.literals[i]
+        return code + self.texts[-1]
+
+    def matches(self, perf_params, code):
+        '''Return True if the given transformed (code, externals) pair is the model's instance for the given parameters'''
+        return self.texts is not None and self.instantiate(perf_params) == self.__join(code)
+
+    def parametricCode(self):
+        '''Return the (code, externals) pair in which the run-time parameters are read from their C variables'''
+
+        code = ''
+        for i, text in enumerate(self.texts[:-1]):
+            terms = [(self.coefs[name][i], var) for name, var in zip(self.names, self.vars) if self.coefs[name][i]]
+            if not terms:
+                code += text + self.literals[i]
+                continue
+            expr = ''
+            for coef, var in terms:
+                if coef == 1:
+                    expr += ' + %s' % var
+                elif coef == -1:
+                    expr += ' - %s' % var
+                else:
+                    expr += ' %s %d*%s' % ('+' if coef > 0 else '-', abs(coef), var)
+            if self.offsets[i]:
+                expr += ' %s %d' % ('+' if self.offsets[i] > 0 else '-', abs(self.offsets[i]))
+            expr = expr[3:] if expr.startswith(' + ') else '-' + expr[3:]
+            code += text + '(' + expr + ')'
+        code += self.texts[-1]
+        code, externals = code.split(self.__EXT_SEP, 1)
+        return code, externals
+
+#-----------------------------------------------------
+
+def classifyParams(axis_names, axis_val_ranges, candidates=None):
+    '''
+    Return the names of the performance parameters that may be set at run time (integer-valued
+    parameters with more than one value, excluding the command-line parameters), and the values
+    probing each of them (its smallest, median and largest values)
+    @param candidates: if not None, only these parameters are considered
+    '''
+
+    names = []
+    probes = {}
+    for name, vals in zip(axis_names, axis_val_ranges):
+        if name.startswith('__cmdline_') or (candidates is not None and name not in candidates):
+            continue
+        if not vals or not all([isinstance(v, int) and not isinstance(v, bool) for v in vals]):
+            continue
+        distinct = sorted(set(vals))
+        if len(distinct) < 2:
+            continue
+        names.append(name)
+        probes[name] = sorted(set([distinct[0], distinct[len(distinct) // 2], distinct[-1]]))
+    return names, probes
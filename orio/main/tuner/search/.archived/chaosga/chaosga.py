@@ -22,6 +22,11 @@ class ChaosGA(orio.main.tuner.search.search.Search):
 
     def fitness(self, x):
         return self.getPerfCost(x)
+
+    def fitnesses(self, xs):
+        # the whole generation is tested by a single call, through the configured parallel evaluator
+        perf_costs = self.getPerfCosts(xs)
+        return [perf_costs[str(x)][0] for x in xs]
     
     def generate(self):
         s = []
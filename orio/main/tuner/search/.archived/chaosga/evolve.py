@@ -8,6 +8,10 @@ class Problem:
     def fitness(self,x):
         'fitness takes a genome and returns a real number'
         return 0
+
+    def fitnesses(self,xs):
+        'fitnesses takes a generation of genomes and returns their real numbers'
+        return [self.fitness(x) for x in xs]
     
     def generate(self):
         'generates a random new genome'
@@ -40,7 +44,7 @@ def newSolution(filename, problem, numEvals, growthRate, popMax, popInit, opt=ma
         logHandle = open(filename,'w')
     else:
         logHandle = None
-    fitmap(problem.fitness, organisms, logHandle)
+    fitmap(problem.fitnesses, organisms, logHandle)
     bestYet = opt(organisms, key = lambda x : x.fitresult)
     return evolve(problem, logHandle, organisms, numEvals - gensize, growthRate, popMax, popInit, gensize+1, bestYet, opt)
 
@@ -50,7 +54,7 @@ def evolve(problem, logHandle, population, numEvals, growthRate, popMax, pop, na
         pop = growthRate * pop * (1 - pop)
         nextgensize = int(max(2, round(pop * popMax)))
         nextGen = generation_tournament_elite(problem, population, int(min(numEvals, nextgensize-1)), generationCount, nameCount, opt) #first generate untested
-        fitmap(problem.fitness, nextGen, logHandle) #test the new organisms
+        fitmap(problem.fitnesses, nextGen, logHandle) #test the new organisms
         population = [bestYet]+nextGen #append previous best
         numEvals -= nextgensize-1
         generationCount += 1
@@ -60,9 +64,10 @@ def evolve(problem, logHandle, population, numEvals, growthRate, popMax, pop, na
         logHandle.close()
     return bestYet
 
-def fitmap(fitness, population, logHandle):
-    for a in population:
-        a.fitresult = fitness(a.genome)
+def fitmap(fitnesses, population, logHandle):
+    'evaluates a whole generation at once'
+    for a, f in zip(population, fitnesses([a.genome for a in population])):
+        a.fitresult = f
     logPop(population, logHandle)
 
 def logPop(population, handle):
@@ -0,0 +1,56 @@
+#
+# Paired statistics of the interleaved confirmation of the best coordinate
+#
+
+import math
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+# the default settings (the confirmation argument of the search section)
+DEFAULTS = {'challengers': 3,   # the number of runners-up measured against the best coordinate
+            'rounds': 10,       # the number of interleaved executions of each coordinate
+            'alpha': 0.05}      # the significance level a challenger must reach to replace the best coordinate
+
+#-----------------------------------------------------
+
+def readSettings(settings):
+    '''Return the given confirmation settings, completed with the defaults'''
+
+    result = dict(DEFAULTS)
+    result.update(settings or {})
+    unknown = [k for k in result if k not in DEFAULTS]
+    if unknown:
+        err('orio.main.tuner.search.confirmation: unknown confirmation settings: %s' % ', '.join(sorted(unknown)),
+            doexit=True)
+    if not isinstance(result['challengers'], int) or result['challengers'] < 1:
+        err('orio.main.tuner.search.confirmation: the number of challengers must be a positive integer', doexit=True)
+    if not isinstance(result['rounds'], int) or result['rounds'] < 2:
+        err('orio.main.tuner.search.confirmation: the number of rounds must be an integer greater than 1',
+            doexit=True)
+    if not isinstance(result['alpha'], (int, float)) or not 0 < result['alpha'] < 1:
+        err('orio.main.tuner.search.confirmation: alpha must be a fraction in (0,1)', doexit=True)
+    return result
+
+def binomial(n, k):
+    '''Return the number of ways of choosing k among n (math.comb is only available in Python 3.8+)'''
+    result = 1
+    for i in range(min(k, n - k)):
+        result = result * (n - i) // (i + 1)
+    return result
+
+def pairedComparison(costs, base_costs):
+    '''
+    Compare the costs of a challenger with those of the incumbent measured in the same rounds.
+    Return the geometric mean of the cost ratios, the number of rounds the challenger won, the number
+    of rounds without a tie, and the one-sided p-value of the sign test of the challenger being faster.
+    '''
+
+    pairs = [(c, b) for c, b in zip(costs, base_costs) if 0 < c < float('inf') and 0 < b < float('inf')]
+    if not pairs:
+        return float('inf'), 0, 0, 1.0
+    ratio = math.exp(sum([math.log(c / b) for c, b in pairs]) / len(pairs))
+    wins = len([1 for c, b in pairs if c < b])
+    n = len([1 for c, b in pairs if c != b])
+    p_value = sum([binomial(n, k) for k in range(wins, n + 1)]) / float(2 ** n)
+    return ratio, wins, n, p_value
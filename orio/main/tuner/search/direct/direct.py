@@ -1,220 +1,272 @@
-import orio.main.tuner.search.search
-from orio.main.util.globals import *
-import time
+#
+# Implementation of the DIRECT (DIviding RECTangles) search algorithm
+#
 
-import itertools
+import sys, time
 import math
+import orio.main.tuner.search.search
+from orio.main.util.globals import *
 
+#-----------------------------------------------------
 
 class Direct(orio.main.tuner.search.search.Search):
+    '''
+    The search engine that uses the DIRECT algorithm of Jones, Perttunen and Stuckman (1993).
+
+    The search space is mapped onto the unit hypercube, in which the value index of each parameter is
+    the cell of the point's coordinate (for a parameter with n values, [0,1) is cut into n equal cells).
+    A hyperrectangle is stored as its center and, for each axis, the number of times it was trisected
+    along that axis (its half-width along the axis is 0.5*3^-k), so its size costs O(d) to store and
+    compute whatever the dimensionality. An axis can be divided while the rectangle spans more than one
+    value of the parameter; rectangles reduced to a single coordinate are retired.
+
+    Each iteration selects the potentially optimal rectangles (the lower-right convex hull of the best
+    rectangle of each size bucket, subject to the epsilon condition), samples the points c +- delta*e_i
+    along their longest divisible axes, evaluates all these points in one batch, and trisects each
+    selected rectangle along these axes, best axis first.
+
+    Below is a list of algorithm-specific arguments used to steer the search algorithm.
+      epsilon            the minimum relative improvement over the best cost that a potentially
+                         optimal rectangle must be able to achieve (default: 1e-4)
+    '''
+
+    # algorithm-specific argument names
+    __EPSILON = 'epsilon'           # default: 1e-4
+
+    #-----------------------------------------------------
 
     def __init__(self, params):
+        '''To instantiate a DIRECT search engine'''
+
         orio.main.tuner.search.search.Search.__init__(self, params)
-        # rate-of-change
-        self.K_roc = .5
-        # Difference between the current minimum and the "guessed" absolute minimum
-        # such that f* <= fmin - epsilon fmin
+
+        # difference between the current minimum and the "guessed" absolute minimum
+        # such that f* <= fmin - epsilon |fmin|
         self.epsilon = 1e-4
 
-    def searchBestCoord(self, startCoord=None):
+        # read all algorithm-specific arguments
+        self.__readAlgoArgs()
 
-        # We are in a hyperrectangle. Initialization: take the whole parameter space.
+        # the costs of the evaluated coordinates (coordinate key --> cost)
+        self.__costs = {}
 
-        rectangle = [[0, self.dim_uplimits[i]] for i in range(self.total_dims)]
-        info("initial rectangle %s" % str(rectangle))
-        fmin = float('inf')
-        rectangles = [rectangle]
-        minpoint = self.dim_uplimits
+    #-----------------------------------------------------
 
-        start_time = time.time()
-        runs = 0
+    def searchBestCoord(self, startCoord=None):
+        '''
+        To explore the search space and return the coordinate that yields the best performance
+        (i.e. minimum performance cost).
+        '''
+        # TODO: implement startCoord support
 
-        # Keep the rectangles that are of the same measure
-        # key: measure (half longuest diagonal length)
-        # value: list of tuples ( rectangle, value at the center ) )
-        rect_sizes = {}
+        info('\n----- begin DIRECT search -----')
 
-        # initialize
+        start_time = time.time()
+        self.__costs = {}
 
-        center = self.__getCentroid(rectangle)
-        cost = self.getPerfCost(center)
-        fc = sum(cost) / len(cost)
-        dist = 0
-        for c in rectangle:
-            dist = max(dist, self.__distance(c, center))
-        rect_sizes[dist] = [(rectangle, fc)]
+        # the rectangles that can still be divided, bucketed by size (size key --> list of rectangles);
+        # a rectangle is a [center, trisection counts, cost] list
+        center = [0.5] * self.total_dims
+        self.__evaluate([center])
+        buckets = {}
+        self.__addRect(buckets, [center, [0] * self.total_dims, self.__cost(center)])
 
-        while True:
-            if rectangles == []:
+        while buckets:
+            if self.__exhausted(start_time):
                 break
-            rectangle = rectangles.pop(0)
-            runs += 1
-
-            # Trisect the rectangle along the longuest dimension
 
-            longuest_len, longuest_dim = max((x, i) for i, x in enumerate([i[1] - i[0] for i in rectangle]))
+            # select the rectangles to divide, as long as their samples fit in the budget
+            plans = []
+            points = []
+            keys = set()
+            for rect in self.__potentiallyOptimal(buckets):
+                samples = self.__samples(rect)
+                new_keys = set([str(self.__toCoord(p)) for _, _, p in samples]) - keys
+                new_keys = [k for k in new_keys if k not in self.__costs]
+                if self.total_runs > 0 and len(self.__costs) + len(keys) + len(new_keys) > self.total_runs:
+                    break
+                plans.append((rect, samples))
+                points += [p for _, _, p in samples]
+                keys.update(new_keys)
 
-            if 0 == int(round(longuest_len / 3)):
+            if not plans:
                 break
 
-            rec1 = rectangle[:]
-            rec1[longuest_dim] = rectangle[longuest_dim][:]
-            rec1[longuest_dim][1] = rectangle[longuest_dim][0] + int(round(longuest_len / 3))  # DIRTY
-            corners = list(itertools.product(*rec1, repeat=1))
-            cor1 = [list(c) for c in corners]
-            r1 = (rec1, cor1)
-
-            rec2 = rectangle[:]
-            rec2[longuest_dim] = rectangle[longuest_dim][:]
-            rec2[longuest_dim][0] = rectangle[longuest_dim][0] + int(round(longuest_len / 3))
-            rec2[longuest_dim][1] = rectangle[longuest_dim][0] + int(round(2 * longuest_len / 3))
-            corners = list(itertools.product(*rec2, repeat=1))
-            cor2 = [list(c) for c in corners]
-            r2 = (rec2, cor2)
-
-            rec3 = rectangle[:]
-            rec3[longuest_dim] = rectangle[longuest_dim][:]
-            rec3[longuest_dim][0] = rectangle[longuest_dim][0] + int(round(2 * longuest_len / 3))
-            corners = list(itertools.product(*rec3, repeat=1))
-            cor3 = [list(c) for c in corners]
-            r3 = (rec3, cor3)
-
-            info("Dividing rectangle " + str(rectangle) + " into " + str(rec1) + " AND " + str(rec2) + " AND " + str(rec3))
-            info("With corners " + str(cor1) + " AND " + str(cor2) + " AND " + str(cor3))
-
-            # Select the potentially optimal rectangles
-
-            new_fmin = fmin
-            fstar = (1 - self.epsilon) * fmin
-            for rec, cor in r1, r2, r3:
-
-                info("working in rectangle: " + str(rec) + " corners " + str(cor))
-
-                # Take the center
-                center = self.__getCentroid(cor)
-
-                # Evaluate the perf at the center
-                cost = self.getPerfCost(center)
-                fc = sum(cost) / len(cost)
-                dist = 0
-                for c in cor:
-                    dist = max(dist, self.__distance(c, center))
-                info("fc " + str(fc) + " dist " + str(dist))
-
-                # Add it to the dictionnary
-                if dist in rect_sizes:
-                    rect_sizes[dist].append((cor, fc))
-                else:
-                    rect_sizes[dist] = [(cor, fc)]
-
-                s = sorted(rect_sizes.keys())
-                if dist in rect_sizes:
-                    i = s.index(dist)
-                else:
-                    for i in s:
-                        if i > dist:
-                            break
-
-                # rectangles smaller than the current one
-                I1 = {k: v for k, v in list(rect_sizes.items()) if k in s[:i]}
-                # rectangles larger than the current one
-                if i < len(list(rect_sizes.keys())):
-                    I2 = {k: v for k, v in list(rect_sizes.items()) if k in s[i + 1:]}
-                else:
-                    I2 = {}
-                # rectangles as big as than the current one
-                if dist in rect_sizes:
-                    I3 = rect_sizes[dist]
-                else:
-                    I3 = []
-
-                opt = True
-
-                # equation (6)
-
-                if I3 != []:
-                    for i in I3:
-                        if i[1] < fc:
-                            opt = False
-
-                if opt == False:
-                    # Not optimal
-                    continue
-
-                # equation (7)
-
-                maxI1 = 0
-                for i in I1:
-                    for r in I1[i]:
-                        value = abs((r[1] - fc) / (i - dist))
-                        if value > maxI1:
-                            maxI1 = value
-
-                minI2 = float('inf')
-                for i in I2:
-                    for r in I2[i]:
-                        value = abs((r[1] - fc) / (i - dist))
-                        if value < minI2:
-                            minI2 = value
-
-                if maxI1 > minI2:
-                    opt = False
-                    continue
-
-                # equation (8)
-
-                if fmin != 0:
-                    value = (fmin - fc) + dist * minI2
-                    value /= abs(fmin)
-                    if value < self.epsilon:
-                        opt = False
-                        continue
-                # equation (9)
-                else:
-                    if fc > dist * minI1:
-                        opt = False
-                        continue
-
-                # If we are still here, the conditions are fulfilled. The rectangle is potentially optimal.
-                # Add it (it will be divided later).
-                info("potentially optimal rectangle found: " + str(rec))
-                rectangles.append(rec)
-
-                # do we have the minimum?
-                if I1 == {}:
-                    if fc < new_fmin:
-                        new_fmin = fc
-                        minpoint = center
-
-            # Remove the big rectangle from the dictionnary
-            for r in rect_sizes[dist]:
-                if r[0] == rectangle:
-                    rect_sizes[dist].remove(r)
-                    break
+            # evaluate the samples of all selected rectangles at once
+            self.__evaluate(points)
 
-            fmin = new_fmin
+            # trisect the selected rectangles
+            for rect, samples in plans:
+                self.__removeRect(buckets, rect)
+                for child in self.__divide(rect, samples):
+                    self.__addRect(buckets, child)
 
-        search_time = time.time() - start_time
+            best_key = min(self.__costs, key=lambda k: self.__costs[k])
+            debug('DIRECT: %d rectangles divided, %d coordinates evaluated, best %s=%s'
+                  % (len(plans), len(self.__costs), best_key, self.__costs[best_key]), obj=self)
+
+        # the best coordinate
+        best_coord, best_perf = None, self.MAXFLOAT
+        for key, cost in list(self.__costs.items()):
+            if cost < best_perf:
+                best_coord, best_perf = eval(key), cost
 
-        return minpoint, fmin, search_time, runs
-
-    def __distance(self, p1, p2):
-        d = 0
-        for c1, c2 in zip(p1, p2):
-            d += (c1 - c2) * (c1 - c2)
-        d = math.sqrt(d)
-        return d
-
-    def __getCentroid(self, coords):
-        '''Return a centroid coordinate'''
-        # if self.have_z3:
-        #     model = self.getCentroidZ3(coords)
-        #     point = self.z3ToPoint(model)
-        #     return self.perfParamToCoord(point)
-
-        total_coords = len(coords)
-        centroid = coords[0]
-        for c in coords[1:]:
-            centroid = self.addCoords(centroid, c)
-        centroid = self.mulCoords((1.0 / total_coords), centroid)
-        return centroid
+        search_time = time.time() - start_time
+        runs = len(self.__costs)
+
+        info('----- end DIRECT search -----')
+
+        return best_coord, best_perf, search_time, runs
+
+    #-----------------------------------------------------
+
+    def __readAlgoArgs(self):
+        '''To read all algorithm-specific arguments'''
+
+        # check for algorithm-specific arguments
+        for vname, rhs in self.search_opts.items():
+
+            # the epsilon of the potentially optimal rectangles
+            if vname == self.__EPSILON:
+                if not isinstance(rhs, (int, float)) or rhs < 0:
+                    err('orio.main.tuner.search.direct: %s argument "%s" must be a non-negative number'
+                        % (self.__class__.__name__, vname))
+                self.epsilon = rhs
+
+            # unrecognized algorithm-specific argument
+            else:
+                err('orio.main.tuner.search.direct: unrecognized %s algorithm-specific argument: "%s"' %
+                    (self.__class__.__name__, vname))
+
+    #-----------------------------------------------------
+
+    def __exhausted(self, start_time):
+        '''Return True if the search time limit, the total number of runs or the search space is exhausted'''
+
+        if self.time_limit > 0 and time.time() - start_time >= self.time_limit:
+            return True
+        if self.total_runs > 0 and len(self.__costs) >= self.total_runs:
+            return True
+        return len(self.__costs) >= self.space_size
+
+    def __toCoord(self, point):
+        '''Return the search space coordinate of the given point of the unit hypercube'''
+        return [min(n - 1, int(x * n)) for x, n in zip(point, self.dim_uplimits)]
+
+    def __cost(self, point):
+        '''Return the cost of the (evaluated) given point'''
+        return self.__costs[str(self.__toCoord(point))]
+
+    def __evaluate(self, points):
+        '''To empirically evaluate the coordinates of the given points that have not been evaluated yet'''
+
+        coords = []
+        keys = set(self.__costs.keys())
+        for point in points:
+            coord = self.__toCoord(point)
+            if str(coord) not in keys:
+                coords.append(coord)
+                keys.add(str(coord))
+
+        perf_costs = self.getPerfCosts(coords) if coords else {}
+        for coord_str, (perf_cost, _) in list(perf_costs.items()):
+            costs = [float(x) for x in perf_cost]
+            self.__costs[coord_str] = sum(costs) / len(costs) if costs else self.MAXFLOAT
+        for coord in coords:
+            self.__costs.setdefault(str(coord), self.MAXFLOAT)
+
+    #-----------------------------------------------------
+
+    def __divisible(self, rect):
+        '''Return the axes along which the given rectangle spans more than one parameter value'''
+        return [i for i, (k, n) in enumerate(zip(rect[1], self.dim_uplimits)) if n > 3 ** k]
+
+    def __size(self, levels):
+        '''Return the size key of a rectangle (its center-to-vertex distance)'''
+        return round(math.sqrt(sum([0.25 * 9.0 ** -k for k in levels])), 12)
+
+    def __addRect(self, buckets, rect):
+        '''To add the given rectangle to its size bucket, unless it cannot be divided anymore'''
+        if self.__divisible(rect):
+            buckets.setdefault(self.__size(rect[1]), []).append(rect)
+
+    def __removeRect(self, buckets, rect):
+        '''To remove the given (divided) rectangle from its size bucket'''
+        size = self.__size(rect[1])
+        buckets[size] = [r for r in buckets[size] if r is not rect]
+        if not buckets[size]:
+            del buckets[size]
+
+    def __potentiallyOptimal(self, buckets):
+        '''
+        Return the potentially optimal rectangles: the best rectangles of the size buckets on the
+        lower-right convex hull of the (size, cost) points that satisfy the epsilon condition,
+        ordered by cost. Infinite costs (invalid or failed coordinates) count as the largest finite cost.
+        '''
+
+        finite = [r[2] for rs in buckets.values() for r in rs if r[2] < self.MAXFLOAT]
+        fmax = max(finite) if finite else 0.0
+
+        # the best cost of each size bucket, by increasing size
+        points = []
+        for size in sorted(buckets.keys()):
+            points.append((size, min([min(r[2], fmax) for r in buckets[size]])))
+        fmin = min([f for _, f in points])
+
+        # the lower hull from the largest best rectangle to the largest rectangle
+        start = max([i for i, (_, f) in enumerate(points) if f == fmin])
+        hull = []
+        for p in points[start:]:
+            while len(hull) >= 2:
+                (d1, f1), (d2, f2) = hull[-2], hull[-1]
+                if (d2 - d1) * (p[1] - f1) - (f2 - f1) * (p[0] - d1) > 0:
+                    break
+                hull.pop()
+            hull.append(p)
+
+        # the epsilon condition, with the largest rate of change supported by the hull
+        selected = [hull[-1]]
+        for (d1, f1), (d2, f2) in zip(hull[:-1], hull[1:]):
+            K = (f2 - f1) / (d2 - d1)
+            if f1 - K * d1 <= fmin - self.epsilon * abs(fmin):
+                selected.append((d1, f1))
+
+        rects = []
+        for size, f in selected:
+            rects += [r for r in buckets[size] if min(r[2], fmax) == f]
+        return sorted(rects, key=lambda r: r[2])
+
+    def __samples(self, rect):
+        '''Return the (axis, direction, point) samples of the given rectangle along its longest divisible axes'''
+
+        axes = self.__divisible(rect)
+        longest = min([rect[1][i] for i in axes])
+        samples = []
+        for i in axes:
+            if rect[1][i] != longest:
+                continue
+            delta = 3.0 ** -(longest + 1)
+            for direction in (-1, 1):
+                point = list(rect[0])
+                point[i] += direction * delta
+                samples.append((i, direction, point))
+        return samples
+
+    def __divide(self, rect, samples):
+        '''
+        To trisect the given rectangle along the axes of its (evaluated) samples, starting with the axis
+        of the best sample, and return the new rectangles (the given one shrinks to the center part)
+        '''
+
+        # the best cost along each axis
+        best = {}
+        for i, _, point in samples:
+            best[i] = min(best.get(i, self.MAXFLOAT), self.__cost(point))
+
+        children = [rect]
+        for i in sorted(best.keys(), key=lambda i: (best[i], i)):
+            rect[1][i] += 1
+            for j, _, point in samples:
+                if j == i:
+                    children.append([point, list(rect[1]), self.__cost(point)])
+        return children
@@ -46,7 +46,7 @@ class Exhaustive(orio.main.tuner.search.search.Search):
 
         # get the total number of coordinates to be tested at the same time
         coord_count = 1
-        if self.use_parallel_search:
+        if self.use_parallel_search or self.use_batch_queue:
             coord_count = self.num_procs
         top_perf={}
         
@@ -1,8 +1,9 @@
-import numpy as np
-import math
-import operator
+#
+# Implementation of the Firefly search algorithm
+#
+
 import time
-import itertools
+import numpy as np
 import orio.main.tuner.search.search
 from orio.main.util.globals import *
 
@@ -11,145 +12,141 @@ UNROLL_NAMES = 'unroll_variables'  # unroll constraint (U1_I == 1 or U1_J == 1 o
                                    # has to be passed as: 'U1_I U1_J U1_K - U2_I U2_j'
 
 
-class FireflyElement:
-
-    def __init__(self, min_bound, max_bound, ide):
-        self.position = self.generate_position(min_bound, max_bound)
-        self.brightness = None
-        self.id = ide
-
-    @staticmethod
-    def generate_position(min_bound, max_bound):
-        problem_dim = len(min_bound)
-        error = 1e-10 * np.ones(problem_dim)
-        return (np.multiply(max_bound - error - min_bound,
-                            np.random.random_sample(problem_dim)) + min_bound).round().astype(int)
-
-
 class Firefly(orio.main.tuner.search.search.Search):
+    '''
+    The search engine that uses the Firefly algorithm of Xin-She Yang.
+
+    The population is stored as a (population_size x dimensions) array of coordinates. Each generation
+    moves every firefly towards all brighter ones at once (the pairwise distances and attractions are
+    computed as arrays), and the whole generation is then evaluated by a single call to getPerfCosts,
+    so that its variants are tested by whatever parallel evaluator is configured.
+
+    Below is a list of algorithm-specific arguments used to steer the search algorithm.
+      population_size     the number of fireflies (default: 100)
+      generations         the maximum number of generations (default: unlimited)
+      alpha               the noise coefficient, in [0,1] (default: 0.5)
+      alpha_decay         the multiplicative decay of alpha at each generation (default: 0.9)
+      beta_init           the attractiveness at distance zero (default: 1)
+      gamma               the light absorption coefficient (default: computed from the population size
+                          and dimensionality, so that a move covers on average half of the distance
+                          between two fireflies)
+      unroll_variables    the unroll factors of which at least one must be 1 in each group, as
+                          'U1_I U1_J U1_K - U2_I U2_J'
+    '''
 
     def __init__(self, params, **kwargs):
+        np.random.seed(1)
+
         orio.main.tuner.search.search.Search.__init__(self, params)
         self.population_size = int(kwargs.get('population_size', 100))
-        self.max_bound = np.array(self.dim_uplimits) - np.ones(len(self.dim_uplimits)).astype(int)
-        self.min_bound = np.zeros(len(self.dim_uplimits)).astype(int)
+        self.max_bound = np.array(self.dim_uplimits) - 1
+        self.min_bound = np.zeros(len(self.dim_uplimits), dtype=int)
         self.problem_dim = len(self.min_bound)
         self.generations = kwargs.get('generations', 100000000)
-        self.population = []
         self.alpha = kwargs.get('alpha', 0.5)  # randomness [0,1]
         self.alpha_decay = kwargs.get('alpha_decay', 0.9)
         self.beta_init = kwargs.get('beta_init', 1)
+        self.gamma = kwargs.get('gamma', None)  # absorption coefficient
         self.unroll_list = []
         self._get_algo_params()
-        auto_gamma = kwargs.get('auto_gamma', True)
-        if auto_gamma:
+        if self.gamma is None:
             # this ensures that the movement to be on average half of the distance between two fireflies
             self.gamma = self._get_gamma()
-        else:
-            self.gamma = kwargs.get('gamma', 0.01)  # absorption coefficient
+
+        # the population: the coordinates and the brightness (minus the cost) of each firefly
+        self.positions = None
+        self.brightness = None
+
+        # the costs of the evaluated coordinates (coordinate key --> cost)
+        self.costs = {}
 
     def _get_gamma(self):
         a = np.random.random_sample((self.population_size, self.problem_dim))
-        avg = 0
-        for i in range(self.population_size):
-            j = i + 1
-            while j < self.population_size:
-                avg += np.linalg.norm(a[i, :] - a[j, :])
-                j += 1
-        return np.log(2) / (2 * avg/(self.population_size * (self.population_size - 1))) ** 2
+        dist = np.sqrt(((a[:, None, :] - a[None, :, :]) ** 2).sum(axis=2))
+        pairs = self.population_size * (self.population_size - 1)
+        avg = dist.sum() / pairs if pairs else 1.0
+        return np.log(2) / (2 * avg) ** 2
 
     def get_population(self):
         info("std_pr: Generating population...")
-        for i in range(self.population_size):
-            while True:
-                self.population.append(FireflyElement(self.min_bound, self.max_bound, i))
-                if self.move(i, np.random.standard_normal(self.problem_dim)):
-                    info(("std_pr: |- Created firefly %d" % i))
-                    break
+        positions = np.random.random_sample((self.population_size, self.problem_dim)) * (self.max_bound + 1)
+        self.positions = self.close_bounds_to_unroll(positions, np.floor(positions))
+        info("std_pr: |- Created %d fireflies" % self.population_size)
+
+    def close_bounds_to_unroll(self, positions, old_positions):
+        """Returns the new positions with unroll + min and max bound feasibility, the nearest to positions.
+        The rounding is done toward the old positions before making unroll feasibility."""
+        positions = np.clip(positions, self.min_bound, self.max_bound)
+        # round the positions toward the old positions:
+        positions = np.floor(positions).astype(int) + (old_positions > positions).astype(int)
+        positions = np.clip(positions, self.min_bound, self.max_bound)
+        rows = np.arange(len(positions))
+        for unrolls in self.unroll_list:
+            axes = np.array([self.axis_names.index(name) for name in unrolls])
+            values = np.array([[self.axis_val_ranges[a][c] for a in axes] for c in positions[:, axes]])
+            constrained = axes[np.argmin(values, axis=1)]
+            positions[rows, constrained] = [self.axis_val_ranges[a].index(1) for a in constrained]
+        if self.z3solver:
+            for i in range(len(positions)):
+                point = self.z3solver.getNearestFeasible(list(positions[i]))
+                if point is None:
+                    debug("std_pr: Impossible to find a feasible neighbor of %s." % list(positions[i]), obj=self)
                 else:
-                    self.population.pop()
-
-    def close_bounds_to_unroll(self, position, index):
-        """Returns a new position with unroll + min and max bound feasibility, the nearest to position.
-        The rounding is done toward its old position before making unroll feasibility."""
-        position[position < self.min_bound] = self.min_bound[position < self.min_bound]
-        position[position > self.max_bound] = self.max_bound[position > self.max_bound]
-        # round the position toward the old position:
-        position = position.astype(int) + [int(self.population[index].position[j] > position[j]) for j in
-                                           range(self.problem_dim)]
-        perf_params = self.coordToPerfParams(list(position))
-        for k in range(len(self.unroll_list)):
-            index_to_be_constrained = None
-            tmp_minimum = float('inf')
-            for j, variable in enumerate(self.unroll_list[k]):
-                if perf_params[variable] < tmp_minimum:
-                    tmp_minimum = perf_params[variable]
-                    index_to_be_constrained = j
-            perf_params[self.unroll_list[k][index_to_be_constrained]] = 1
-        return self.perfParamTabToCoord(self.perfParamToCoord(perf_params))
+                    positions[i] = self.z3solver.perfParamTabToCoord(point)
+        return positions
 
     def step(self):
-        # don't need to be ordered by brightness
         self._modify_alpha()
-        current_brightness = [firefly.brightness for firefly in self.population]
-        current_positions = [firefly.position for firefly in self.population]
-        for i in range(self.population_size):
-            tmp_direction = np.zeros(self.problem_dim)
-            for j in range(self.population_size):
-                if current_brightness[i] < current_brightness[j]:
-                    # we go to the [0,1] hypercube to compute the relative distance from two coords
-                    rescaled_vector = np.divide(current_positions[j] - current_positions[i], self.max_bound)
-                    r = math.sqrt(float(np.sum(rescaled_vector ** 2)))
-                    beta = self.beta_init * math.exp(-self.gamma * r ** 2)
-                    tmp_direction += (current_positions[j] - current_positions[i]) * beta
-            try:
-                self.move(i, tmp_direction)
-            except ValueError:
-                if len(self.population) == self.population_size:
-                    pass
-                else:
-                    raise Exception
-            self.population[i].brightness = -sum(self.getPerfCost(list(self.population[i].position)))
-
-    def move(self, i, direction):
-        noise = np.multiply((np.random.random_sample(self.problem_dim) - 0.5 * np.ones(self.problem_dim)),
-                            self.max_bound - self.min_bound) * self.alpha
-        new_position = self.population[i].position + direction + noise
-        new_position = self.close_bounds_to_unroll(new_position, i)  # this also push into regular bounds.
-
-        perf_params = self.coordToPerfParams(list(new_position))
-        perf_params = self.getNearestFeasibleZ3(perf_params)
-        if perf_params is None:
-            raise ValueError("std_pr: Impossible to find a feasible neighbor.")
-        coord = self.perfParamTabToCoord(self.perfParamToCoord(perf_params))
-        self.population[i].position = np.array(coord)
-        return True
+        positions = self.positions.astype(float)
+        # diff[i, j] is the vector from firefly i to firefly j
+        diff = positions[None, :, :] - positions[:, None, :]
+        # we go to the [0,1] hypercube to compute the relative distance from two coords
+        r2 = ((diff / np.maximum(self.max_bound, 1)) ** 2).sum(axis=2)
+        beta = self.beta_init * np.exp(-self.gamma * r2) * (self.brightness[:, None] < self.brightness[None, :])
+        direction = (beta[:, :, None] * diff).sum(axis=1)
+        noise = ((np.random.random_sample(positions.shape) - 0.5) * (self.max_bound - self.min_bound)) * self.alpha
+        self.positions = self.close_bounds_to_unroll(positions + direction + noise, positions)
+        self.evaluate()
+
+    def evaluate(self):
+        '''Evaluate the whole population at once and update the brightness of each firefly'''
+        coords = []
+        for position in self.positions:
+            coord = [int(x) for x in position]
+            if str(coord) not in self.costs and coord not in coords:
+                coords.append(coord)
+        if self.total_runs > 0:
+            coords = coords[:max(self.total_runs - len(self.costs), 0)]
+        if coords:
+            perf_costs = self.getPerfCosts(coords)
+            for coord_str, (perf_cost, _) in list(perf_costs.items()):
+                costs = np.array(perf_cost, dtype=float)
+                self.costs[coord_str] = costs.mean() if len(costs) else self.MAXFLOAT
+        self.brightness = -np.array([self.costs.get(str([int(x) for x in position]), self.MAXFLOAT)
+                                     for position in self.positions])
 
     def searchBestCoord(self, startCoord=None):
         start_time = time.time()
         # initialize all fireflies brightness
         self.get_population()
-        for i in range(self.population_size):
-            self.population[i].brightness = -sum(self.getPerfCost(list(self.population[i].position)))
+        self.evaluate()
         t = 0
         best_fitness = float('inf')
         best_coord = None
-        while t < self.generations and not ((time.time()-start_time) > self.time_limit > 0):
-            self.population.sort(key=operator.attrgetter('brightness'))
-            info(('std_pr: Generation %s, best fitness %s' % (t, -self.population[-1].brightness)))
-            if -self.population[-1].brightness < best_fitness:
-                best_fitness = -self.population[-1].brightness
-                best_coord = self.population[-1].position
-            self.population.sort(key=operator.attrgetter('id'))
-            info(("std_pr: " + str([f.brightness for f in self.population][:8])))
+        while True:
+            best = int(np.argmax(self.brightness))
+            info(('std_pr: Generation %s, best fitness %s' % (t, -self.brightness[best])))
+            if -self.brightness[best] < best_fitness:
+                best_fitness = float(-self.brightness[best])
+                best_coord = [int(x) for x in self.positions[best]]
+            if t >= self.generations or ((time.time()-start_time) > self.time_limit > 0) \
+                    or (self.total_runs > 0 and len(self.costs) >= self.total_runs):
+                break
+            info(("std_pr: " + str(self.brightness[:8].tolist())))
             self.step()
             t += 1
         search_time = time.time() - start_time
-        self.population.sort(key=operator.attrgetter('brightness'))
-        if -self.population[-1].brightness < best_fitness:
-            best_fitness = -self.population[-1].brightness
-            best_coord = self.population[-1].position
-        return list(best_coord), best_fitness, search_time, 1
+        return best_coord, best_fitness, search_time, len(self.costs)
 
     def _modify_alpha(self):
         self.alpha = self.alpha * self.alpha_decay
@@ -157,7 +154,6 @@ class Firefly(orio.main.tuner.search.search.Search):
     def _get_algo_params(self):
         for name, value in self.search_opts.items():
             if name == UNROLL_NAMES:
-                value = firefly_unroll_variables
                 items_list = value.split()
                 i = 0
                 tmp_list = []
@@ -172,3 +168,16 @@ class Firefly(orio.main.tuner.search.search.Search):
                 for unrolls in self.unroll_list:
                     if len(unrolls) < 2:
                         raise ValueError('std_pr: Unrolls number unfeasible.')
+            elif name in ('population_size', 'generations'):
+                if not isinstance(value, int) or value <= 0:
+                    err('orio.main.tuner.search.firefly: %s argument "%s" must be a positive integer'
+                        % (self.__class__.__name__, name))
+                setattr(self, name, value)
+            elif name in ('alpha', 'alpha_decay', 'beta_init', 'gamma'):
+                if not isinstance(value, (int, float)) or value < 0:
+                    err('orio.main.tuner.search.firefly: %s argument "%s" must be a non-negative number'
+                        % (self.__class__.__name__, name))
+                setattr(self, name, value)
+            else:
+                err('orio.main.tuner.search.firefly: unrecognized %s algorithm-specific argument: "%s"' %
+                    (self.__class__.__name__, name))
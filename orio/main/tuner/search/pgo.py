@@ -0,0 +1,37 @@
+#
+# Settings of the profile-guided finalization of the best coordinates
+#
+
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+# the default settings (the pgo argument of the search section), for GCC; with Clang, the raw profiles
+# must be merged, e.g., 'merge': 'llvm-profdata merge -o %(dir)s/default.profdata %(dir)s'
+DEFAULTS = {'finalists': 3,     # the number of best coordinates rebuilt with profile feedback
+            'rounds': 5,        # the number of interleaved executions of each rebuilt coordinate
+            'train': 1,         # the number of training runs of each instrumented executable
+            'generate': '-fprofile-generate=%(dir)s',                   # the flags of the instrumented build
+            'use': '-fprofile-use=%(dir)s -fprofile-correction',        # the flags of the final build
+            'merge': None}      # the command preparing the recorded profile of a directory (if any)
+
+#-----------------------------------------------------
+
+def readSettings(settings):
+    '''Return the given profile-guided finalization settings, completed with the defaults'''
+
+    result = dict(DEFAULTS)
+    result.update(settings or {})
+    unknown = [k for k in result if k not in DEFAULTS]
+    if unknown:
+        err('orio.main.tuner.search.pgo: unknown pgo settings: %s' % ', '.join(sorted(unknown)), doexit=True)
+    for name in ('finalists', 'rounds', 'train'):
+        if not isinstance(result[name], int) or result[name] < 1:
+            err('orio.main.tuner.search.pgo: %s must be a positive integer' % name, doexit=True)
+    for name in ('generate', 'use', 'merge'):
+        if result[name] is None and name == 'merge':
+            continue
+        if not isinstance(result[name], str) or '%(dir)s' not in result[name]:
+            err('orio.main.tuner.search.pgo: %s must be a string referring to the profile directory as %%(dir)s'
+                % name, doexit=True)
+    return result
@@ -0,0 +1,348 @@
+#
+# Implementation of the portfolio search: several search algorithms sharing one budget of runs
+#
+
+import sys, time
+import math
+import threading
+import orio.main.dyn_loader
+import orio.main.tuner.search.search
+from orio.main.util.globals import *
+
+# the name of the package containing the search algorithms
+SEARCH_MOD_NAME = 'orio.main.tuner.search'
+
+#-----------------------------------------------------
+
+class _ArmStopped(BaseException):
+    '''Raised in an arm waiting for its turn when the portfolio search ends (not an Exception, so
+    that the arms cannot swallow it)'''
+    pass
+
+class _Arm:
+    '''One search algorithm of the portfolio, running in its own thread whenever it has the turn'''
+
+    def __init__(self, name, search):
+        self.name = name
+        self.search = search
+        self.thread = None
+        self.done = False
+        self.quota = 0              # the number of new runs of the current turn
+        self.limit = None           # the number of new runs left in the whole budget (None: unlimited)
+        self.used = 0               # the number of new runs made in the current turn
+        self.calls = 0              # the number of evaluation requests made in the current turn
+        self.turns = 0
+        self.runs = 0               # the total number of new runs
+        self.improvements = 0       # the number of turns that improved the best cost
+        self.weight = 0.0           # the discounted number of turns
+        self.reward = 0.0           # the discounted sum of rewards
+
+#-----------------------------------------------------
+
+class Portfolio(orio.main.tuner.search.search.Search):
+    '''
+    The search engine that runs several search algorithms (the arms) as cooperative threads over one
+    budget of runs and one table of results.
+
+    Only one arm runs at a time: an arm runs until it has made its quota of new runs (a turn), then
+    waits until a bandit policy gives it another turn. The policy is a discounted UCB1 whose reward
+    is the relative improvement of the best cost during the turn, so the runs go to the arms that
+    currently improve the fastest. All arms share the performance cost records, so a coordinate
+    tested by one arm is never tested again by another. The search ends when the total number of
+    runs or the time limit is reached, or when every arm has finished.
+
+    Below is a list of algorithm-specific arguments used to steer the search algorithm.
+      arms               the names of the search algorithms (default: ['Randomsearch', 'Randomlocal'])
+      slice              the number of new runs of a turn (default: 10)
+      exploration        the exploration coefficient of the UCB1 policy (default: 0.5)
+      discount           the factor discounting the past turns of every arm at each turn, in (0,1]
+                         (default: 0.9)
+    Every algorithm-specific argument of an arm is given with the name of the arm as a prefix, e.g.,
+    portfolio_randomlocal_local_distance or portfolio_simplex_reflection_coef in the search section.
+    '''
+
+    # algorithm-specific argument names
+    __ARMS = 'arms'                 # default: ['Randomsearch', 'Randomlocal']
+    __SLICE = 'slice'               # default: 10
+    __EXPLORATION = 'exploration'   # default: 0.5
+    __DISCOUNT = 'discount'         # default: 0.9
+
+    #-----------------------------------------------------
+
+    def __init__(self, params):
+        '''To instantiate a portfolio search engine'''
+
+        orio.main.tuner.search.search.Search.__init__(self, params)
+
+        # set all algorithm-specific arguments to their default values
+        self.arm_names = ['Randomsearch', 'Randomlocal']
+        self.slice = 10
+        self.exploration = 0.5
+        self.discount = 0.9
+
+        # read all algorithm-specific arguments
+        self.__readAlgoArgs()
+
+        # complain if both the search time limit and the total number of search runs are undefined
+        if self.time_limit <= 0 and self.total_runs <= 0:
+            err(('orio.main.tuner.search.portfolio: %s search requires the search time limit (time_limit, seconds) and/or the ' +
+                'total number of search runs (total_runs) to be defined') % self.__class__.__name__)
+
+        # the turn-taking of the arms
+        self.__cond = threading.Condition()
+        self.__turn = None
+        self.__stopping = False
+
+        # instantiate the arms: each arm gets the whole budget, the portfolio ends it earlier
+        dloader = orio.main.dyn_loader.DynLoader()
+        self.arms = []
+        for name in self.arm_names:
+            mod_name = '.'.join([SEARCH_MOD_NAME, name.lower(), name.lower()])
+            prefix = name.lower() + '_'
+            arm_params = dict(params)
+            arm_params['search_opts'] = dict([(vname[len(prefix):], rhs) for vname, rhs in self.search_opts.items()
+                                              if vname.startswith(prefix) and vname != prefix])
+            arm_params['search_resume'] = False
+            search = dloader.loadClass(mod_name, name)(arm_params)
+            search.perf_cost_records = self.perf_cost_records
+            search.transform_time = self.transform_time
+            arm = _Arm(name, search)
+            search.getPerfCosts = self.__armPerfCosts(arm)
+            self.arms.append(arm)
+
+    #-----------------------------------------------------
+
+    def searchBestCoord(self, startCoord=None):
+        '''
+        To explore the search space and return the coordinate that yields the best performance
+        (i.e. minimum performance cost).
+        '''
+        # TODO: implement startCoord support
+
+        info('\n----- begin portfolio search -----')
+
+        start_time = time.time()
+        runs = 0
+        best_coord, best_perf = self.__best()
+
+        for arm in self.arms:
+            arm.thread = threading.Thread(target=self.__armMain, args=(arm,), name='orio-%s' % arm.name)
+            arm.thread.daemon = True
+            arm.thread.start()
+
+        while True:
+            if self.time_limit > 0 and time.time() - start_time >= self.time_limit:
+                break
+            if self.total_runs > 0 and runs >= self.total_runs:
+                break
+            if len(self.perf_cost_records) >= self.space_size:
+                break
+            arm = self.__choose()
+            if arm is None:
+                break
+
+            # give the turn to the chosen arm
+            limit = None
+            if self.total_runs > 0:
+                limit = self.total_runs - runs
+            self.__play(arm, self.slice, limit)
+            runs += arm.used
+            arm.runs += arm.used
+            arm.turns += 1
+
+            # reward the arm with the relative improvement of the best cost
+            coord, perf = self.__best()
+            reward = 0.0
+            if perf < best_perf:
+                reward = 1.0 if best_perf == self.MAXFLOAT or best_perf <= 0 else (best_perf - perf) / best_perf
+                arm.improvements += 1
+                best_coord, best_perf = coord, perf
+            for a in self.arms:
+                a.weight *= self.discount
+                a.reward *= self.discount
+            arm.weight += 1
+            arm.reward += min(max(reward, 0.0), 1.0)
+            debug('portfolio: turn of %s, %d new runs, reward %g, best %s=%s'
+                  % (arm.name, arm.used, reward, best_coord, best_perf), obj=self)
+
+        self.__stop()
+        search_time = time.time() - start_time
+
+        info('----- end portfolio search -----')
+        info('----- begin portfolio search summary -----')
+        info(' %-16s %8s %8s %14s' % ('arm', 'turns', 'runs', 'improvements'))
+        for arm in self.arms:
+            info(' %-16s %8d %8d %14d' % (arm.name, arm.turns, arm.runs, arm.improvements))
+        info('----- end portfolio search summary -----')
+
+        return best_coord, best_perf, search_time, runs
+
+    #-----------------------------------------------------
+
+    def __readAlgoArgs(self):
+        '''To read all algorithm-specific arguments'''
+
+        # the arguments of the arms are prefixed with their names (e.g., randomlocal_local_distance)
+        arm_names = self.search_opts.get(self.__ARMS, self.arm_names)
+        arm_prefixes = ()
+        if isinstance(arm_names, (list, tuple)):
+            arm_prefixes = tuple([a.lower() + '_' for a in arm_names if isinstance(a, str)])
+
+        # check for algorithm-specific arguments
+        for vname, rhs in self.search_opts.items():
+
+            # the search algorithms
+            if vname == self.__ARMS:
+                if not isinstance(rhs, (list, tuple)) or not rhs or not all([isinstance(a, str) for a in rhs]):
+                    err('orio.main.tuner.search.portfolio: %s argument "%s" must be a non-empty list of search algorithm names'
+                        % (self.__class__.__name__, vname))
+                if [a for a in rhs if a.lower() == 'portfolio']:
+                    err('orio.main.tuner.search.portfolio: %s argument "%s" cannot contain the portfolio search itself'
+                        % (self.__class__.__name__, vname))
+                self.arm_names = list(rhs)
+
+            # the number of new runs of a turn
+            elif vname == self.__SLICE:
+                if not isinstance(rhs, int) or rhs <= 0:
+                    err('orio.main.tuner.search.portfolio: %s argument "%s" must be a positive integer'
+                        % (self.__class__.__name__, vname))
+                self.slice = rhs
+
+            # the exploration coefficient
+            elif vname == self.__EXPLORATION:
+                if not isinstance(rhs, (int, float)) or rhs < 0:
+                    err('orio.main.tuner.search.portfolio: %s argument "%s" must be a non-negative number'
+                        % (self.__class__.__name__, vname))
+                self.exploration = rhs
+
+            # the discount factor
+            elif vname == self.__DISCOUNT:
+                if not isinstance(rhs, (int, float)) or rhs <= 0 or rhs > 1:
+                    err('orio.main.tuner.search.portfolio: %s argument "%s" must be a number in (0,1]'
+                        % (self.__class__.__name__, vname))
+                self.discount = rhs
+
+            # an argument of an arm (read by the arm)
+            elif vname.startswith(arm_prefixes):
+                pass
+
+            # unrecognized algorithm-specific argument
+            else:
+                err('orio.main.tuner.search.portfolio: unrecognized %s algorithm-specific argument: "%s"' %
+                    (self.__class__.__name__, vname))
+
+    #-----------------------------------------------------
+
+    def __best(self):
+        '''Return the best coordinate of the shared records and its (mean) cost'''
+
+        best_coord, best_perf = None, self.MAXFLOAT
+        for key, (perf_cost, _) in list(self.perf_cost_records.items()):
+            try:
+                costs = [float(x) for x in perf_cost]
+                cost = sum(costs) / len(costs)
+            except Exception:
+                continue
+            if cost < best_perf:
+                best_coord, best_perf = eval(key), cost
+        return best_coord, best_perf
+
+    def __choose(self):
+        '''Return the arm getting the next turn (discounted UCB1), or None if all arms have finished'''
+
+        arms = [a for a in self.arms if not a.done]
+        if not arms:
+            return None
+        for arm in arms:
+            if arm.turns == 0:
+                return arm
+        total = sum([a.weight for a in arms])
+        def score(arm):
+            if arm.weight <= 0:
+                return self.MAXFLOAT
+            return arm.reward / arm.weight + self.exploration * math.sqrt(math.log(max(total, 1.0)) / arm.weight)
+        return max(arms, key=score)
+
+    #-----------------------------------------------------
+
+    def __play(self, arm, quota, limit):
+        '''
+        To let the given arm run until it has made the given number of new runs (or has finished);
+        a batch of coordinates may exceed the quota, but not the limit of the whole budget
+        '''
+
+        with self.__cond:
+            arm.quota, arm.limit, arm.used, arm.calls = quota, limit, 0, 0
+            self.__turn = arm
+            self.__cond.notify_all()
+            while self.__turn is arm:
+                self.__cond.wait()
+
+    def __stop(self):
+        '''To end the threads of the arms'''
+
+        with self.__cond:
+            self.__stopping = True
+            self.__cond.notify_all()
+        for arm in self.arms:
+            if arm.thread is not None:
+                arm.thread.join()
+
+    def __waitTurn(self, arm, handover):
+        '''To wait (in the thread of the given arm) for its turn, after handing the turn back if requested'''
+
+        with self.__cond:
+            if handover:
+                self.__turn = None
+                self.__cond.notify_all()
+            while self.__turn is not arm and not self.__stopping:
+                self.__cond.wait()
+            if self.__stopping:
+                raise _ArmStopped()
+
+    def __armMain(self, arm):
+        '''The thread of the given arm'''
+
+        try:
+            self.__waitTurn(arm, False)
+            arm.search.searchBestCoord()
+        except _ArmStopped:
+            pass
+        except BaseException as e:
+            warn('orio.main.tuner.search.portfolio: the %s arm failed, removing it from the portfolio\n --> %s: %s'
+                 % (arm.name, e.__class__.__name__, e))
+        with self.__cond:
+            arm.done = True
+            if self.__turn is arm:
+                self.__turn = None
+            self.__cond.notify_all()
+
+    def __armPerfCosts(self, arm):
+        '''Return the getPerfCosts method of the given arm, which takes turns with the other arms'''
+
+        def getPerfCosts(coords):
+            # an arm that keeps requesting tested coordinates also hands over the turn eventually
+            if arm.used >= arm.quota or arm.calls >= 10 * arm.quota:
+                self.__waitTurn(arm, True)
+            arm.calls += 1
+
+            # test the coordinates that fit in the budget, then end the search
+            if arm.limit is not None:
+                new = []
+                for coord in coords:
+                    if str(coord) not in self.perf_cost_records and coord not in new:
+                        new.append(coord)
+                if arm.used + len(new) > arm.limit:
+                    self.__test(arm, new[:arm.limit - arm.used])
+                    self.__waitTurn(arm, True)
+
+            return self.__test(arm, coords)
+        return getPerfCosts
+
+    def __test(self, arm, coords):
+        '''To test the given coordinates of the given arm, counting its new runs'''
+
+        before = len(self.perf_cost_records)
+        perf_costs = orio.main.tuner.search.search.Search.getPerfCosts(arm.search, coords)
+        arm.used += len(self.perf_cost_records) - before
+        return perf_costs
@@ -151,25 +151,34 @@ class Randomsearch(orio.main.tuner.search.search.Search):
         random.shuffle(remain_indices)
         indices.extend(remain_indices)
 
+        # (with a batch system, the coordinates are evaluated asynchronously: the results are processed
+        # in the order the jobs complete, while the next coordinates keep the queue full)
+        if self.total_runs > 0:
+            indices = indices[:self.total_runs]
+        ordered_coords = [uneval_coords[index] for index in indices]
+        evaluated = self.iterPerfCosts(ordered_coords)
+
         perf_cost, mean_perf_cost = self.MAXFLOAT, self.MAXFLOAT
-        for index in indices:
-            coord=uneval_coords[index]
+        while True:
+            try:
+                coord, perf_costs = next(evaluated)
+            except StopIteration:
+                break
+            except Exception as e:
+                # the failure is charged to the next unevaluated coordinate; the rest are evaluated anew
+                remaining = [c for c in ordered_coords if c not in eval_coords]
+                coord, perf_costs = remaining[0], {str(remaining[0]): [self.MAXFLOAT]}
+                info('FAILED: %s %s' % (e.__class__.__name__, e))
+                fruns +=1
+                evaluated = self.iterPerfCosts(remaining[1:])
             coord_key = str(coord)
-            params=uneval_params[index]
+            params=self.coordToPerfParams(coord)
             eval_coords.append(coord)
             eval_params.append(params)
 
             debug(msg='Parameter values: ' + str(params), obj=self, level=2)
             runs += 1
 
-            perf_costs={}
-            try:
-                perf_costs = self.getPerfCosts([coord])
-            except Exception as e:
-                perf_costs[str(coords)]=[self.MAXFLOAT]
-                info('FAILED: %s %s' % (e.__class__.__name__, e))
-                fruns +=1
-
             # compare to the best result
             pcost_items = sorted(list(perf_costs.items()))
             for i, (coord_str, pcost) in enumerate(pcost_items):
@@ -218,6 +227,8 @@ class Randomsearch(orio.main.tuner.search.search.Search):
             if self.total_runs > 0 and runs >= self.total_runs:
                 break
 
+        # (cancels the submitted codes whose results are no longer needed)
+        evaluated.close()
 
         info('Best performance = ' + str(best_perf_cost))
         info('Best coordinate = ' + str(best_coord))
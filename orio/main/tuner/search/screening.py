@@ -0,0 +1,229 @@
+#
+# Parameter-sensitivity screening of the search space, run before the search algorithm
+#
+
+import math, random
+from orio.main.util.globals import *
+import orio.main.tuner.search.search
+
+#-----------------------------------------------------
+
+class Screening(orio.main.tuner.search.search.Search):
+    '''
+    Estimates the importance of each performance parameter from a small number of measured
+    coordinates, and freezes the unimportant parameters at their value in the best measured
+    coordinate, so that the search algorithm explores a smaller space.
+
+    The importance of a parameter is the mean absolute effect on the logarithm of the cost of
+    moving the parameter across its range, estimated either with Morris elementary effects
+    (one-at-a-time moves along random trajectories) or with a two-level fractional factorial
+    design (the lowest and highest value of each parameter, following the columns of a Hadamard
+    matrix).
+
+    Settings (the screening argument of the search section):
+      method        'morris' (default) or 'factorial'
+      trajectories  the number of Morris trajectories (default: 4); a trajectory measures at most
+                    one coordinate more than the number of parameters
+      budget        the maximum number of measured coordinates (default: no limit)
+      threshold     the share of the total importance below which a parameter is frozen (default: 0.05)
+      keep          the minimum number of parameters left free (default: 1)
+      seed          the seed of the random trajectories (default: the global random state)
+    '''
+
+    METHODS = ('morris', 'factorial')
+
+    def __init__(self, params, settings):
+        '''To instantiate a parameter screening'''
+
+        orio.main.tuner.search.search.Search.__init__(self, params)
+
+        settings = dict(settings or {})
+        self.method = settings.pop('method', 'morris')
+        self.trajectories = settings.pop('trajectories', 4)
+        self.budget = settings.pop('budget', None)
+        self.threshold = settings.pop('threshold', 0.05)
+        self.keep = settings.pop('keep', 1)
+        seed = settings.pop('seed', None)
+        if settings:
+            err('orio.main.tuner.search.screening: unknown screening settings: %s' % ', '.join(sorted(settings)),
+                doexit=True)
+        if self.method not in self.METHODS:
+            err('orio.main.tuner.search.screening: the screening method must be one of %s: %s' %
+                (', '.join(self.METHODS), self.method), doexit=True)
+        if not isinstance(self.trajectories, int) or self.trajectories < 1:
+            err('orio.main.tuner.search.screening: the number of trajectories must be a positive integer',
+                doexit=True)
+        if self.budget is not None and (not isinstance(self.budget, int) or self.budget < 2):
+            err('orio.main.tuner.search.screening: the screening budget must be an integer greater than 1',
+                doexit=True)
+        if not isinstance(self.threshold, (int, float)) or not 0 <= self.threshold < 1:
+            err('orio.main.tuner.search.screening: the screening threshold must be a fraction in [0,1)',
+                doexit=True)
+        if not isinstance(self.keep, int) or self.keep < 0:
+            err('orio.main.tuner.search.screening: keep must be a non-negative integer', doexit=True)
+
+        self.random = random.Random(seed) if seed is not None else random
+        self.runs = 0
+        self.best_coord = None
+        self.best_cost = self.MAXFLOAT
+
+    #-----------------------------------------------------
+
+    def __isValid(self, coord):
+        '''Return True if the given coordinate satisfies the performance parameter constraints'''
+        try:
+            return bool(eval(self.constraint, self.coordToPerfParams(coord), dict(self.input_params or [])))
+        except Exception:
+            return False
+
+    def __measure(self, coord):
+        '''Return the logarithm of the mean cost of the given coordinate, or None if it cannot be measured'''
+
+        if self.budget is not None and self.runs >= self.budget and str(coord) not in self.perf_cost_records:
+            return None
+        if not self.__isValid(coord):
+            return None
+        if str(coord) not in self.perf_cost_records:
+            self.runs += 1
+        try:
+            perf_cost = self.getPerfCost(coord)
+            cost = sum([float(c) for c in perf_cost]) / len(perf_cost)
+        except Exception as e:
+            info('orio.main.tuner.search.screening: %s failed: %s: %s' % (coord, e.__class__.__name__, e))
+            return None
+        if not 0 < cost < self.MAXFLOAT:
+            return None
+        if cost < self.best_cost:
+            self.best_coord, self.best_cost = list(coord), cost
+        return math.log(cost)
+
+    def __exhausted(self):
+        '''Return True if the screening budget is spent'''
+        return self.budget is not None and self.runs >= self.budget
+
+    #-----------------------------------------------------
+
+    def __randomValidCoord(self):
+        '''Return a random coordinate satisfying the constraints (or None if none is found)'''
+
+        for _ in range(100):
+            coord = [self.random.randrange(u) for u in self.dim_uplimits]
+            if self.__isValid(coord):
+                return coord
+        return None
+
+    def __morris(self, axes):
+        '''Return the elementary effects of the given axes, measured along random trajectories'''
+
+        effects = dict([(d, []) for d in axes])
+        for _ in range(self.trajectories):
+            coord = self.__randomValidCoord()
+            if coord is None or self.__exhausted():
+                break
+            cost = self.__measure(coord)
+            if cost is None:
+                continue
+            order = list(axes)
+            self.random.shuffle(order)
+            for d in order:
+                if self.__exhausted():
+                    break
+                levels = self.dim_uplimits[d]
+                step = max(1, levels // 2)
+                moved = list(coord)
+                moved[d] = coord[d] + step if coord[d] + step < levels else coord[d] - step
+                moved_cost = self.__measure(moved)
+                if moved_cost is None:
+                    continue
+                effects[d].append(abs(moved_cost - cost) * (levels - 1) / float(step))
+                coord, cost = moved, moved_cost
+        return effects
+
+    def __factorial(self, axes):
+        '''Return the main effects of the given axes, measured with a two-level fractional factorial design'''
+
+        # a Sylvester-Hadamard matrix with more columns than axes
+        size = 1
+        while size <= len(axes):
+            size *= 2
+        hadamard = [[1]]
+        while len(hadamard) < size:
+            hadamard = [row + row for row in hadamard] + [row + [-x for x in row] for row in hadamard]
+
+        base = self.best_coord or [r // 2 for r in self.dim_uplimits]
+        results = []
+        for row in hadamard:
+            coord = list(base)
+            for k, d in enumerate(axes):
+                coord[d] = self.dim_uplimits[d] - 1 if row[k + 1] > 0 else 0
+            cost = self.__measure(coord)
+            if cost is not None:
+                results.append((row, cost))
+
+        effects = dict([(d, []) for d in axes])
+        for k, d in enumerate(axes):
+            high = [c for row, c in results if row[k + 1] > 0]
+            low = [c for row, c in results if row[k + 1] < 0]
+            if high and low:
+                effects[d].append(abs(sum(high) / len(high) - sum(low) / len(low)))
+        return effects
+
+    #-----------------------------------------------------
+
+    def screen(self):
+        '''
+        Estimate the importance of the performance parameters and freeze the unimportant ones.
+        Return the axis value ranges of the reduced search space (a single value for each frozen
+        parameter), the measured performance costs keyed by the coordinates of the reduced space,
+        and the number of measured coordinates.
+        '''
+
+        axes = [d for d in range(self.total_dims) if self.dim_uplimits[d] > 1]
+        if not axes:
+            return self.axis_val_ranges, {}, 0
+
+        if self.method == 'morris':
+            effects = self.__morris(axes)
+        else:
+            effects = self.__factorial(axes)
+
+        # the importance of each parameter (None if none of its effects could be measured)
+        importance = dict([(d, sum(e) / len(e) if e else None) for d, e in effects.items()])
+        total = sum([v for v in importance.values() if v is not None])
+
+        # freeze the least important parameters, keeping the parameters without an estimate
+        frozen = []
+        if self.best_coord is not None and total > 0:
+            ranked = sorted([d for d in axes if importance[d] is not None], key=lambda d: -importance[d])
+            kept = len([d for d in axes if importance[d] is None])
+            for d in ranked:
+                if kept >= self.keep and importance[d] / total < self.threshold:
+                    frozen.append(d)
+                else:
+                    kept += 1
+
+        # report the importance table
+        info('----- begin parameter screening (%s, %d runs) -----' % (self.method, self.runs))
+        info(' %-24s %12s %8s  %s' % ('parameter', 'importance', 'share', 'status'))
+        for d in sorted(axes, key=lambda d: -(importance[d] or 0)):
+            if importance[d] is None:
+                info(' %-24s %12s %8s  free (not estimated)' % (self.axis_names[d], '-', '-'))
+                continue
+            share = importance[d] / total if total > 0 else 0.0
+            status = 'free'
+            if d in frozen:
+                status = 'frozen at %s' % self.axis_val_ranges[d][self.best_coord[d]]
+            info(' %-24s %12.4g %8.3f  %s' % (self.axis_names[d], importance[d], share, status))
+        info('----- end parameter screening -----')
+        Globals().metadata['screening'] = dict([(self.axis_names[d], importance[d]) for d in axes])
+
+        # the reduced search space, and the costs measured in it
+        axis_val_ranges = [([r[self.best_coord[d]]] if d in frozen else r)
+                           for d, r in enumerate(self.axis_val_ranges)]
+        records = {}
+        for key, perf_cost in self.perf_cost_records.items():
+            coord = eval(key)
+            if [d for d in frozen if coord[d] != self.best_coord[d]]:
+                continue
+            records[str([(0 if d in frozen else c) for d, c in enumerate(coord)])] = perf_cost
+        return axis_val_ranges, records, self.runs
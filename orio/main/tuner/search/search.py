@@ -1,8 +1,11 @@
 #
 # The search engine used for search space exploration
 #
-import sys, math, time
+import sys, math, time, itertools
 from orio.main.util.globals import *
+from orio.main.tuner.runtime_params import RuntimeParamModel, classifyParams
+from orio.main.tuner.search import confirmation, pgo
+import orio.main.code_frag
 from functools import reduce
 
 class Search:
@@ -10,6 +13,12 @@ class Search:
 
     MAXFLOAT = float('inf')
 
+    # the relative cost difference under which the hardware-counter tie-breaker decides between coordinates
+    TIE_TOLERANCE = 0.02
+
+    # the maximum number of transformed codes kept for reuse by the variants differing only in build axes
+    SOURCE_CODES = 64
+
     #----------------------------------------------------------
     
     def __init__(self, params):
@@ -61,6 +70,7 @@ class Search:
         else: self.ptcodegen = None
         if 'ptdriver' in list(params.keys()): self.ptdriver = params['ptdriver']
         else: self.ptdriver = None
+        self.use_batch_queue = getattr(self.ptdriver, 'batch_queue', None) is not None
         if 'odriver' in list(params.keys()): self.odriver = params['odriver']
         else: self.odriver = None
         self.input_params = params.get('input_params')
@@ -72,6 +82,67 @@ class Search:
         self.transform_time={}
         self.best_coord_info="None"
 
+        # the performance parameters that may be set at run time, so that the coordinates differing only
+        # in their values are tested by a single runtime-parametric executable (sequential C tests only)
+        self.runtime_candidates = []
+        self.runtime_probes = {}
+        self.runtime_names = None
+        self.runtime_models = {}
+        self.runtime_sweep = None
+        tinfo = getattr(self.ptdriver, 'tinfo', None)
+        if tinfo is not None and getattr(tinfo, 'runtime_params', None) and self.axis_names:
+            if (self.use_parallel_search or self.use_batch_queue or Globals().validationMode
+                    or Globals().language != 'c' or getattr(self.ptcodegen, 'skeleton_code_file', None)):
+                warn('orio.main.tuner.search: run-time performance parameters require sequential C tests ' +
+                     'with the default skeleton code, ignoring runtime_params')
+            else:
+                candidates = None if tinfo.runtime_params is True else tinfo.runtime_params
+                self.runtime_candidates, self.runtime_probes = classifyParams(self.axis_names, self.axis_val_ranges,
+                                                                              candidates)
+                self.runtime_sweep = tinfo.runtime_sweep
+
+        # the compiler flags and the command-line parameters do not change the generated source, so the
+        # coordinates differing only in their values reuse the transformed code (see __transform)
+        cflags = [n for n, _ in (getattr(tinfo, 'cflag_params', None) or [])]
+        self.build_axes = [n for n in self.axis_names if n in cflags or n.startswith('__cmdline_')]
+        self.source_codes = {}
+        self.source_reused = 0
+
+        # the static cost model estimating the cost of each variant from its transformed loop AST; with
+        # a filter fraction, the variants estimated slower than that fraction of the variants seen so far
+        # are not measured (see orio.module.loop.cost_model)
+        self.cost_model = None
+        self.cost_filter = None
+        self.cost_warmup = 10
+        self.static_costs = {}
+        self.static_codes = {}
+        self.static_pruned = 0
+        cost_model = getattr(tinfo, 'cost_model', None)
+        if cost_model is not None:
+            settings = dict(cost_model)
+            self.cost_filter = settings.pop('filter', None)
+            self.cost_warmup = settings.pop('warmup', 10)
+            if self.cost_filter is not None and (not isinstance(self.cost_filter, (int, float))
+                                                 or not 0 < self.cost_filter <= 1):
+                err('orio.main.tuner.search: the cost model filter must be a fraction in (0,1]', doexit=True)
+            if not isinstance(self.cost_warmup, int) or self.cost_warmup < 0:
+                err('orio.main.tuner.search: the cost model warmup must be a non-negative integer', doexit=True)
+            self.createCostModel(settings)
+
+        # the hardware counter (measured by the perf_event counting method) deciding between the coordinates
+        # whose costs are within TIE_TOLERANCE of the best one
+        self.tie_break = getattr(tinfo, 'pcount_tie_break', None)
+
+        # the interleaved confirmation of the best coordinate against the runners-up (see confirmBest)
+        self.confirmation = None
+        if getattr(tinfo, 'confirmation', None) is not None:
+            self.confirmation = confirmation.readSettings(tinfo.confirmation)
+
+        # the profile-guided rebuild and re-ranking of the best coordinates (see finalizePGO)
+        self.pgo = None
+        if getattr(tinfo, 'pgo', None) is not None:
+            self.pgo = pgo.readSettings(tinfo.pgo)
+
         # TODO pass it as an option
         #        if 'use_z3' in params.keys():
         try:
@@ -106,6 +177,13 @@ class Search:
         By default, returns False, can be overridden by subclasses.
         '''
         return False
+
+    def createCostModel(self, settings=None):
+        '''To create the static cost model with the given settings'''
+
+        from orio.module.loop.cost_model import StaticCostModel
+        self.cost_model = StaticCostModel(settings)
+        self.cost_model.params = dict(self.input_params or [])
     
     #----------------------------------------------------------
 
@@ -131,17 +209,48 @@ class Search:
             corr_transfer = best_perf[1]
             best_perf     = best_perf[0]
 
+        # among near-equal costs, prefer the coordinate with the fewest tie-breaker counter events
+        if best_coord != None and self.tie_break:
+            best_coord, best_perf = self.__breakTie(best_coord, best_perf)
+
+        # measure the best coordinate and the runners-up alternately, and keep a significantly faster one
+        if (best_coord != None and self.confirmation and not Globals().extern and not self.modelBased()
+                and not self.use_batch_queue and not self.use_parallel_search):
+            challengers = self.__runnersUp(best_coord, self.confirmation['challengers'])
+            if challengers:
+                winner = self.confirmBest(best_coord, challengers)
+                if winner != best_coord:
+                    best_coord = winner
+                    costs = [float(c) for c in self.perf_cost_records[str(winner)][0]]
+                    best_perf = sum(costs) / len(costs)
+
+        # rebuild the best coordinates with profile feedback, and keep the fastest of them
+        if (best_coord != None and self.pgo and not Globals().extern and not self.modelBased()
+                and not self.use_batch_queue and not self.use_parallel_search):
+            finalists = [best_coord] + self.__runnersUp(best_coord, self.pgo['finalists'] - 1)
+            best_coord, pgo_perf = self.finalizePGO(finalists)
+            if pgo_perf < self.MAXFLOAT:
+                best_perf = pgo_perf
+
         # if no best coordinate can be found
         if best_coord == None:
             err ('the search cannot find a valid set of performance parameters. ' +
-                 'the search time limit might be too short, or the performance parameter ' +
-                 'constraints might prune out the entire search space.')
+                 'the search time limit might be too short, the performance parameter ' +
+                 'constraints might prune out the entire search space, or all tested variants ' +
+                 'failed to build or timed out.', doexit=True)
         else:
-            self.best_coord_info = '%s=%s, cost=%e, transfer_time=%e, inputs=%s, search_space=%1.3e, search_time=%.2f, runs=%d' \
+            self.best_coord_info = '%s=%s, cost=%e, transfer_time=%e, inputs=%s, search_space=%1.3e, search_time=%.2f, runs=%d, cache_mode=%s' \
                                    % (best_coord, self.coordToPerfParams(best_coord), best_perf, corr_transfer, str(self.input_params), \
-                                   self.space_size, search_time, runs)
+                                   self.space_size, search_time, runs, Globals().metadata.get('cache_mode', 'back-to-back'))
             info('----- begin summary -----')
             info(' best coordinate: %s' % self.best_coord_info)
+            counters = self.getCounters(best_coord)
+            if counters:
+                info(' hardware counters: %s' % ', '.join(['%s=%.4g' % (n, counters[n]) for n in sorted(counters)]))
+            if self.static_pruned:
+                info(' variants pruned by the static cost model: %d' % self.static_pruned)
+            if self.source_reused:
+                info(' variants reusing the transformed code of another variant: %d' % self.source_reused)
             info('----- end summary -----')
 
                 
@@ -160,6 +269,143 @@ class Search:
 
     #----------------------------------------------------------
 
+    def getCounters(self, coord):
+        '''
+        Return the mean values of the hardware counters measured for the given coordinate, indexed by
+        counter name (empty unless the perf_event counting method is used)
+        '''
+
+        values = (getattr(self.ptdriver, 'counters', None) or {}).get(str(coord), {})
+        return dict([(name, sum(v) / float(len(v))) for name, v in values.items() if v])
+
+    def __runnersUp(self, best_coord, count):
+        '''Return the given number of measured coordinates with the lowest mean costs after the given one'''
+
+        ranked = []
+        for key, (costs, _) in list(self.perf_cost_records.items()):
+            costs = [float(c) for c in costs]
+            coord = eval(key)
+            if (key == str(best_coord) or not costs or not isinstance(coord, list) or len(coord) != self.total_dims
+                    or not max(costs) < self.MAXFLOAT):
+                continue
+            ranked.append((sum(costs) / len(costs), key, coord))
+        return [coord for _, _, coord in sorted(ranked)[:count]]
+
+    def confirmBest(self, incumbent, challengers):
+        '''
+        Measure the incumbent coordinate and the given challengers alternately, in round-robin order
+        within a single time window, and return the challenger that is the fastest in the paired
+        comparison with the incumbent, if it is significantly faster (sign test of the rounds), or
+        else the incumbent. Search algorithms may also call it to decide close comparisons with their
+        running best.
+        '''
+
+        settings = self.confirmation or confirmation.readSettings(None)
+        test_codes = []
+        for coord in [incumbent] + list(challengers):
+            key = str(coord)
+            perf_params = self.coordToPerfParams(coord)
+            try:
+                transformed_code, _, externals = self.__transform(perf_params, key)[0]
+            except Exception as e:
+                info('confirmation: cannot transform %s: %s: %s' % (key, e.__class__.__name__, e))
+                continue
+            test_codes.append((key, self.ptcodegen.generate({key: (transformed_code, externals)}), perf_params))
+        if len(test_codes) < 2 or test_codes[0][0] != str(incumbent):
+            return incumbent
+
+        round_costs = self.ptdriver.runInterleaved(test_codes, settings['rounds'])
+        base_costs = round_costs[str(incumbent)]
+
+        info('----- begin interleaved confirmation (%d rounds) -----' % settings['rounds'])
+        info(' %-24s %10s %8s %10s  %s' % ('challenger', 'ratio', 'wins', 'p-value', 'status'))
+        winner, winner_ratio = incumbent, 1.0
+        for key, _, _ in test_codes[1:]:
+            ratio, wins, n, p_value = confirmation.pairedComparison(round_costs[key], base_costs)
+            significant = ratio < 1 and p_value <= settings['alpha']
+            info(' %-24s %10.4f %8s %10.4f  %s' % (key, ratio, '%d/%d' % (wins, n), p_value,
+                                                   'faster' if significant else 'not significant'))
+            if significant and ratio < winner_ratio:
+                winner, winner_ratio = eval(key), ratio
+        if winner != incumbent:
+            info(' %s replaces %s as the best coordinate' % (winner, incumbent))
+        info('----- end interleaved confirmation -----')
+        return winner
+
+    def finalizePGO(self, finalists):
+        '''
+        Rebuild the given coordinates with profile feedback (instrumented builds, training runs and
+        builds using the recorded profiles), measure the rebuilt coordinates alternately, and return
+        the fastest of them and its mean cost (the first coordinate and infinity if none could be measured)
+        '''
+
+        settings = self.pgo or pgo.readSettings(None)
+        test_codes = []
+        for coord in finalists:
+            key = str(coord)
+            perf_params = self.coordToPerfParams(coord)
+            try:
+                transformed_code, _, externals = self.__transform(perf_params, key)[0]
+            except Exception as e:
+                info('pgo: cannot transform %s: %s: %s' % (key, e.__class__.__name__, e))
+                continue
+            test_codes.append((key, self.ptcodegen.generate({key: (transformed_code, externals)}), perf_params))
+        if not test_codes:
+            return finalists[0], self.MAXFLOAT
+
+        round_costs = self.ptdriver.runPGO(test_codes, settings)
+
+        def mean(costs):
+            costs = [float(c) for c in costs]
+            return sum(costs) / len(costs) if costs else self.MAXFLOAT
+
+        info('----- begin profile-guided finalization (%d rounds) -----' % settings['rounds'])
+        info(' %-24s %12s %12s %8s' % ('coordinate', 'cost', 'pgo cost', 'ratio'))
+        winner, winner_cost = finalists[0], self.MAXFLOAT
+        for key, _, _ in test_codes:
+            cost = mean(self.perf_cost_records.get(key, ([], []))[0])
+            pgo_cost = mean(round_costs[key])
+            ratio = pgo_cost / cost if 0 < cost < self.MAXFLOAT else float('nan')
+            info(' %-24s %12.4g %12.4g %8.3f' % (key, cost, pgo_cost, ratio))
+            if pgo_cost < winner_cost:
+                winner, winner_cost = eval(key), pgo_cost
+        if winner != finalists[0] and winner_cost < self.MAXFLOAT:
+            info(' %s replaces %s as the best coordinate with profile feedback' % (winner, finalists[0]))
+        info('----- end profile-guided finalization -----')
+        Globals().metadata['pgo'] = True
+        return winner, winner_cost
+
+    def __breakTie(self, best_coord, best_perf):
+        '''
+        Return the measured coordinate (and its cost) with the fewest tie-breaker counter events among
+        the coordinates whose mean cost is within TIE_TOLERANCE of that of the given best coordinate
+        '''
+
+        def mean(costs):
+            costs = [float(c) for c in costs]
+            return sum(costs) / len(costs) if costs else self.MAXFLOAT
+
+        best_key = str(best_coord)
+        if best_key not in self.perf_cost_records:
+            return best_coord, best_perf
+        limit = mean(self.perf_cost_records[best_key][0]) * (1 + self.TIE_TOLERANCE)
+        candidates = []
+        for key, (costs, _) in list(self.perf_cost_records.items()):
+            events = self.getCounters(key).get(self.tie_break)
+            if events is not None and mean(costs) <= limit:
+                candidates.append((events, key != best_key, key))
+        if not candidates:
+            return best_coord, best_perf
+        events, _, key = min(candidates)
+        if key != best_key:
+            info('tie-breaker: %s (%s=%.4g) replaces %s (%s=%.4g), their costs are within %g%%'
+                 % (key, self.tie_break, events, best_key, self.tie_break,
+                    self.getCounters(best_key).get(self.tie_break, self.MAXFLOAT), 100 * self.TIE_TOLERANCE))
+            best_coord, best_perf = eval(key), mean(self.perf_cost_records[key][0])
+        return best_coord, best_perf
+
+    #----------------------------------------------------------
+
     def coordToPerfParams(self, coord):
         """
         Convert coordinate to the corresponding performance parameters
@@ -215,8 +461,298 @@ class Search:
         @param coords:  all search space coordinates
         '''
 
+        if self.runtime_candidates and not self.modelBased():
+            return self.__getSweptPerfCosts(coords)
+
+        perf_costs, code_map, uneval_coords, perf_params, coord_key = self.__prepareCodes(coords)
+        if code_map == {}: # nothing to test
+            return perf_costs
+
+        # with a batch system, every variant is a separate job; wait until all of them are harvested
+        if self.use_batch_queue and not self.modelBased():
+            perf_costs.update(self.__submitCodes(code_map))
+            while [k for k in code_map if k not in self.perf_cost_records] and self.ptdriver.pendingJobs():
+                self.harvestPerfCosts(wait=True)
+            for key in code_map:
+                perf_costs[key] = self.perf_cost_records.get(key, ([self.MAXFLOAT],[self.MAXFLOAT]))
+            return perf_costs
+
+        #debug("search.py: about to test the following code segments (code_map):\n%s" % code_map, level=1)
+        
+        
+        # Evaluate the performance costs for all coordinates
+        new_perf_costs = None
+        if self.modelBased():
+            new_perf_costs = self.getModelPerfCosts(perf_params=perf_params,coord=coord_key)
+        if not new_perf_costs:
+            # a sequential test code holds a single variant, a parallel one a variant per process:
+            # test the codes in as many runs as needed
+            keys = list(code_map.keys())
+            count = self.num_procs if self.use_parallel_search else 1
+            new_perf_costs = {}
+            for i in range(0, len(keys), max(count, 1)):
+                test_code = self.ptcodegen.generate(dict([(k, code_map[k]) for k in keys[i:i + count]]))
+                perf_params = self.coordToPerfParams(eval(keys[i]))
+                new_perf_costs.update(self.ptdriver.run(test_code, perf_params=perf_params, coord=keys[i]))
+            # variants that failed to build or timed out are recorded as infinitely slow
+            for key in code_map:
+                if key not in new_perf_costs:
+                    new_perf_costs[key] = ([self.MAXFLOAT],[self.MAXFLOAT])
+        #new_perf_costs = self.getPerfCostConfig(coord_key,perf_params)
+        # remember the performance cost of previously evaluated coordinate
+        self.perf_cost_records.update(list(new_perf_costs.items()))
+        # merge the newly obtained performance costs
+        perf_costs.update(list(new_perf_costs.items()))
+        # also take the compile time
+        
+
+        #sys.exit()
+
+        #return the performance cost
+
+        return perf_costs
+
+    #----------------------------------------------------------
+
+    def submitPerfCosts(self, coords):
+        '''
+        Submit the codes corresponding to the given coordinates for evaluation without waiting for
+        the results (the "ask" half of an asynchronous ask/tell search; requires a batch system).
+        @param coords:  search space coordinates
+        @return: the performance costs that are known without testing (invalid or already evaluated coordinates)
+        '''
+        if not self.use_batch_queue:
+            err('orio.main.tuner.search: asynchronous evaluation requires a batch_system in the build section',
+                doexit=True)
+        perf_costs, code_map, _, _, _ = self.__prepareCodes(coords)
+        perf_costs.update(self.__submitCodes(code_map))
+        return perf_costs
+
+    def harvestPerfCosts(self, wait=False):
+        '''
+        Collect the performance costs of the submitted codes that have completed since the last call
+        (the "tell" half of an asynchronous ask/tell search).
+        @param wait: if True, block until at least one submitted code completes
+        @return: a dictionary of the performance costs of the completed coordinates
+        '''
+        new_perf_costs = self.ptdriver.harvest(wait)
+        self.perf_cost_records.update(list(new_perf_costs.items()))
+        return new_perf_costs
+
+    def cancelPerfCosts(self):
+        '''To cancel the submitted codes whose results have not been harvested (their results are no longer needed)'''
+        if self.use_batch_queue:
+            self.ptdriver.cancelJobs()
+
+    def iterPerfCosts(self, coords):
+        '''
+        Evaluate the codes corresponding to the given coordinates, and yield each coordinate with its
+        performance costs as soon as they are known. Without a batch system, the coordinates are
+        evaluated one at a time, in order. With a batch system, num_procs of them are kept submitted:
+        the completed ones are harvested (in the order they complete) and replaced by the next ones.
+        The codes still submitted when the caller stops the iteration are cancelled.
+        @param coords:  search space coordinates
+        '''
+
+        if not self.use_batch_queue or self.modelBased() or self.runtime_candidates:
+            for coord in coords:
+                yield coord, self.getPerfCosts([coord])
+            return
+
+        pending = {}    # coordinate key --> coordinate, for the submitted codes
+        coords = list(coords)
+        try:
+            while coords or pending:
+                while coords and len(pending) < max(self.num_procs, 1):
+                    coord = coords.pop(0)
+                    known = self.submitPerfCosts([coord])
+                    if str(coord) in known:
+                        yield coord, {str(coord): known[str(coord)]}
+                    else:
+                        pending[str(coord)] = coord
+                if not pending:
+                    continue
+                new_perf_costs = self.harvestPerfCosts(wait=True)
+                if not new_perf_costs and not self.ptdriver.pendingJobs():
+                    # (jobs lost by the batch system are recorded as infinitely slow)
+                    for key in list(pending.keys()):
+                        self.perf_cost_records[key] = ([self.MAXFLOAT],[self.MAXFLOAT])
+                        new_perf_costs[key] = self.perf_cost_records[key]
+                for key, perf_cost in sorted(new_perf_costs.items()):
+                    if key in pending:
+                        yield pending.pop(key), {key: perf_cost}
+        finally:
+            if pending:
+                self.cancelPerfCosts()
+
+    def __submitCodes(self, code_map):
+        '''Submit a batch job for each code of the given map; return the costs of the failed submissions'''
+
+        perf_costs = {}
+        for key, code in list(code_map.items()):
+            test_code = self.ptcodegen.generate({key: code})
+            perf_params = self.coordToPerfParams(eval(key))
+            if not self.ptdriver.submit(test_code, perf_params=perf_params, coord=key):
+                perf_costs[key] = ([self.MAXFLOAT],[self.MAXFLOAT])
+                self.perf_cost_records[key] = perf_costs[key]
+        return perf_costs
+
+    #----------------------------------------------------------
+
+    def __variantKey(self, coord):
+        '''Return the key of the structural variant of the given coordinate (run-time axes shown as "*")'''
+        return '[%s]' % ', '.join([('*' if self.axis_names[i] in self.runtime_names else str(c))
+                                   for i, c in enumerate(coord)])
+
+    def __siblings(self, coord, limit):
+        '''Return (at most limit) valid unevaluated coordinates differing from the given one only in run-time axes'''
+
+        axes = [i for i in range(self.total_dims) if self.axis_names[i] in self.runtime_names]
+        siblings = []
+        for idx in itertools.product(*[list(range(self.dim_uplimits[i])) for i in axes]):
+            if limit is not None and len(siblings) >= limit:
+                break
+            sibling = list(coord)
+            for i, v in zip(axes, idx):
+                sibling[i] = v
+            if sibling != list(coord) and str(sibling) not in self.perf_cost_records and self.__isValid(sibling):
+                siblings.append(sibling)
+        return siblings
+
+    def __isValid(self, coord):
+        '''Return True if the given coordinate is in the search space and satisfies the constraints'''
+        if [i for i in range(self.total_dims) if coord[i] < 0 or coord[i] >= self.dim_uplimits[i]]:
+            return False
+        try:
+            return bool(eval(self.constraint, self.coordToPerfParams(coord), dict(self.input_params or [])))
+        except Exception:
+            return False
+
+    def __runtimeModel(self, coord):
+        '''
+        Return the runtime-parametric model of the structural variant of the given coordinate. The
+        model of the first variant classifies the candidate parameters into run-time and compile-time ones.
+        '''
+
+        def transform(perf_params):
+            try:
+                code, _, externals = self.odriver.optimizeCodeFrags(self.cfrags, perf_params)[0]
+                return code, externals
+            except Exception:
+                return None
+
+        if self.runtime_names is None:
+            model = RuntimeParamModel(transform, self.coordToPerfParams(coord), self.runtime_candidates,
+                                      self.runtime_probes)
+            self.runtime_names = model.names
+            info('run-time performance parameters: %s, compile-time performance parameters: %s'
+                 % (', '.join(model.names) or '-', ', '.join([n for n in self.axis_names if n not in model.names]) or '-'))
+            Globals().metadata['runtime_params'] = model.names
+            self.runtime_models[self.__variantKey(coord)] = model
+        variant_key = self.__variantKey(coord)
+        if variant_key not in self.runtime_models:
+            self.runtime_models[variant_key] = RuntimeParamModel(transform, self.coordToPerfParams(coord),
+                                                                 self.runtime_names, self.runtime_probes)
+        return self.runtime_models[variant_key]
+
+    def __getSweptPerfCosts(self, coords):
+        '''
+        Empirically evaluate the performance costs of the codes corresponding to the given coordinates,
+        together with (up to runtime_sweep) unevaluated coordinates of the same structural variants. The
+        codes of a structural variant that are instances of its runtime-parametric model are tested by a
+        single run; the others (and those whose runtime-parametric test failed) are tested one at a time.
+        '''
+
+        # classify the parameters (once)
+        if self.runtime_names is None:
+            valid = [c for c in coords if str(c) not in self.perf_cost_records and self.__isValid(c)]
+            if not valid:
+                return self.__prepareCodes(coords)[0]
+            self.__runtimeModel(valid[0])
+            if not self.runtime_names:
+                self.runtime_candidates = []
+                return self.getPerfCosts(coords)
+
+        all_coords = []
+        for coord in coords:
+            limit = self.runtime_sweep - 1 if self.runtime_sweep else None
+            for c in [coord] + self.__siblings(coord, limit):
+                if c not in all_coords:
+                    all_coords.append(c)
+        perf_costs, code_map, _, _, _ = self.__prepareCodes(all_coords)
+
+        # group the codes by structural variant
+        variants = {}
+        for key in code_map:
+            variants.setdefault(self.__variantKey(eval(key)), []).append(key)
+
+        new_perf_costs = {}
+        for variant_key, keys in list(variants.items()):
+            if len(keys) > 1:
+                model = self.__runtimeModel(eval(keys[0]))
+                sweep = []
+                for key in keys:
+                    perf_params = self.coordToPerfParams(eval(key))
+                    if model.names and model.matches(perf_params, code_map[key]):
+                        sweep.append((key, [perf_params[n] for n in model.names]))
+                if len(sweep) > 1:
+                    test_code = self.ptcodegen.generate({variant_key: model.parametricCode()}, model.vars)
+                    costs = self.ptdriver.run(test_code, perf_params=self.coordToPerfParams(eval(sweep[0][0])),
+                                              coord=variant_key, sweep=sweep)
+                    if not costs:
+                        # e.g., the runtime-parametric code does not compile: do not try again
+                        warn('orio.main.tuner.search: the runtime-parametric test of %s failed, testing its '
+                             'coordinates one at a time' % variant_key)
+                        model.names = []
+                    new_perf_costs.update(costs)
+            for key in keys:
+                if key not in new_perf_costs:
+                    test_code = self.ptcodegen.generate({key: code_map[key]})
+                    costs = self.ptdriver.run(test_code, perf_params=self.coordToPerfParams(eval(key)), coord=key)
+                    new_perf_costs[key] = costs.get(key, ([self.MAXFLOAT],[self.MAXFLOAT]))
+
+        self.perf_cost_records.update(list(new_perf_costs.items()))
+        perf_costs.update(list(new_perf_costs.items()))
+        return dict([(str(c), perf_costs.get(str(c), ([self.MAXFLOAT],[self.MAXFLOAT]))) for c in coords])
+
+    #----------------------------------------------------------
+
+    def __originalCode(self, cfrags):
+        '''Return the original code of the given code fragments (without the annotations)'''
+
+        code = ''
+        for cfrag in cfrags:
+            if isinstance(cfrag, orio.main.code_frag.AnnCodeRegion):
+                code += self.__originalCode(cfrag.cfrags)
+            elif isinstance(cfrag, orio.main.code_frag.NonAnn):
+                code += cfrag.code
+        return code
+
+    def __runReference(self, perf_params):
+        '''
+        To run the original code once for the current problem size, saving the reference results
+        of the checksum validation
+        '''
+
+        self.ptcodegen.reference_done = True
+        code, externals = self.__originalCode(self.cfrags or []), ''
+        if not code.strip():
+            warn('orio.main.tuner.search: no original code, the results are validated against the first variant')
+            code, _, externals = self.odriver.optimizeCodeFrags(self.cfrags, perf_params)[0]
+        info('running the reference code of the checksum validation')
+        self.ptdriver.run(self.ptcodegen.generate({'reference': (code, externals)}, reference=True))
+
+    def __prepareCodes(self, coords):
+        '''
+        Filter out the invalid and previously evaluated coordinates and transform the code of the others
+        @return: the known performance costs, the map of the transformed codes to be tested,
+                 the coordinates to be tested, and the performance parameters and key of the last one
+        '''
+
         # initialize the performance costs mapping
         perf_costs = {}
+        perf_params = None
+        coord_key = None
         
 
         # filter out all invalid coordinates and previously evaluated coordinates
@@ -259,11 +795,14 @@ class Search:
 
         # check the unevaluated coordinates
         if len(uneval_coords) == 0:
-            return perf_costs
+            return perf_costs, {}, uneval_coords, perf_params, coord_key
 
         #debug('search perf_params=' + str(perf_params))
         # execute the original code and obtain results for validation
-        if Globals().validationMode and not Globals().executedOriginal:
+        if getattr(self.ptcodegen, 'checksum', False):
+            if not self.ptcodegen.reference_done:
+                self.__runReference(perf_params)
+        elif Globals().validationMode and not Globals().executedOriginal:
             validation_map = {}
             transformed_code_seq = self.odriver.optimizeCodeFrags(self.cfrags, perf_params)
             transformed_code, _, externals = transformed_code_seq[0]
@@ -291,7 +830,11 @@ class Search:
                 start = time.time()
                 #info('1. transformation time = %e'%time.time())
                 try:
-                    transformed_code_seq = self.odriver.optimizeCodeFrags(self.cfrags, perf_params)
+                    if coord_key in self.static_codes:
+                        start -= self.transform_time.get(coord_key, 0.0)
+                        transformed_code_seq = self.static_codes.pop(coord_key)
+                    else:
+                        transformed_code_seq = self.__transform(perf_params, coord_key)
                     elapsed = (time.time() - start)
                     #info('2. transformation time = %e'%time.time())
                     self.transform_time[coord_key]=elapsed
@@ -309,6 +852,14 @@ class Search:
                     self.transform_time[coord_key]=elapsed
                     continue
             
+            # do not measure the variants that the static cost model estimates too slow
+            if self.__isPruned(coord_key):
+                debug('search: pruned %s, static cost %g' % (coord_key, self.static_costs[coord_key]), obj=self)
+                self.static_pruned += 1
+                perf_costs[coord_key] = ([self.MAXFLOAT],[self.MAXFLOAT])
+                self.perf_cost_records[coord_key] = perf_costs[coord_key]
+                continue
+
             #info('transformation time = %e' % self.transform_time)
             if transformed_code_seq:
                 if len(transformed_code_seq) != 1:
@@ -316,33 +867,72 @@ class Search:
     
                 transformed_code, _, externals = transformed_code_seq[0]
                 code_map[coord_key] = (transformed_code, externals)
-        if code_map == {}: # nothing to test
-            return perf_costs
-        #debug("search.py: about to test the following code segments (code_map):\n%s" % code_map, level=1)
-        
-        
-        # Evaluate the performance costs for all coordinates
-        new_perf_costs = None
-        if self.modelBased():
-            new_perf_costs = self.getModelPerfCosts(perf_params=perf_params,coord=coord_key)
-        if not new_perf_costs:
-            test_code = self.ptcodegen.generate(code_map)
-            perf_params = self.coordToPerfParams(uneval_coords[0])
-            new_perf_costs = self.ptdriver.run(test_code, perf_params=perf_params,coord=coord_key)
-        #new_perf_costs = self.getPerfCostConfig(coord_key,perf_params)
-        # remember the performance cost of previously evaluated coordinate
-        self.perf_cost_records.update(list(new_perf_costs.items()))
-        # merge the newly obtained performance costs
-        perf_costs.update(list(new_perf_costs.items()))
-        # also take the compile time
-        
+        return perf_costs, code_map, uneval_coords, perf_params, coord_key
 
-        #sys.exit()
+    #----------------------------------------------------------
 
-        #return the performance cost
+    def __transform(self, perf_params, coord_key):
+        '''Return the transformed code sequence of the given performance parameters, recording its static cost'''
+
+        # the transformed code of the same source parameters (with other compiler flags or command-line
+        # parameters) is reused
+        source_key = None
+        if self.build_axes:
+            source_key = str(sorted([(n, v) for n, v in perf_params.items() if n not in self.build_axes]))
+            if source_key in self.source_codes:
+                transformed_code_seq, static_cost = self.source_codes[source_key]
+                if static_cost is not None:
+                    self.static_costs[coord_key] = static_cost
+                self.source_reused += 1
+                return transformed_code_seq
+
+        if self.cost_model is None:
+            transformed_code_seq = self.odriver.optimizeCodeFrags(self.cfrags, perf_params)
+        else:
+            Globals().cost_model = self.cost_model
+            Globals().static_costs = []
+            try:
+                transformed_code_seq = self.odriver.optimizeCodeFrags(self.cfrags, perf_params)
+            finally:
+                Globals().cost_model = None
+            if Globals().static_costs:
+                self.static_costs[coord_key] = sum(Globals().static_costs)
+
+        if source_key is not None:
+            if len(self.source_codes) >= self.SOURCE_CODES:
+                del self.source_codes[next(iter(self.source_codes))]
+            self.source_codes[source_key] = (transformed_code_seq, self.static_costs.get(coord_key))
+        return transformed_code_seq
+
+    def __isPruned(self, coord_key):
+        '''Return True if the static cost of the given coordinate is above the filter fraction of the others'''
+
+        cost = self.static_costs.get(coord_key)
+        if self.cost_filter is None or cost is None or len(self.static_costs) <= self.cost_warmup:
+            return False
+        costs = sorted(self.static_costs.values())
+        threshold = costs[min(len(costs) - 1, int(math.ceil(self.cost_filter * len(costs))) - 1)]
+        return cost > threshold
+
+    def getStaticCost(self, coord):
+        '''
+        Return the cost of the given coordinate estimated by the static cost model (None if the transformed
+        code contains no loop that the model can estimate); the transformed code is kept for its measurement
+        '''
+
+        coord_key = str(coord)
+        if coord_key not in self.static_costs:
+            if self.cost_model is None:
+                self.createCostModel()
+            start = time.time()
+            try:
+                self.static_codes[coord_key] = self.__transform(self.coordToPerfParams(coord), coord_key)
+            except Exception as e:
+                debug('search: failed to transform %s for the static cost model: %s' % (coord_key, e), obj=self)
+                return None
+            self.transform_time[coord_key] = time.time() - start
+        return self.static_costs.get(coord_key)
 
-        return perf_costs
-    
     #----------------------------------------------------------
 
     def getModelPerfCosts(self, perf_params, coord):
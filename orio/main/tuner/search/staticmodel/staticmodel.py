@@ -0,0 +1,155 @@
+#
+# Implementation of the static model search: rank the variants with the static cost model, measure the best ones
+#
+
+import sys, time, itertools
+import math
+import random
+import orio.main.tuner.search.search
+from orio.main.util.globals import *
+
+#-----------------------------------------------------
+
+class Staticmodel(orio.main.tuner.search.search.Search):
+    '''
+    The search engine that ranks the variants with the static cost model of the transformed loop code
+    (see orio.module.loop.cost_model) and only compiles and measures the most promising fraction of them.
+
+    The candidates are all the coordinates of the search space, or a random sample of them when the
+    space is larger than the number of candidates. Each candidate is transformed once: its code is
+    kept for the measurement if it ranks among the best ones. The cost model settings are given by the
+    cost_model argument of the search section.
+
+    Below is a list of algorithm-specific arguments used to steer the search algorithm.
+      fraction             the fraction of the ranked candidates to be measured, in (0,1] (default: 0.1,
+                           at least one candidate and at most total_runs)
+      candidates           the maximum number of candidates to be ranked (default: 10000)
+    '''
+
+    # algorithm-specific argument names
+    __FRACTION = 'fraction'         # default: 0.1
+    __CANDIDATES = 'candidates'     # default: 10000
+
+    #-----------------------------------------------------
+
+    def __init__(self, params):
+        '''To instantiate a static model search engine'''
+
+        random.seed(1)
+
+        orio.main.tuner.search.search.Search.__init__(self, params)
+
+        # set all algorithm-specific arguments to their default values
+        self.fraction = 0.1
+        self.candidates = 10000
+
+        # read all algorithm-specific arguments
+        self.__readAlgoArgs()
+
+        # the candidates are estimated by the model (modelBased) until they are ranked
+        self.ranking = False
+        if self.cost_model is None:
+            self.createCostModel()
+
+    #-----------------------------------------------------
+
+    def modelBased(self):
+        '''The candidates are evaluated with the static cost model while they are ranked'''
+        return self.ranking
+
+    def getModelPerfCost(self, perf_params, coord):
+        '''Return the static cost of the given coordinate'''
+        cost = self.getStaticCost(coord)
+        if cost is None:
+            cost = self.MAXFLOAT
+        return ([cost], [0.0])
+
+    #-----------------------------------------------------
+
+    def searchBestCoord(self, startCoord=None):
+        '''
+        To rank the candidates with the static cost model and return the measured coordinate that
+        yields the best performance (i.e. minimum performance cost).
+        '''
+
+        info('\n----- begin static model search -----')
+
+        start_time = time.time()
+
+        # the candidates: the whole search space or a random sample of it
+        if self.space_size <= self.candidates:
+            coords = [list(c) for c in itertools.product(*[list(range(n)) for n in self.dim_uplimits])]
+        else:
+            coords, keys = [], set()
+            for _ in range(10 * self.candidates):
+                if len(coords) >= self.candidates:
+                    break
+                coord = self.getRandomCoord()
+                if coord is not None and str(coord) not in keys:
+                    keys.add(str(coord))
+                    coords.append(coord)
+
+        # rank the candidates with the static cost model (the invalid ones are infinitely slow)
+        self.ranking = True
+        try:
+            estimates = self.getPerfCosts(coords)
+        finally:
+            self.ranking = False
+        ranked = sorted([(perf_cost[0][0], eval(key)) for key, perf_cost in list(estimates.items())
+                         if perf_cost[0][0] < self.MAXFLOAT])
+        info('static model search: ranked %d valid candidates out of %d' % (len(ranked), len(coords)))
+
+        # measure the best candidates
+        count = max(1, int(math.ceil(self.fraction * len(ranked))))
+        if self.total_runs > 0:
+            count = min(count, self.total_runs)
+        finalists = [coord for _, coord in ranked[:count]]
+        for coord in [c for _, c in ranked[count:]]:
+            self.static_codes.pop(str(coord), None)
+
+        best_coord = None
+        best_perf_cost = self.MAXFLOAT
+        perf_costs = self.getPerfCosts(finalists) if finalists else {}
+        for coord in finalists:
+            perf_cost, _ = perf_costs[str(coord)]
+            try:
+                mean_perf_cost = sum(perf_cost) / len(perf_cost)
+            except Exception:
+                mean_perf_cost = self.MAXFLOAT
+            debug('static model search: %s, static cost %g, cost %s' % (coord, self.static_costs.get(str(coord)),
+                                                                       mean_perf_cost), obj=self)
+            if mean_perf_cost < best_perf_cost:
+                best_coord, best_perf_cost = coord, mean_perf_cost
+
+        search_time = time.time() - start_time
+
+        info('----- end static model search -----')
+
+        return best_coord, best_perf_cost, search_time, len(finalists)
+
+    #-----------------------------------------------------
+
+    def __readAlgoArgs(self):
+        '''To read all algorithm-specific arguments'''
+
+        # check for algorithm-specific arguments
+        for vname, rhs in self.search_opts.items():
+
+            # the fraction of the candidates to be measured
+            if vname == self.__FRACTION:
+                if not isinstance(rhs, (int, float)) or rhs <= 0 or rhs > 1:
+                    err('orio.main.tuner.search.staticmodel: %s argument "%s" must be a number in (0,1]'
+                        % (self.__class__.__name__, vname))
+                self.fraction = rhs
+
+            # the maximum number of candidates
+            elif vname == self.__CANDIDATES:
+                if not isinstance(rhs, int) or rhs <= 0:
+                    err('orio.main.tuner.search.staticmodel: %s argument "%s" must be a positive integer'
+                        % (self.__class__.__name__, vname))
+                self.candidates = rhs
+
+            # unrecognized algorithm-specific argument
+            else:
+                err('orio.main.tuner.search.staticmodel: unrecognized %s algorithm-specific argument: "%s"' %
+                    (self.__class__.__name__, vname))
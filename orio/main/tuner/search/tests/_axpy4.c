@@ -0,0 +1,68 @@
+
+void axpy_5(int N, double *y, 
+	    double a1, double *x1, double a2, double *x2, 
+	    double a3, double *x3, double a4, double *x4,
+	    double a5, double *x5) {
+
+/*@ begin PerfTuning (
+ def build {
+   arg build_command = 'cc -g @CFLAGS';
+ } 
+ def performance_counter {
+   arg repetitions = 5;
+ }
+ def performance_params {  
+   param UF[] = range(1,11);
+   param CFLAGS[] = ['-O0', '-O1', '-O2', '-O3'];
+   constraint divisible_by_two = (UF % 2 == 0);
+ }
+ def input_params {
+   param N[] = [1000000];
+ }
+ def input_vars {
+   decl dynamic double x1[N] = random;
+   decl dynamic double x2[N] = random;
+   decl dynamic double x3[N] = random;
+   decl dynamic double x4[N] = random;
+   decl dynamic double y[N] = 0;
+   decl double a1 = random;
+   decl double a2 = random;
+   decl double a3 = random;
+   decl double a4 = random;
+ }
+ def search {
+   arg algorithm = 'Simplex';
+   arg total_runs=10;
+ }
+) @*/
+/**-- (Generated by Orio) 
+Best performance cost: 
+  [0.00355601, 0.00334848, 0.00228176, 0.00175271, 0.00158056] 
+Tuned for specific problem sizes: 
+  N = 1000000 
+Best performance parameters: 
+  CFLAGS = -O3 
+  UF = 2 
+--**/
+
+
+  int n=N;
+  register int i;
+
+/*@ begin Loop ( 
+  transform Unroll(ufactor=UF) 
+  for (i=0; i<=n-1; i++)
+    y[i]=y[i]+a1*x1[i]+a2*x2[i]+a3*x3[i]+a4*x4[i];
+) @*/
+{
+  for (int i = 0; i <= n - 2; i = i + 2) {
+    y[i] = y[i] + a1 * x1[i] + a2 * x2[i] + a3 * x3[i] + a4 * x4[i];
+    y[(i + 1)] = y[(i + 1)] + a1 * x1[(i + 1)] + a2 * x2[(i + 1)] + a3 * x3[(i + 1)] + a4 * x4[(i + 1)];
+  }
+  for (int i = n - ((n - (0)) % 2); i <= n - 1; i = i + 1) 
+    y[i] = y[i] + a1 * x1[i] + a2 * x2[i] + a3 * x3[i] + a4 * x4[i];
+}
+/*@ end @*/
+/*@ end @*/
+
+}